@@ -0,0 +1,231 @@
+# -----------------------------------------------------------------------------
+# narrtr: arena.py
+# This file defines the flat, array-backed representation of the narratr AST.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+from array import array
+from node import Node, NO_CHILDREN
+import kinds
+
+# Values of these types are kept once per arena, however many nodes have
+# them. Anything else (the dictionaries of the blocks node, the test node
+# that is the value of a while statement) is kept as it is.
+_INTERNED = frozenset([str, unicode, int, long, float, bool, type(None)])
+
+
+class NodeArena(object):
+    """A whole AST in a few parallel arrays, instead of an object per node.
+
+    Node i has the kind kinds[i], the value constants[values[i]], the
+    v_type constants[v_types[i]] and the line number linenos[i]. Its
+    children are the entries child_indexes[starts[i]:starts[i] + counts[i]]:
+    the index of a child node, or -1 - c for a child that is not a node (a
+    dictionary, a string or None), which is constants[c]. Few nodes have a
+    key, so keys are kept in a dictionary.
+
+    node() takes the arguments of Node() and returns an ArenaNode, a view
+    that works like a Node, so the parser can build into an arena and
+    CodeGen and print_tree can read it."""
+    def __init__(self):
+        self.kinds = array("H")
+        self.values = array("i")
+        self.v_types = array("i")
+        self.linenos = array("i")
+        self.starts = array("i")
+        self.counts = array("i")
+        self.child_indexes = array("i")
+        self.keys = {}
+        self.constants = []
+        self._constant_codes = {}
+        # The number of child_indexes entries left behind by append_child.
+        self.moved = 0
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def node(self, v, t, c=NO_CHILDREN, v_type=None, lineno=0, key=None):
+        """Add a node to the arena and return a view of it."""
+        index = len(self.kinds)
+        self.kinds.append(t if isinstance(t, int) else kinds.code(t))
+        self.values.append(self.constant(v))
+        self.v_types.append(self.constant(v_type))
+        self.linenos.append(lineno)
+        self.starts.append(len(self.child_indexes))
+        self.counts.append(len(c))
+        self.child_indexes.extend([self.encode(child) for child in c])
+        if key is not None:
+            self.keys[index] = key
+        return ArenaNode(self, index)
+
+    def constant(self, value):
+        """Return the index of value in constants, adding it if needed."""
+        if type(value) not in _INTERNED:
+            self.constants.append(value)
+            return len(self.constants) - 1
+        # 1, 1.0 and True are equal, but they are different constants.
+        key = value if type(value) is str else (type(value), value)
+        code = self._constant_codes.get(key)
+        if code is None:
+            code = self._constant_codes[key] = len(self.constants)
+            self.constants.append(value)
+        return code
+
+    def encode(self, child):
+        if isinstance(child, ArenaNode) and child.arena is self:
+            return child.index
+        return -1 - self.constant(child)
+
+    def decode(self, code):
+        if code >= 0:
+            return ArenaNode(self, code)
+        return self.constants[-1 - code]
+
+    def append_child(self, index, child):
+        """Add child after the last child of node index.
+
+        The children of a node have to be next to each other in
+        child_indexes, so unless they are at the end of it they are copied
+        there first. compact() reclaims the entries they leave behind."""
+        start, count = self.starts[index], self.counts[index]
+        if start + count != len(self.child_indexes):
+            self.child_indexes.extend(self.child_indexes[start:start + count])
+            self.starts[index] = len(self.child_indexes) - count
+            self.moved += count
+        self.child_indexes.append(self.encode(child))
+        self.counts[index] = count + 1
+
+    def compact(self):
+        """Drop the child_indexes entries that append_child left behind."""
+        if not self.moved:
+            return
+        child_indexes = array("i")
+        starts, counts = self.starts, self.counts
+        for index in xrange(len(starts)):
+            start = starts[index]
+            starts[index] = len(child_indexes)
+            child_indexes.extend(self.child_indexes[start:start +
+                                                    counts[index]])
+        self.child_indexes = child_indexes
+        self.moved = 0
+
+
+class ArenaNode(Node):
+    """A view of node index of arena that works like a Node.
+
+    A view only holds the arena and the index, and views are made as they
+    are needed, so two views of the same node are equal but not the same
+    object. Setting an attribute of a view changes the node in the arena."""
+    __slots__ = ("arena", "index")
+
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+
+    def _get_value(self):
+        return self.arena.constants[self.arena.values[self.index]]
+
+    def _set_value(self, value):
+        self.arena.values[self.index] = self.arena.constant(value)
+
+    def _get_kind(self):
+        return self.arena.kinds[self.index]
+
+    def _set_kind(self, kind):
+        self.arena.kinds[self.index] = kind
+
+    def _get_v_type(self):
+        return self.arena.constants[self.arena.v_types[self.index]]
+
+    def _set_v_type(self, v_type):
+        self.arena.v_types[self.index] = self.arena.constant(v_type)
+
+    def _get_lineno(self):
+        return self.arena.linenos[self.index]
+
+    def _set_lineno(self, lineno):
+        self.arena.linenos[self.index] = lineno
+
+    def _get_key(self):
+        return self.arena.keys.get(self.index)
+
+    def _set_key(self, key):
+        if key is None:
+            self.arena.keys.pop(self.index, None)
+        else:
+            self.arena.keys[self.index] = key
+
+    def _get_children(self):
+        return ArenaChildren(self.arena, self.index)
+
+    value = property(_get_value, _set_value)
+    kind = property(_get_kind, _set_kind)
+    v_type = property(_get_v_type, _set_v_type)
+    lineno = property(_get_lineno, _set_lineno)
+    key = property(_get_key, _set_key)
+    children = property(_get_children)
+
+    def __eq__(self, other):
+        return isinstance(other, ArenaNode) and other.arena is self.arena \
+            and other.index == self.index
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self.arena), self.index))
+
+    def is_leaf(self):
+        return self.arena.counts[self.index] == 0
+
+    def __getitem__(self, index):
+        count = self.arena.counts[self.index]
+        if count == 0:
+            raise Exception("Node has no children.")
+        if index >= count or index < 0:
+            raise Exception("Node index out of bounds.")
+        arena = self.arena
+        return arena.decode(arena.child_indexes[arena.starts[self.index] +
+                                                index])
+
+
+class ArenaChildren(object):
+    """The children of an ArenaNode, as a sequence that can be appended to.
+
+    Indexing and iterating give views of the child nodes; a slice is a
+    list."""
+    __slots__ = ("arena", "index")
+
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+
+    def _codes(self):
+        start = self.arena.starts[self.index]
+        return self.arena.child_indexes[start:start +
+                                        self.arena.counts[self.index]]
+
+    def __len__(self):
+        return self.arena.counts[self.index]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.arena.decode(code) for code in self._codes()[index]]
+        return self.arena.decode(self._codes()[index])
+
+    def __iter__(self):
+        return (self.arena.decode(code) for code in self._codes())
+
+    def __repr__(self):
+        return repr(self[:])
+
+    def append(self, child):
+        self.arena.append_child(self.index, child)
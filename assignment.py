@@ -0,0 +1,164 @@
+# -----------------------------------------------------------------------------
+# narrtr: assignment.py
+# This file finds the reads of scene variables that may come before the
+# variable is set.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+from node import Node
+import kinds
+
+# The kinds of statement that only hold the statement in their first child.
+_WRAPPERS = frozenset([kinds.SUITE, kinds.STATEMENT, kinds.SIMPLE_STATEMENT,
+                       kinds.BLOCK_STATEMENT, kinds.FLOW_STATEMENT])
+
+# The steps of _walk(): look at a statement, look at the reads of an
+# expression, mark a slot as set, go back to a set of slots, keep the slots
+# set at the end of a branch of an if that every branch so far has set, and
+# go on with those.
+_STATEMENT, _READS, _SET, _RESET, _MEET, _JOIN = range(6)
+
+
+# This returns the slot of the scene variable an atom names, or None.
+def _slot(symtab, atom):
+    entry = symtab.getWithKey(atom.key)
+    return entry and entry.slot
+
+
+# This adds the atoms of expression that read a slot which is not in
+# assigned to unset. It is a loop over a stack of nodes, as in
+# reachability.py, so an expression can be nested as deeply as it likes.
+def _reads(expression, assigned, symtab, unset):
+    stack = [expression]
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        node = pop()
+        if not isinstance(node, Node):
+            continue
+        if node.kind == kinds.ATOM and node.is_leaf():
+            slot = _slot(symtab, node)
+            if slot is not None and slot not in assigned:
+                unset.add(node)
+        else:
+            extend(node.children)
+
+
+# This walks the statements of suite in the order they run, starting with
+# the slots in assigned set, and adds the atoms that may read a slot before
+# it is set to unset. A slot is set after a statement if every way through
+# the statement sets it: both sides of an if and else, and never a while,
+# whose body may not run. The body of a while starts with the slots set
+# before it, since a later pass through the loop only has more. assigned is
+# left with the slots set at the end of suite. While all count slots are
+# set, no read can find one unset, so statements are passed over. The steps
+# left are kept on a stack, so statements can be nested as deeply as a
+# game likes.
+def _walk(suite, assigned, count, symtab, unset):
+    stack = [(_STATEMENT, suite)]
+    pop = stack.pop
+    append = stack.append
+    while stack:
+        step, arg = pop()
+        if step == _READS:
+            if len(assigned) < count:
+                _reads(arg, assigned, symtab, unset)
+        elif step == _SET:
+            assigned.add(arg)
+        elif step == _RESET:
+            assigned.clear()
+            assigned.update(arg)
+        elif step == _MEET:
+            if arg:
+                arg[0] &= assigned
+            else:
+                arg.append(set(assigned))
+        elif step == _JOIN:
+            assigned.clear()
+            assigned.update(arg[0])
+        elif len(assigned) == count or not isinstance(arg, Node):
+            continue
+        else:
+            kind = arg.kind
+            children = arg.children
+            if kind in _WRAPPERS:
+                append((_STATEMENT, children[0]))
+            elif kind == kinds.STATEMENTS:
+                stack.extend((_STATEMENT, smt) for smt in reversed(children))
+            elif kind == kinds.EXPRESSION_STATEMENT and arg.value == "is":
+                slot = _slot(symtab, children[0])
+                if slot is not None:
+                    append((_SET, slot))
+                append((_READS, children[1]))
+            elif kind == kinds.WHILE_STATEMENT:
+                append((_RESET, set(assigned)))
+                append((_STATEMENT, children[1]))
+                append((_READS, children[0]))
+            elif kind == kinds.IF_STATEMENT:
+                _if(children, assigned, append)
+            else:
+                append((_READS, arg))
+
+
+# This adds the steps of an if statement, whose children are children, to
+# the steps of _walk(). The tests are read first, with the slots set before
+# the if, and each branch starts with those slots. After the if, the slots
+# set are those every branch sets, or those set before it if there is no
+# else, since then no branch may run.
+def _if(children, assigned, append):
+    tests = [children[0]]
+    suites = [children[1]]
+    if children[2]:
+        for elif_smt in children[2].children:
+            tests.append(elif_smt[0])
+            suites.append(elif_smt[1])
+    before = set(assigned)
+    if children[3]:
+        suites.append(children[3])
+        met = []
+        append((_JOIN, met))
+        for branch in reversed(suites):
+            append((_MEET, met))
+            append((_STATEMENT, branch))
+            append((_RESET, before))
+    else:
+        append((_RESET, before))
+        for branch in reversed(suites):
+            append((_STATEMENT, branch))
+            append((_RESET, before))
+    for test in reversed(tests):
+        append((_READS, test))
+
+
+def unset_reads(scene, symtab):
+    """Return the atoms of scene that may read a scene variable before it is
+    set.
+
+    The variables of a scene are unset at the start of every visit, and set
+    by "is". Setup runs first, and action runs after setup has run to the
+    end, so action starts with the variables setup always sets. Cleanup
+    may be run by a moveto anywhere in setup or action, so it starts with
+    none. A read is only left out if every way to it sets the variable; the
+    conditions of ifs and whiles are not looked at, so a read may be in the
+    result and still never come first.
+
+    The result is a set of atom nodes (see CodeGen._process_atom())."""
+    unset = set()
+    assigned = set()
+    count = symtab.slotCount(scene.value)
+    for block in scene.children:
+        if not isinstance(block, Node) or block.is_leaf():
+            continue
+        if block.kind == kinds.CLEANUP_BLOCK:
+            _walk(block.children[0], set(), count, symtab, unset)
+        else:
+            _walk(block.children[0], assigned, count, symtab, unset)
+    return unset
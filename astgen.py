@@ -0,0 +1,744 @@
+# -----------------------------------------------------------------------------
+# narrtr: astgen.py
+# This file contains a code generator that builds the target program as a
+# Python ast tree and compiles it with compile(), without going through
+# Python source.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+import ast
+import contextlib
+import gc
+from assignment import unset_reads
+from codegen import CodeGen, POCKET_CLASS, GET_RESPONSE, UNSET_VAR
+from node import Node
+from visitor import dispatch_table
+import kinds
+import pysource
+
+# Contexts and operators have no fields, so one of each is shared by every
+# node that needs it.
+_LOAD = ast.Load()
+_STORE = ast.Store()
+_PARAM = ast.Param()
+_COMPARISON_OPS = {"<": ast.Lt(), ">": ast.Gt(), "<=": ast.LtE(),
+                   ">=": ast.GtE(), "==": ast.Eq(), "!=": ast.NotEq(),
+                   "not": ast.NotEq()}
+_ARITHMETIC_OPS = {"+": ast.Add(), "-": ast.Sub()}
+_TERM_OPS = {"*": ast.Mult(), "/": ast.Div(), "//": ast.FloorDiv()}
+_UNARY_OPS = {"+": ast.UAdd(), "-": ast.USub()}
+_POCKET_METHODS = ["add", "get", "remove", "has", "update"]
+
+# Python cannot read source nested about 90 levels deep (parentheses and
+# brackets, or 100 levels of indentation), though it compiles an AST of any
+# depth. The source of a program whose AST is at least this deep is parsed
+# before it is written, to make sure Python can read it.
+_DEEP = 50
+
+# The statements of UNSET_VAR, POCKET_CLASS and GET_RESPONSE, which are the
+# same in every program. They are parsed the first time they are needed and
+# the statements are shared by every program built after that.
+_runtime = []
+
+
+def _load(name):
+    return ast.Name(name, _LOAD)
+
+
+def _self_attr(name, ctx):
+    return ast.Attribute(_load("self"), name, ctx)
+
+
+def _call(func, args):
+    return ast.Call(func, args, [], None, None)
+
+
+def _method(name, args):
+    return ast.FunctionDef(name, ast.arguments([ast.Name(arg, _PARAM)
+                                                for arg in args],
+                                               None, None, []), [], [])
+
+
+def _tuple(values):
+    if len(values) == 1:
+        return values[0]
+    return ast.Tuple(list(values), _LOAD)
+
+
+def _statements(*bodies):
+    statements = []
+    for body in bodies:
+        statements.extend(body)
+    return statements
+
+
+# For each type of node: whether it has a line number, and the fields that
+# can hold other nodes.
+_layouts = {}
+
+
+def _layout(cls):
+    fields = tuple(field for field in cls._fields
+                   if field not in ("ctx", "op", "ops", "n", "s", "id",
+                                    "name", "attr", "module", "level", "nl"))
+    layout = _layouts[cls] = ("lineno" in cls._attributes, fields)
+    return layout
+
+
+def locate(tree):
+    """Give every node of tree that has no line number line 1, column 0.
+
+    This does what ast.fix_missing_locations() does for compile(), but
+    keeps the nodes left to visit on a stack rather than by recursion, so
+    it works on trees of any depth."""
+    stack = [tree]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        node = pop()
+        layout = _layouts.get(type(node)) or _layout(type(node))
+        if layout[0] and "lineno" not in node.__dict__:
+            node.lineno = 1
+            node.col_offset = 0
+        for field in layout[1]:
+            value = getattr(node, field, None)
+            if type(value) is list:
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        push(item)
+            elif isinstance(value, ast.AST):
+                push(value)
+    return tree
+
+
+def depth(tree):
+    """Return the number of levels of tree.
+
+    Like locate(), it works on trees of any depth: it goes through the
+    tree a level at a time rather than by recursion."""
+    levels = 0
+    level = [tree]
+    while level:
+        levels += 1
+        below = []
+        push = below.append
+        for node in level:
+            layout = _layouts.get(type(node)) or _layout(type(node))
+            for field in layout[1]:
+                value = getattr(node, field, None)
+                if type(value) is list:
+                    for item in value:
+                        if isinstance(item, ast.AST):
+                            push(item)
+                elif isinstance(value, ast.AST):
+                    push(value)
+        level = below
+    return levels
+
+
+# The cycle collector is paused while the program is built and compiled:
+# the many objects made would start collections that go through the whole
+# AST, and the trees built have no cycles to collect.
+@contextlib.contextmanager
+def _collector_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class _Build(object):
+    """A Python node that is made from the values of some parts: make is
+    called with the value of each part, in order, once they are built."""
+    __slots__ = ("make", "parts")
+
+    def __init__(self, make, parts):
+        self.make = make
+        self.parts = parts
+
+
+class ASTCodeGen(CodeGen):
+    """A code generator that builds the target program as a Python ast.
+
+    process() is the same as for CodeGen, but self.scenes and self.items
+    hold ast.ClassDef nodes and self.main a list of statements. module()
+    returns the whole program as an ast.Module, code() compiles it to a
+    code object, and construct() writes the program rendered as Python
+    source (see pysource.py), for debugging and for running the game with
+    the python command. The program does the same as the one CodeGen
+    writes."""
+    def __init__(self, omit_unreachable=False, warn_unreachable=False):
+        CodeGen.__init__(self, omit_unreachable=omit_unreachable,
+                         warn_unreachable=warn_unreachable)
+        # The function for each kind of node, as in CodeGen. A function
+        # takes the node and returns a Python node (an expression), a list
+        # of Python statements, a node of the AST that takes the place of
+        # the node, or a _Build for _build() to finish.
+        self.builders = dispatch_table({
+            kinds.SUITE: self._build_suite,
+            kinds.STATEMENTS: self._build_statements,
+            kinds.STATEMENT: self._build_only_child,
+            kinds.SIMPLE_STATEMENT: self._build_only_child,
+            kinds.BLOCK_STATEMENT: self._build_only_child,
+            kinds.FLOW_STATEMENT: self._build_only_child,
+            kinds.SAY_STATEMENT: self._build_say_smt,
+            kinds.EXPOSITION: self._build_say_smt,
+            kinds.WIN_STATEMENT: self._build_end_smt,
+            kinds.LOSE_STATEMENT: self._build_end_smt,
+            kinds.EXPRESSION_STATEMENT: self._build_expression_smt,
+            kinds.CONTINUE_STATEMENT: self._build_continue,
+            kinds.BREAK_STATEMENT: self._build_break,
+            kinds.MOVES_DECLARATION: self._build_moves_dec,
+            kinds.MOVETO_STATEMENT: self._build_moveto,
+            kinds.IF_STATEMENT: self._build_ifstatement,
+            kinds.ELIF_STATEMENTS: self._build_elifstatements,
+            kinds.ELIF_STATEMENT: self._build_elifstatement,
+            kinds.WHILE_STATEMENT: self._build_whilestatement,
+            kinds.OR_TEST: self._build_bool_op,
+            kinds.AND_TEST: self._build_bool_op,
+            kinds.NOT_TEST: self._build_not_test,
+            kinds.COMPARISON: self._build_comparison,
+            kinds.ARITHMETIC_EXPRESSION: self._build_bin_op,
+            kinds.TERM: self._build_bin_op,
+            kinds.FACTOR: self._build_factor,
+            kinds.POWER: self._build_power,
+            kinds.ATOM: self._build_atom,
+            kinds.LIST: self._build_list,
+            kinds.NUMBER: self._build_number,
+            kinds.BOOLEAN: self._build_boolean,
+        }, self._build_bad_node)
+
+    def process(self, node, symtab):
+        """Build the program from the narratr AST, as CodeGen.process()."""
+        with _collector_paused():
+            CodeGen.process(self, node, symtab)
+
+    def module(self):
+        """Return the program as an ast.Module, ready for compile()."""
+        if self.main == "":
+            self._process_warning("No start scene specified. " +
+                                  "Defaulting to $1.")
+            self._add_main(1)
+        body = [ast.ImportFrom("__future__", [ast.alias("division", None)],
+                               0),
+                ast.ImportFrom("sys", [ast.alias("exit", None)], 0)]
+        return locate(ast.Module(body + self.scenes + self.items +
+                                 self.main))
+
+    def code(self, filename="<narratr>"):
+        """Return the program compiled to a code object.
+
+        The code object is what Python makes of the source construct()
+        writes, but the source is never written or parsed. filename is the
+        name tracebacks give for the program. A program Python cannot
+        compile (one with loops nested more than 20 deep) is an error."""
+        module = self.module()
+        try:
+            with _collector_paused():
+                return compile(module, filename, "exec", 0, True)
+        except SyntaxError as e:
+            self._process_error("The generated program does not compile: " +
+                                str(e.msg))
+
+    def construct(self, outputfile="stdout"):
+        """Write the program rendered as Python source to outputfile.
+
+        A program nested too deeply for Python to read as source is an
+        error, and nothing is written."""
+        module = self.module()
+        source = "#!/usr/bin/env python\n" + pysource.render(module)
+        if depth(module) >= _DEEP:
+            try:
+                compile(source, outputfile, "exec", ast.PyCF_ONLY_AST)
+            except (SyntaxError, MemoryError):
+                self._process_error("The generated program is nested too " +
+                                    "deeply to be written as Python source.")
+        if outputfile == "stdout":
+            print source
+        else:
+            with open(outputfile, 'w') as f:
+                f.write(source)
+
+    # The main code: the pocket and get_response(), an instance of each
+    # scene and the loop that runs the game. The checks are those of
+    # CodeGen._add_main().
+    def _add_main(self, startstate):
+        if self.main != "":
+            self._process_error("Multiple start scene declarations.",
+                                startstate.lineno)
+        if isinstance(startstate, Node):
+            ss = startstate.value
+        else:
+            ss = startstate
+        if ss not in self.scene_nums:
+            self._process_error("Start scene $" + str(ss) +
+                                " does not exist.")
+        self.startstate = ss
+        if not _runtime:
+            _runtime.extend(ast.parse(UNSET_VAR + POCKET_CLASS +
+                                      GET_RESPONSE).body)
+        main = list(_runtime)
+        for s in self.scene_nums:
+            main.append(ast.Assign([ast.Name("s_" + str(s) + "_inst",
+                                             _STORE)],
+                                   _call(_load("s_" + str(s)), [])))
+        start = _call(ast.Attribute(_load("s_" + str(ss) + "_inst"),
+                                    "setup", _LOAD), [])
+        loop = ast.While(_load("True"), [ast.Exec(
+            ast.BinOp(ast.Str("next = "), ast.Add(), _load("next")),
+            None, None)], [])
+        main.append(ast.If(ast.Compare(_load("__name__"), [ast.Eq()],
+                                       [ast.Str("__main__")]),
+                           [ast.Assign([ast.Name("next", _STORE)],
+                                       start), loop], []))
+        self.main = main
+
+    # A scene is a class with the same methods as the one CodeGen makes,
+    # and its variables are kept in the same slots.
+    def _scene_gen(self, scene, sid):
+        slots = self._slot_names(sid)
+        self.unset_reads = unset_reads(scene, self.symtab) if slots else ()
+        init = _method("__init__", ["self"])
+        if slots:
+            init.body = [ast.Assign([_self_attr("__vars", _STORE)],
+                                    self._empty_slots(slots))]
+        else:
+            init.body = [ast.Pass()]
+        body = [init]
+        for c in scene.children:
+            if c.kind == kinds.SETUP_BLOCK:
+                body.append(self._build_setup_block(c, slots))
+            elif c.kind == kinds.CLEANUP_BLOCK:
+                body.append(self._build_cleanup_block(c, slots))
+            elif c.kind == kinds.ACTION_BLOCK:
+                body.append(self._build_action_block(c, slots))
+        self.scene_nums.append(sid)
+        return ast.ClassDef("s_" + str(sid), [], body, [])
+
+    def _item_gen(self, item, iid):
+        iid = item.value
+        self.item_names.append(iid)
+        params = ["self"]
+        if len(item.children) not in [1, 2]:
+            self._process_error("Wrong number of children of item",
+                                item.lineno)
+        elif item[0].kind != kinds.ITEMPARAMS:
+            self._process_error("Wrong number of items", item.lineno)
+        elif len(item[0].children) == 1:
+            params += [str(param.value) for param in item[0][0].children]
+        init = _method("__init__", params)
+        if len(item.children) == 1:
+            init.body = [ast.Pass()]
+        elif item[1].kind != kinds.SUITE:
+            self._process_error("Wrong type of child for item", item.lineno)
+        else:
+            init.body = self._build(item[1])
+        return ast.ClassDef(str(iid), [], [init], [])
+
+    def _empty_slots(self, slots):
+        return ast.List([_call(_load("unset_var"), [ast.Str(name)])
+                         for name in slots], _LOAD)
+
+    def _vars_alias(self, slots):
+        if slots:
+            return [ast.Assign([ast.Name("__vars", _STORE)],
+                               _self_attr("__vars", _LOAD))]
+        return []
+
+    # The body of a block, or no statements for a block without one.
+    def _block_body(self, c, name):
+        if len(c.children) not in [0, 1]:
+            self._process_error(name + " block has wrong number of children")
+        if len(c.children) == 1:
+            if c[0].kind != kinds.SUITE:
+                self._process_error(name + " block doesn't have suite child")
+            else:
+                return self._build(c[0])
+        return []
+
+    def _build_setup_block(self, c, slots):
+        setup = _method("setup", ["self"])
+        setup.body = [ast.Assign([ast.Name("direction", _STORE)],
+                                 ast.Dict([], []))]
+        setup.body += self._vars_alias(slots)
+        setup.body += self._block_body(c, "setup")
+        setup.body.append(ast.Return(_call(_self_attr("action", _LOAD),
+                                           [_load("direction")])))
+        return setup
+
+    def _build_cleanup_block(self, c, slots):
+        cleanup = _method("cleanup", ["self"])
+        cleanup.body = self._vars_alias(slots) + \
+            self._block_body(c, "cleanup")
+        if slots:
+            cleanup.body.append(ast.Assign([ast.Subscript(
+                _load("__vars"), ast.Slice(None, None, None), _STORE)],
+                self._empty_slots(slots)))
+        else:
+            cleanup.body.append(ast.Pass())
+        return cleanup
+
+    def _build_action_block(self, c, slots):
+        action = _method("action", ["self", "direction"])
+        response = ast.Name("response", _STORE)
+        moved = ast.If(_call(_load("isinstance"), [_load("response"),
+                                                   _load("list")]),
+                       [ast.Expr(_call(_self_attr("cleanup", _LOAD),
+                                       [])),
+                        ast.Return(ast.Subscript(_load("response"),
+                                                 ast.Index(ast.Num(0)),
+                                                 _LOAD))], [])
+        loop = ast.While(_load("True"), [
+            ast.Assign([response], _call(_load("get_response"),
+                                         [_load("direction")])),
+            moved] + self._block_body(c, "action"), [])
+        action.body = self._vars_alias(slots) + \
+            [ast.Assign([response], ast.Str("")), loop]
+        return action
+
+    # This function builds the Python node for a node of the AST. Each
+    # node is sent to the function for its kind; a _Build it returns is
+    # finished once its parts are built. The nodes left to build are kept
+    # on a stack, as in CodeGen._generate(), with a (make, count) pair
+    # marking where a _Build is finished from the last count values, so
+    # statements and expressions can be nested as deeply as a game likes.
+    def _build(self, node):
+        builders = self.builders
+        values = []
+        stack = [node]
+        pop = stack.pop
+        while stack:
+            part = pop()
+            if type(part) is tuple:
+                make, count = part
+                start = len(values) - count
+                value = make(*values[start:])
+                del values[start:]
+                values.append(value)
+                continue
+            while isinstance(part, Node):
+                part = builders[part.kind](part)
+            if type(part) is _Build:
+                stack.append((part.make, len(part.parts)))
+                stack.extend(reversed(part.parts))
+            else:
+                values.append(part)
+        return values[0]
+
+    def _build_bad_node(self, node):
+        self._process_error("Unexpected " + node.type + " in the program.",
+                            node.lineno)
+
+    def _build_suite(self, suite):
+        if len(suite.children) != 1:
+            self._process_error("Too many children in suite.")
+        return suite[0]
+
+    def _build_statements(self, statements):
+        return _Build(_statements, statements.children)
+
+    def _build_only_child(self, smt):
+        if len(smt.children) != 1:
+            self._process_error(smt.type.replace("_", " ").capitalize() +
+                                " has no children to process.", smt.lineno)
+        return smt[0]
+
+    def _testlist(self, testlist):
+        if len(testlist.children) == 0:
+            self._process_error("Testlist has no children to process.",
+                                testlist.lineno)
+        return testlist.children
+
+    def _build_say_smt(self, smt):
+        if len(smt.children) == 0:
+            self._process_error(smt.type.replace("_", " ").capitalize() +
+                                " has no children to process.", smt.lineno)
+        return _Build(lambda *values: [ast.Print(None, list(values), True)],
+                      self._testlist(smt[0]))
+
+    # Win and lose print what they are given, if anything, and end the
+    # game.
+    def _build_end_smt(self, smt):
+        end = [ast.Expr(_call(_load("exit"), [ast.Num(0)]))]
+        if len(smt.children) == 0:
+            return end
+        return _Build(lambda *values: [ast.Print(None, list(values), True)] +
+                      end, self._testlist(smt[0]))
+
+    def _build_expression_smt(self, smt):
+        if len(smt.children) == 0:
+            self._process_error("expression statement has no children to" +
+                                " process.", smt.lineno)
+        if smt.value == "testlist":
+            return _Build(lambda *values: [ast.Expr(_tuple(values))],
+                          self._testlist(smt[0]))
+        name = smt[0].value
+        if smt.value == "is":
+            entry = self.symtab.getWithKey(smt[0].key)
+            if entry is None:
+                self._process_error("Something bad happened while " +
+                                    "processing 'expression statement'. " +
+                                    "Unfortunately, that is all we know.",
+                                    smt.lineno)
+            elif entry.slot is not None:
+                target = ast.Subscript(_load("__vars"),
+                                       ast.Index(ast.Num(entry.slot)),
+                                       _STORE)
+            else:
+                target = _self_attr(name, _STORE)
+            return _Build(lambda *values: [ast.Assign([target],
+                                                      _tuple(values))],
+                          self._testlist(smt[1]))
+        if smt.value == "godis":
+            # A god variable is only set the first time the block runs.
+            return _Build(lambda *values: [ast.TryExcept(
+                [ast.Expr(_self_attr(name, _LOAD))],
+                [ast.ExceptHandler(_load("AttributeError"), None,
+                                   [ast.Assign([_self_attr(name,
+                                                           _STORE)],
+                                               _tuple(values))])], [])],
+                self._testlist(smt[1]))
+        return []
+
+    def _build_continue(self, smt):
+        return [ast.Continue()]
+
+    def _build_break(self, smt):
+        return [ast.Break()]
+
+    def _build_moves_dec(self, smt):
+        if len(smt.children) != 1:
+            self._process_error("moves declaration has wrong number of " +
+                                "children")
+        elif smt[0].kind != kinds.DIRECTIONLIST:
+            self._process_error("moves declaration has wrong type of children")
+        keys = []
+        values = []
+        if len(smt[0].children) < 1:
+            self._process_error("directionlist has no children")
+        for d in smt[0].children:
+            if len(d.children) != 1:
+                self._process_error("incorrect children of direction")
+            keys.append(ast.Str(str(d.value)))
+            values.append(ast.Num(d[0].value))
+        return [ast.Assign([ast.Name("direction", _STORE)],
+                           ast.Dict(keys, values))]
+
+    def _build_moveto(self, smt):
+        if len(smt.children) != 1:
+            self._process_error("moveto has the wrong number of children")
+        elif smt[0].kind != kinds.SCENEID:
+            self._process_error("moveto has wrong kind of child")
+        return [ast.Expr(_call(_self_attr("cleanup", _LOAD), [])),
+                ast.Return(ast.Str("s_" + str(smt[0].value) +
+                                   "_inst.setup()"))]
+
+    # The elifs of an if become the else of the if (or elif) before them.
+    def _build_ifstatement(self, smt):
+        def make(test, body, elifs, orelse):
+            orelse = orelse or []
+            for elif_statement in reversed(elifs or []):
+                elif_statement.orelse = orelse
+                orelse = [elif_statement]
+            return [ast.If(test, body, orelse)]
+        return _Build(make, [smt[0], smt[1], smt[2] or None,
+                             smt[3] or None])
+
+    def _build_elifstatements(self, elif_smts):
+        for child in elif_smts.children:
+            if child.kind != kinds.ELIF_STATEMENT:
+                self._process_error("Invalid child of elif_statements",
+                                    elif_smts.lineno)
+        return _Build(lambda *elifs: list(elifs), elif_smts.children)
+
+    def _build_elifstatement(self, smt):
+        if not isinstance(smt[0], Node) or smt[1].kind != kinds.SUITE:
+            self._process_error("Invalid elif tree", smt.lineno)
+        return _Build(lambda test, body: ast.If(test, body, []),
+                      [smt[0], smt[1]])
+
+    def _build_whilestatement(self, smt):
+        if not isinstance(smt[0], Node):
+            self._process_error("No test in while loop", smt.lineno)
+        if smt[1].kind != kinds.SUITE:
+            self._process_error("No suite in while loop", smt.lineno)
+        return _Build(lambda test, body: [ast.While(test, body, [])],
+                      [smt[0], smt[1]])
+
+    def _build_bool_op(self, test):
+        if len(test.children) != 2:
+            self._process_error("'" + test.type + "' has incorrect number " +
+                                "of children.", test.lineno)
+        op = ast.Or() if test.kind == kinds.OR_TEST else ast.And()
+        return _Build(lambda left, right: ast.BoolOp(op, [left, right]),
+                      test.children)
+
+    def _build_not_test(self, not_test):
+        if len(not_test.children) != 1:
+            self._process_error("'not_test' has incorrect number of children.",
+                                not_test.lineno)
+        return _Build(lambda operand: ast.UnaryOp(ast.Not(), operand),
+                      not_test.children)
+
+    def _build_comparison(self, comparison):
+        if len(comparison.children) != 3:
+            self._process_error("'comparison' has incorrect number of " +
+                                "children.", comparison.lineno)
+        op = _COMPARISON_OPS.get(comparison[1].value)
+        if op is None:
+            self._process_error("Illegal comparison operator " +
+                                str(comparison[1].value), comparison.lineno)
+        return _Build(lambda left, right: ast.Compare(left, [op], [right]),
+                      [comparison[0], comparison[2]])
+
+    # Arithmetic expressions (+ and -) and terms (*, / and //).
+    def _build_bin_op(self, exp):
+        if len(exp.children) != 2:
+            self._process_error("'" + exp.type + "' has incorrect " +
+                                "number of children.", exp.lineno)
+        if exp.kind == kinds.TERM:
+            op = _TERM_OPS.get(exp.value)
+        else:
+            op = _ARITHMETIC_OPS.get(exp.value)
+        if op is None:
+            self._process_error("Illegal operation type for '" + exp.type +
+                                "'", exp.lineno)
+        return _Build(lambda left, right: ast.BinOp(left, op, right),
+                      exp.children)
+
+    def _build_factor(self, factor):
+        if len(factor.children) != 1:
+            self._process_error("'factor' has incorrect " +
+                                "number of children.", factor.lineno)
+        op = _UNARY_OPS.get(factor.value)
+        if op is None:
+            self._process_error("Illegal operation type for " +
+                                "'factor'", factor.lineno)
+        return _Build(lambda operand: ast.UnaryOp(op, operand),
+                      factor.children)
+
+    # An atom followed by trailers: attributes (.name) and calls. The
+    # pocket is checked as in CodeGen._process_pocket().
+    def _build_power(self, power):
+        if len(power.children) < 2:
+            self._process_error("'power' has incorrect " +
+                                "number of children.", power.lineno)
+        if power[0].v_type == "id" and power[0].value == "pocket" and \
+                not self.symtab.resolve("pocket", "GLOBAL"):
+            self._check_pocket(power)
+        shape = []
+        parts = [power[0]]
+        for trailer in power.children[1:]:
+            if len(trailer.children) != 1:
+                self._process_error("'trailer' has incorrect " +
+                                    "number of children.", trailer.lineno)
+            if trailer.value == "dot":
+                shape.append(str(trailer[0]))
+            elif trailer.value == "calllist":
+                args = self._args(trailer[0])
+                shape.append(len(args))
+                parts += args
+            else:
+                self._process_error("Illegal value type for 'trailer'",
+                                    trailer.lineno)
+
+        def make(*values):
+            value = values[0]
+            i = 1
+            for trailer in shape:
+                if isinstance(trailer, str):
+                    value = ast.Attribute(value, trailer, _LOAD)
+                else:
+                    value = _call(value, list(values[i:i + trailer]))
+                    i += trailer
+            return value
+        return _Build(make, parts)
+
+    def _check_pocket(self, pocket_node):
+        if len(pocket_node.children) != 3:
+            self._process_error("pocket has wrong number of children",
+                                pocket_node.lineno)
+        if pocket_node[1].value != "dot":
+            self._process_error("pocket must be followed by a dot",
+                                pocket_node.lineno)
+        if len(pocket_node[1].children) != 1:
+            self._process_error("no method specified for pocket",
+                                pocket_node.lineno)
+        if pocket_node[1].children[0] not in _POCKET_METHODS:
+            self._process_error("invalid method for pocket",
+                                pocket_node.lineno)
+
+    # The arguments of a call, as a list of expression nodes.
+    def _args(self, calllist):
+        if len(calllist.children) not in [0, 1]:
+            self._process_error("'calllist' has incorrect " +
+                                "number of children.", calllist.lineno)
+        if not calllist.value:
+            return []
+        if calllist.value != "args":
+            self._process_error("Illegal value type for 'calllist'",
+                                calllist.lineno)
+        args = calllist[0]
+        if len(args.children) < 1:
+            self._process_error("'args' has incorrect " +
+                                "number of children.", args.lineno)
+        if args.value == "expression":
+            return [args[0]]
+        elif args.value == "args":
+            return list(args.children)
+        self._process_error("Illegal value type for 'args'", args.lineno)
+
+    # Names are looked up as in CodeGen._process_atom().
+    def _build_atom(self, atom):
+        if atom.is_leaf():
+            if atom.v_type == "string":
+                return ast.Str(str(atom.value))
+            if not atom.v_type:
+                self._process_error("Name Error: " + str(atom.value) +
+                                    " is not defined.", atom.lineno)
+            entry = self.symtab.getWithKey(atom.key)
+            scopetype = entry and self.symtab.scopeType(entry.scope)
+            if scopetype not in ["scene", "item"]:
+                return _load(atom.value)
+            if entry.slot is not None:
+                read = ast.Subscript(_load("__vars"),
+                                     ast.Index(ast.Num(entry.slot)), _LOAD)
+                if atom in self.unset_reads:
+                    return _call(_load("get_var"), [read])
+                return read
+            return _self_attr(atom.value, _LOAD)
+        if len(atom.children) != 1:
+            self._process_error("'atom' has incorrect number of " +
+                                "children.", atom.lineno)
+        if atom.value != "test":
+            self._process_error("'atom' has unknown child type.", atom.lineno)
+        return atom[0]
+
+    def _build_list(self, nlist):
+        if len(nlist.children) == 0:
+            return ast.List([], _LOAD)
+        return _Build(lambda *values: ast.List(list(values), _LOAD),
+                      self._testlist(nlist[0]))
+
+    def _build_number(self, number):
+        if not number.is_leaf():
+            self._process_error("'number' has children. It should be sterile.",
+                                number.lineno)
+        return ast.Num(number.value)
+
+    def _build_boolean(self, boolean):
+        if not boolean.is_leaf():
+            self._process_error("'boolean' has children. It should be " +
+                                "sterile.", boolean.lineno)
+        return _load(str(boolean.value))
@@ -0,0 +1,82 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_batch.py
+# Throughput benchmark for batch compilation with narratr.py.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# This copies the sample programs that compile into a temporary directory
+# several times over and compiles the whole directory with narratr.py at
+# increasing -j levels, reporting files per second and the speedup over -j 1.
+#
+# Usage: python benchmarks/bench_batch.py [-c COPIES] [-j MAX_JOBS]
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+SAMPLES = ["0_helloworld.ntr", "2_derived.ntr", "3_arithmetic.ntr",
+           "3_comparison.ntr", "4_continue.ntr", "4_elseif.ntr",
+           "4_while.ntr", "5_moves.ntr", "demo.ntr", "pandora.ntr"]
+
+
+def make_sources(copies):
+    tmpdir = tempfile.mkdtemp(prefix="narratr-bench-")
+    for i in range(copies):
+        for name in SAMPLES:
+            shutil.copy(os.path.join(ROOT, "sampleprograms", name),
+                        os.path.join(tmpdir, "%d_%s" % (i, name)))
+    return tmpdir
+
+
+def run_batch(tmpdir, jobs):
+    start = time.time()
+    with open(os.devnull, "w") as devnull:
+        subprocess.call([sys.executable, os.path.join(ROOT, "narratr.py"),
+                         "--no-cache", "-j", str(jobs), tmpdir],
+                        stdout=devnull, stderr=devnull)
+    return time.time() - start
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('-c', '--copies', type=int, default=20,
+                           help='copies of each sample program to compile')
+    argparser.add_argument('-j', '--max-jobs', type=int,
+                           default=multiprocessing.cpu_count(),
+                           help='highest -j level to run')
+    args = argparser.parse_args(sys.argv[1:])
+
+    tmpdir = make_sources(args.copies)
+    count = args.copies * len(SAMPLES)
+    try:
+        print "%-6s %10s %12s %8s" % ("jobs", "time (s)", "files/s",
+                                      "speedup")
+        jobs = 1
+        base = None
+        while jobs <= args.max_jobs:
+            elapsed = run_batch(tmpdir, jobs)
+            base = base or elapsed
+            print "%-6d %10.2f %12.1f %8.2f" % (jobs, elapsed,
+                                                count / elapsed,
+                                                base / elapsed)
+            jobs *= 2
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_codegen_ast.py
+# Time to get a code object for a game, through Python source or a Python
+# ast.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Each game from gen_game.py is parsed in a fresh process, and then turned
+# into a code object two ways, best of RUNS:
+#
+#   source  CodeGen builds the program as source, which compile() parses
+#   ast     ASTCodeGen builds it as a Python ast, which compile() takes as
+#           it is
+#
+# and the time to generate the program and to compile it is reported.
+#
+# Usage: python benchmarks/bench_codegen_ast.py [-r RUNS] [SCENES...]
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import gen_game
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def measure(path, runs):
+    """Parse path, then time both ways to a code object in this process."""
+    import time
+    import parser
+    from codegen import CodeGen
+    from astgen import ASTCodeGen
+
+    with open(path) as f:
+        source = f.read()
+    p = parser.ParserForNarratr()
+    ast = p.parse(source)
+    result = {}
+    for i in range(runs):
+        c = CodeGen()
+        start = time.clock()
+        c.process(ast, p.symtab)
+        program = c.frontmatter + "\n" + "\n".join(c.scenes) + "\n\n" + \
+            "\n".join(c.items) + "\n\n" + c.main
+        generated = time.clock()
+        compile(program, path, "exec", 0, True)
+        times = {"source": [generated - start, time.clock() - generated]}
+        c = ASTCodeGen()
+        start = time.clock()
+        c.process(ast, p.symtab)
+        generated = time.clock()
+        c.code(path)
+        times["ast"] = [generated - start, time.clock() - generated]
+        for way, (gen, comp) in times.items():
+            best = result.get(way)
+            if best is None or gen + comp < sum(best):
+                result[way] = [gen, comp]
+    return result
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('scenes', nargs='*', type=int,
+                           default=[100, 1000],
+                           help='scenes in the generated games')
+    argparser.add_argument('-r', '--runs', type=int, default=3)
+    argparser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = argparser.parse_args(sys.argv[1:])
+
+    if args.measure:
+        print json.dumps(measure(args.measure, args.runs))
+        return
+
+    tmpdir = tempfile.mkdtemp(prefix="narratr-bench-")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    try:
+        print "%7s %-7s %14s %14s %11s" % ("scenes", "way", "generate (ms)",
+                                           "compile (ms)", "total (ms)")
+        for scenes in args.scenes:
+            path = os.path.join(tmpdir, "game.ntr")
+            with open(path, "w") as f:
+                f.write(gen_game.generate(scenes=scenes, items=5, depth=2,
+                                          statements=4))
+            out = subprocess.check_output(
+                [sys.executable, os.path.abspath(__file__), "--measure",
+                 path, "-r", str(args.runs)], cwd=ROOT, env=env)
+            result = json.loads(out)
+            for way in ["source", "ast"]:
+                gen, comp = result[way]
+                print "%7d %-7s %14.1f %14.1f %11.1f" % (
+                    scenes, way, gen * 1000, comp * 1000, (gen + comp) * 1000)
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == "__main__":
+    main()
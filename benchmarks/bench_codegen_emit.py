@@ -0,0 +1,104 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_codegen_emit.py
+# Time to generate code for games with large scenes and with many scenes.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Two series of games from gen_game.py: "wide" games have SCENES scenes with
+# a growing number of statements in every block, and "many" games have a
+# growing number of small scenes. Each game is parsed in a fresh process and
+# then only code generation (CodeGen.process) is timed, best of RUNS. The
+# time per generated line should stay about the same as the games grow; if
+# any part of the generated code were built by adding to a string, it would
+# grow with the size of the game.
+#
+# Usage: python benchmarks/bench_codegen_emit.py [-n SCENES] [-r RUNS]
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import gen_game
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+STATEMENTS = [10, 40, 160]
+MANY = [1000, 4000, 16000]
+
+
+def measure(path, runs):
+    """Parse path, then time code generation in this process."""
+    import time
+    import parser
+    from codegen import CodeGen
+
+    with open(path) as f:
+        source = f.read()
+    p = parser.ParserForNarratr()
+    ast = p.parse(source)
+    best = None
+    for i in range(runs):
+        c = CodeGen()
+        start = time.clock()
+        c.process(ast, p.symtab)
+        elapsed = time.clock() - start
+        best = elapsed if best is None else min(best, elapsed)
+    lines = sum(code.count("\n") + 1 for code in c.scenes + c.items)
+    lines += c.main.count("\n") + 1
+    return {"lines": lines, "time": best}
+
+
+def run(tmpdir, runs, **params):
+    path = os.path.join(tmpdir, "game.ntr")
+    with open(path, "w") as f:
+        f.write(gen_game.generate(**params))
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.check_output([sys.executable, os.path.abspath(__file__),
+                                   "--measure", path, "-r", str(runs)],
+                                  cwd=ROOT, env=env)
+    return json.loads(out)
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('-n', '--scenes', type=int, default=50,
+                           help='scenes in the wide games')
+    argparser.add_argument('-r', '--runs', type=int, default=3)
+    argparser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = argparser.parse_args(sys.argv[1:])
+
+    if args.measure:
+        print json.dumps(measure(args.measure, args.runs))
+        return
+
+    games = [("wide", dict(scenes=args.scenes, items=2, depth=2,
+                           statements=s)) for s in STATEMENTS]
+    games += [("many", dict(scenes=n, items=2, depth=1, statements=2))
+              for n in MANY]
+    tmpdir = tempfile.mkdtemp(prefix="narratr-bench-")
+    try:
+        print "%-5s %7s %11s %10s %14s %9s" % (
+            "shape", "scenes", "statements", "lines", "codegen (ms)",
+            "us/line")
+        for shape, params in games:
+            result = run(tmpdir, args.runs, **params)
+            print "%-5s %7d %11d %10d %14.1f %9.2f" % (
+                shape, params["scenes"], params["statements"],
+                result["lines"], result["time"] * 1000,
+                result["time"] / result["lines"] * 1e6)
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == "__main__":
+    main()
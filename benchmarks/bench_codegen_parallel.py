@@ -0,0 +1,80 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_codegen_parallel.py
+# Code generation time for large games on one process and on several.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Each game from gen_game.py is parsed once, and then its code is generated
+# with CodeGen(jobs) for every number of jobs given, best of RUNS. The time
+# includes starting the pool and handing the scenes and items out. Every run
+# is checked to generate the same program as one process does.
+#
+# Usage: python benchmarks/bench_codegen_parallel.py [-r RUNS]
+#            [-j JOBS...] [SCENES...]
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import gen_game
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def generate(ast, symtab, jobs):
+    """Return the time to generate the program and the program."""
+    from codegen import CodeGen
+    start = time.time()
+    c = CodeGen(jobs)
+    c.process(ast, symtab)
+    elapsed = time.time() - start
+    return elapsed, "\n".join(c.scenes) + "\n\n" + "\n".join(c.items)
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('scenes', nargs='*', type=int,
+                           default=[2000, 8000],
+                           help='scenes in the generated games')
+    argparser.add_argument('-j', '--jobs', type=int, nargs='+',
+                           default=sorted(set([1, 2,
+                                               multiprocessing.cpu_count()])))
+    argparser.add_argument('-r', '--runs', type=int, default=3)
+    args = argparser.parse_args(sys.argv[1:])
+    sys.path.insert(0, ROOT)
+    import parser
+
+    print "cpus: %d" % multiprocessing.cpu_count()
+    print "%7s %5s %14s %8s" % ("scenes", "jobs", "codegen (ms)", "speedup")
+    for scenes in args.scenes:
+        p = parser.ParserForNarratr()
+        ast = p.parse(gen_game.generate(scenes=scenes, items=5, depth=2,
+                                        statements=4))
+        serial = None
+        for jobs in args.jobs:
+            best = None
+            for i in range(args.runs):
+                elapsed, program = generate(ast, p.symtab, jobs)
+                if serial is None:
+                    serial = (elapsed, program)
+                elif program != serial[1]:
+                    raise AssertionError("%d jobs generated another program"
+                                         % jobs)
+                if best is None or elapsed < best:
+                    best = elapsed
+            if jobs == args.jobs[0]:
+                base = best
+            print "%7d %5d %14.1f %7.2fx" % (scenes, jobs, best * 1000,
+                                             base / best)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_codegen_stream.py
+# Peak memory of code generation, keeping the program or streaming it.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Each game from gen_game.py is parsed in a fresh process, and then its code
+# is generated and written one of two ways:
+#
+#   construct  CodeGen.process() then CodeGen.construct(), which keep every
+#              scene and item until the whole program is written
+#   stream     CodeGen.stream(), which writes each scene and item as soon as
+#              its code is generated
+#
+# and the growth of the peak resident set size (ru_maxrss) of the process
+# over code generation is reported, with the time it took. The AST is in
+# memory either way; the growth is what code generation adds to it.
+#
+# Usage: python benchmarks/bench_codegen_stream.py [SCENES...]
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import gen_game
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+MODES = ["construct", "stream"]
+
+
+def measure(path, mode):
+    """Parse path, then generate its code in this process."""
+    import gc
+    import resource
+    import time
+    import parser
+    from codegen import CodeGen
+
+    def peak():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+    with open(path) as f:
+        source = f.read()
+    p = parser.ParserForNarratr()
+    ast = p.parse(source)
+    del source
+    gc.collect()
+    before = peak()
+    start = time.clock()
+    c = CodeGen()
+    if mode == "stream":
+        c.stream(ast, p.symtab, path + ".py")
+    else:
+        c.process(ast, p.symtab)
+        c.construct(path + ".py")
+    return {"time": time.clock() - start, "growth_mb": peak() - before,
+            "bytes": os.path.getsize(path + ".py")}
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('scenes', nargs='*', type=int,
+                           default=[500, 2000, 8000],
+                           help='scenes in the generated games')
+    argparser.add_argument('--measure', nargs=2, help=argparse.SUPPRESS)
+    args = argparser.parse_args(sys.argv[1:])
+
+    if args.measure:
+        print json.dumps(measure(*args.measure))
+        return
+
+    tmpdir = tempfile.mkdtemp(prefix="narratr-bench-")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    try:
+        print "%7s %10s %-9s %14s %15s" % (
+            "scenes", "output MB", "mode", "codegen (ms)", "peak growth MB")
+        for scenes in args.scenes:
+            path = os.path.join(tmpdir, "game.ntr")
+            with open(path, "w") as f:
+                f.write(gen_game.generate(scenes=scenes, items=5, depth=2,
+                                          statements=4))
+            for mode in MODES:
+                out = subprocess.check_output(
+                    [sys.executable, os.path.abspath(__file__), "--measure",
+                     path, mode], cwd=ROOT, env=env)
+                result = json.loads(out)
+                print "%7d %10.1f %-9s %14.1f %15.1f" % (
+                    scenes, result["bytes"] / 1048576.0, mode,
+                    result["time"] * 1000, result["growth_mb"])
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == "__main__":
+    main()
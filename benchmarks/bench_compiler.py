@@ -0,0 +1,221 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_compiler.py
+# End-to-end compiler benchmark on synthetic games, with stored baselines.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Every suite is a game from gen_game.py. Each run compiles it in a fresh
+# process (with the lexer and parser tables already built) and measures
+# every phase: read, lex (the whole token stream), parse (the parser's time
+# minus the lexing it does), codegen (CodeGen.process) and write
+# (CodeGen.construct). Rates are tokens/s for lex, AST nodes/s for parse and
+# generated lines/s for codegen. Python 2 has no tracemalloc, so memory is
+# the peak resident set size (ru_maxrss) of the process at the end of each
+# phase, which includes the interpreter and the compiler's own modules.
+#
+# Times are the median of the runs. With --save the results are stored as
+# the baseline; otherwise they are compared with the stored baseline, and a
+# rate that dropped or a peak that grew by more than the threshold is
+# flagged as a regression (and the exit status is 1).
+#
+# Usage: python benchmarks/bench_compiler.py [-r RUNS] [--save]
+#                                            [--baseline FILE]
+#                                            [--threshold PERCENT] [SUITE...]
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import gen_game
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "baseline.json")
+
+SUITES = {
+    "small": dict(scenes=10, items=2, depth=2, statements=4),
+    "scenes-1k": dict(scenes=1000, items=20, depth=2, statements=4),
+    "items-1k": dict(scenes=100, items=1000, depth=1, statements=2),
+    "deep": dict(scenes=50, items=2, depth=12, statements=2),
+    "statements": dict(scenes=100, items=5, depth=1, statements=30),
+    "moves": dict(scenes=500, items=0, depth=0, statements=1, moves=1.0),
+    "exposition": dict(scenes=200, items=2, depth=1, statements=2,
+                       exposition=4000),
+}
+
+PHASES = ["read", "lex", "parse", "codegen", "write"]
+RATES = {"lex": "tokens", "parse": "nodes", "codegen": "lines"}
+
+
+def measure(path, outputfile):
+    """Compile path in this process and return the measurements."""
+    import resource
+    import time
+    import parser
+    from codegen import CodeGen
+    from compilestats import count_nodes
+    from lexer import LexerForNarratr
+
+    def peak():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+    parser.ParserForNarratr()
+    result = {"time": {}, "peak_mb": {}, "count": {}}
+
+    start = time.time()
+    with open(path) as f:
+        source = f.read()
+    result["time"]["read"] = time.time() - start
+    result["peak_mb"]["read"] = peak()
+
+    lexer = LexerForNarratr()
+    start = time.time()
+    lexer.input(source)
+    tokens = 0
+    while lexer.token() is not None:
+        tokens += 1
+    result["time"]["lex"] = time.time() - start
+    result["peak_mb"]["lex"] = peak()
+    result["count"]["tokens"] = tokens
+
+    p = parser.ParserForNarratr()
+    start = time.time()
+    ast = p.parse(source)
+    result["time"]["parse"] = time.time() - start - result["time"]["lex"]
+    result["peak_mb"]["parse"] = peak()
+    result["count"]["nodes"] = count_nodes(ast)
+
+    c = CodeGen()
+    start = time.time()
+    c.process(ast, p.symtab)
+    result["time"]["codegen"] = time.time() - start
+    result["peak_mb"]["codegen"] = peak()
+
+    start = time.time()
+    c.construct(outputfile)
+    result["time"]["write"] = time.time() - start
+    result["peak_mb"]["write"] = peak()
+    with open(outputfile) as f:
+        result["count"]["lines"] = f.read().count("\n")
+    return result
+
+
+def run_suite(name, runs, tmpdir):
+    path = os.path.join(tmpdir, name + ".ntr")
+    with open(path, "w") as f:
+        f.write(gen_game.generate(**SUITES[name]))
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    results = []
+    with open(os.devnull, "w") as devnull:
+        for i in range(runs):
+            out = subprocess.check_output([sys.executable, __file__,
+                                           "--measure", path], env=env,
+                                          stderr=devnull)
+            results.append(json.loads(out))
+    result = results[0]
+    for phase in PHASES:
+        times = sorted(r["time"][phase] for r in results)
+        result["time"][phase] = times[len(times) // 2]
+        result["peak_mb"][phase] = max(r["peak_mb"][phase] for r in results)
+    result["rate"] = dict((phase, result["count"][unit] /
+                           max(result["time"][phase], 1e-9))
+                          for phase, unit in RATES.items())
+    return result
+
+
+def compare(name, result, baseline, threshold):
+    """Return the regressions of result against its baseline."""
+    regressions = []
+    for phase, rate in result["rate"].items():
+        old = baseline["rate"].get(phase)
+        if old and rate < old * (1 - threshold):
+            regressions.append("%s: %s %s/s dropped from %.0f to %.0f" % (
+                name, phase, RATES[phase], old, rate))
+    for phase, peak in result["peak_mb"].items():
+        old = baseline["peak_mb"].get(phase)
+        if old and peak > old * (1 + threshold):
+            regressions.append("%s: %s peak grew from %.1f MB to %.1f MB" %
+                               (name, phase, old, peak))
+    return regressions
+
+
+def report(name, result):
+    print name, "(%d tokens, %d nodes, %d lines)" % (
+        result["count"]["tokens"], result["count"]["nodes"],
+        result["count"]["lines"])
+    for phase in PHASES:
+        rate = ""
+        if phase in RATES:
+            rate = "%12.0f %s/s" % (result["rate"][phase], RATES[phase])
+        print "    %-8s %10.2f ms %9.1f MB %s" % (
+            phase, result["time"][phase] * 1000, result["peak_mb"][phase],
+            rate)
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('suites', nargs='*', metavar='SUITE',
+                           help='suites to run: ' +
+                           ', '.join(sorted(SUITES)) + '. defaults to all')
+    argparser.add_argument('-r', '--runs', type=int, default=3,
+                           help='runs per suite')
+    argparser.add_argument('--save', action='store_true',
+                           help='store the results as the new baseline')
+    argparser.add_argument('--baseline', default=BASELINE,
+                           help='the baseline file')
+    argparser.add_argument('--threshold', type=float, default=20,
+                           help='percentage change flagged as a regression')
+    argparser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = argparser.parse_args(sys.argv[1:])
+
+    if args.measure:
+        output = tempfile.NamedTemporaryFile(suffix=".py")
+        print json.dumps(measure(args.measure, output.name))
+        return 0
+
+    for name in args.suites:
+        if name not in SUITES:
+            argparser.error("unknown suite " + name)
+    names = args.suites or sorted(SUITES)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    tmpdir = tempfile.mkdtemp(prefix="narratr-bench-")
+    regressions = []
+    try:
+        for name in names:
+            result = run_suite(name, args.runs, tmpdir)
+            report(name, result)
+            if args.save:
+                baselines[name] = result
+            elif name in baselines:
+                regressions += compare(name, result, baselines[name],
+                                       args.threshold / 100.0)
+    finally:
+        shutil.rmtree(tmpdir)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print "Saved the baseline to " + args.baseline
+    for regression in regressions:
+        print "REGRESSION: " + regression
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,124 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_deep_nesting.py
+# Compiler stress benchmark on pathologically nested games.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Every game is a single scene whose setup block nests one construct DEPTH
+# deep: if statements, while loops, parentheses, not, unary minus or list
+# literals. Each game is compiled (parse, which includes building the
+# SymTab, and codegen) in a fresh process whose recursion limit is set to
+# LIMIT (100 by default, a tenth of Python's) before parsing, and the CPU
+# time of each phase is reported. The tree walkers keep their own stacks,
+# so no depth should fail; a walker that recursed per level would fail as
+# soon as the depth came near the limit.
+#
+# Usage: python benchmarks/bench_deep_nesting.py [-l LIMIT]
+#                                                [-s SHAPE...] [DEPTH...]
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+SHAPES = ["if", "while", "paren", "not", "minus", "list"]
+
+CHILD = '''import sys
+import time
+import parser
+from codegen import CodeGen
+source = open(%r).read()
+parser.ParserForNarratr()
+sys.setrecursionlimit(%d)
+p = parser.ParserForNarratr()
+start = time.clock()
+ast = p.parse(source)
+parsed = time.clock()
+CodeGen().process(ast, p.symtab)
+print parsed - start, time.clock() - parsed
+'''
+
+
+def nested_game(shape, depth):
+    """Return a game with shape nested depth deep."""
+    lines = ["scene $1 {", "    setup:", "        x is 1"]
+    if shape in ["if", "while"]:
+        for level in range(depth):
+            lines.append("    " * (level + 2) + "%s x > %d:" % (shape, level))
+        lines.append("    " * (depth + 2) + 'say "deep"')
+    elif shape == "paren":
+        lines.append("        x is " + "(" * depth + "1" + ")" * depth)
+    elif shape == "not":
+        lines.append("        x is " + "not " * depth + "true")
+    elif shape == "minus":
+        lines.append("        x is " + "-" * depth + "1")
+    elif shape == "list":
+        lines.append("        x is " + "[" * depth + "1" + "]" * depth)
+    lines += ["    action:", '        say "action"',
+              "    cleanup:", '        say "cleanup"', "}", "start: $1"]
+    return "\n".join(lines) + "\n"
+
+
+def compile_game(path, limit):
+    """Compile path in a new process; return the parse and codegen times,
+    or None if the compile failed."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    with open(os.devnull, "w") as devnull:
+        try:
+            out = subprocess.check_output([sys.executable, "-c",
+                                           CHILD % (path, limit)],
+                                          cwd=ROOT, env=env, stderr=devnull)
+        except subprocess.CalledProcessError:
+            return None
+    return [float(t) for t in out.split()]
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('depths', nargs='*', type=int,
+                           default=[10, 100, 1000, 5000],
+                           help='nesting depths to generate')
+    argparser.add_argument('-s', '--shape', action='append',
+                           choices=SHAPES,
+                           help='shapes to nest (default: all)')
+    argparser.add_argument('-l', '--limit', type=int, default=100,
+                           help='recursion limit of the compiler')
+    args = argparser.parse_args(sys.argv[1:])
+
+    tmpdir = tempfile.mkdtemp(prefix="narratr-bench-")
+    failed = False
+    try:
+        print "recursion limit %d" % args.limit
+        print "%-6s %6s %12s %12s %14s" % ("shape", "depth", "parse (ms)",
+                                           "codegen (ms)", "us/level")
+        for shape in args.shape or SHAPES:
+            for depth in args.depths:
+                path = os.path.join(tmpdir, "%s%d.ntr" % (shape, depth))
+                with open(path, "w") as f:
+                    f.write(nested_game(shape, depth))
+                times = compile_game(path, args.limit)
+                if times is None:
+                    failed = True
+                    print "%-6s %6d %12s" % (shape, depth, "FAILED")
+                    continue
+                print "%-6s %6d %12.2f %12.2f %14.2f" % (
+                    shape, depth, times[0] * 1000, times[1] * 1000,
+                    sum(times) / depth * 1e6)
+    finally:
+        shutil.rmtree(tmpdir)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,152 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_dispatch.py
+# Cost of finding the function for a node, by kind or by type string.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# This parses a game from gen_game.py and takes every node of a kind that
+# CodeGen has a function for (expressions and statements). It then sends
+# each node to a function that does nothing, three ways:
+#
+#   ladder  an if/elif chain on the type string, as CodeGen had before
+#           visitor.py, testing the types in the same order
+#   dict    a dictionary keyed by type string
+#   table   a dispatch_table from visitor.py, indexed by kind
+#
+# and reports the best time per node over the runs. The type strings and
+# kinds are read from the nodes once, before timing, so only the dispatch
+# itself is measured.
+#
+# Usage: python benchmarks/bench_dispatch.py [-n SCENES] [-r RUNS]
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import gen_game
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# The kinds CodeGen dispatches on, in the order its if/elif chains and its
+# expression dictionary listed them.
+NAMES = ["or_test", "and_test", "not_test", "comparison",
+         "arithmetic_expression", "term", "factor", "power", "atom", "list",
+         "number", "boolean", "simple_statement", "block_statement",
+         "say_statement", "exposition", "win_statement", "lose_statement",
+         "expression_statement", "flow_statement", "if_statement",
+         "while_statement", "continue_statement", "break_statement",
+         "moves_declaration", "moveto_statement"]
+
+
+def handle(node):
+    pass
+
+
+def ladder(names):
+    """Return a function that sends every node of a list of (type string,
+    kind, node) to handle through an if/elif chain on the type string."""
+    lines = ["def run(nodes):", "    for t, kind, node in nodes:"]
+    for i, name in enumerate(names):
+        lines.append("        %s t == %r:" % ("elif" if i else "if", name))
+        lines.append("            handle(node)")
+    namespace = {"handle": handle}
+    exec "\n".join(lines) in namespace
+    return namespace["run"]
+
+
+def measure(path, runs):
+    """Parse path in this process and return the time per node."""
+    import time
+    import kinds
+    import parser
+    from node import Node
+    from visitor import dispatch_table
+
+    with open(path) as f:
+        ast = parser.ParserForNarratr().parse(f.read())
+    wanted = set(NAMES)
+    nodes = []
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, Node):
+            if node.type in wanted:
+                nodes.append((node.type, node.kind, node))
+            stack.extend(node.children)
+
+    run_ladder = ladder(NAMES)
+    by_name = dict((name, handle) for name in NAMES)
+    table = dispatch_table(dict((kinds.code(name), handle)
+                                for name in NAMES))
+
+    def run_dict(nodes):
+        for name, kind, node in nodes:
+            by_name[name](node)
+
+    def run_table(nodes):
+        for name, kind, node in nodes:
+            table[kind](node)
+
+    def run_empty(nodes):
+        for name, kind, node in nodes:
+            handle(node)
+
+    result = {"nodes": len(nodes)}
+    for method, run in [("ladder", run_ladder), ("dict", run_dict),
+                        ("table", run_table), ("call only", run_empty)]:
+        best = None
+        for i in range(runs):
+            start = time.clock()
+            run(nodes)
+            elapsed = time.clock() - start
+            best = elapsed if best is None else min(best, elapsed)
+        result[method] = best / len(nodes)
+    return result
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('-n', '--scenes', type=int, default=500)
+    argparser.add_argument('-r', '--runs', type=int, default=5)
+    argparser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = argparser.parse_args(sys.argv[1:])
+
+    if args.measure:
+        print json.dumps(measure(args.measure, args.runs))
+        return
+
+    tmpdir = tempfile.mkdtemp(prefix="narratr-bench-")
+    try:
+        path = os.path.join(tmpdir, "game.ntr")
+        with open(path, "w") as f:
+            f.write(gen_game.generate(scenes=args.scenes, items=20, depth=2,
+                                      statements=4))
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        out = subprocess.check_output([sys.executable, __file__, "--measure",
+                                       path, "-r", str(args.runs)], env=env)
+        result = json.loads(out)
+    finally:
+        shutil.rmtree(tmpdir)
+
+    print "%d nodes dispatched" % result["nodes"]
+    empty = result["call only"]
+    print "%-10s %12s %14s" % ("method", "ns/node", "dispatch ns")
+    for method in ["ladder", "dict", "table", "call only"]:
+        print "%-10s %12.1f %14.1f" % (method, result[method] * 1e9,
+                                       (result[method] - empty) * 1e9)
+
+if __name__ == "__main__":
+    main()
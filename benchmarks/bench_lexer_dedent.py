@@ -0,0 +1,98 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_lexer_dedent.py
+# Lexer benchmark on deeply nested games.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Every block of these games is a chain of if statements nested DEPTH deep,
+# which is closed all at once: by the next block's header in setup and
+# action (a line that starts with white space) and by the closing brace in
+# cleanup (a line that does not). This scans a game for each depth to the
+# end in a fresh process and reports the median time, tokens per second and
+# the number of DEDENT tokens.
+#
+# Usage: python benchmarks/bench_lexer_dedent.py [-r RUNS] [DEPTH...]
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+CHILD = '''import time
+import lexer
+source = open(%r).read()
+l = lexer.LexerForNarratr()
+start = time.time()
+l.input(source)
+tokens = dedents = 0
+t = l.token()
+while t is not None:
+    tokens += 1
+    dedents += t.type == "DEDENT"
+    t = l.token()
+print time.time() - start, tokens, dedents
+'''
+
+
+def nested_game(depth, scenes=100):
+    lines = []
+    for n in range(1, scenes + 1):
+        lines.append("scene $%d {" % n)
+        for block in ["setup", "action", "cleanup"]:
+            lines.append("    %s:" % block)
+            for level in range(depth):
+                lines.append("    " * (level + 2) + "if x > %d:" % level)
+            lines.append("    " * (depth + 2) + 'say "deep"')
+        lines.append("}")
+    lines.append("start: $1")
+    return "\n".join(lines) + "\n"
+
+
+def scan(path):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.check_output([sys.executable, "-c", CHILD % path],
+                                  env=env)
+    elapsed, tokens, dedents = out.split()
+    return float(elapsed), int(tokens), int(dedents)
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('depths', nargs='*', type=int,
+                           default=[2, 10, 40, 100],
+                           help='nesting depths to generate')
+    argparser.add_argument('-r', '--runs', type=int, default=5,
+                           help='runs per depth')
+    args = argparser.parse_args(sys.argv[1:])
+
+    tmpdir = tempfile.mkdtemp(prefix="narratr-bench-")
+    try:
+        print "%-6s %8s %8s %10s %12s" % ("depth", "tokens", "dedents",
+                                          "time (ms)", "tokens/s")
+        for depth in args.depths:
+            path = os.path.join(tmpdir, "deep%d.ntr" % depth)
+            with open(path, "w") as f:
+                f.write(nested_game(depth))
+            runs = [scan(path) for i in range(args.runs)]
+            elapsed = sorted(run[0] for run in runs)[len(runs) // 2]
+            tokens, dedents = runs[0][1:]
+            print "%-6d %8d %8d %10.2f %12.0f" % (depth, tokens, dedents,
+                                                  elapsed * 1000,
+                                                  tokens / elapsed)
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_lexer_tables.py
+# Benchmark for creating LexerForNarratr instances.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# "legacy" runs lex.lex(module=self) for every instance, which validates the
+# rules and forms the master regex each time. The default mode reads the
+# shipped lextab for the first instance in a process, and every instance
+# after that copies the prototype and rebinds its rules. Both are timed for
+# the first instance in a fresh process and for later instances.
+#
+# Usage: python benchmarks/bench_lexer_tables.py [-n INSTANCES]
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+MODES = {
+    "legacy": "lexer.LexerForNarratr(optimize=0)",
+    "lextab": "lexer.LexerForNarratr()",
+}
+
+CHILD = '''import time
+import lexer
+start = time.time()
+%s
+first = time.time() - start
+start = time.time()
+for i in range(%d):
+    %s
+print first, (time.time() - start) / %d
+'''
+
+
+def time_instances(mode, count):
+    """Time the first and later instances in a fresh process."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    child = CHILD % (MODES[mode], count, MODES[mode], count)
+    out = subprocess.check_output([sys.executable, "-c", child], env=env)
+    return [float(t) for t in out.split()]
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('-n', '--instances', type=int, default=200,
+                           help='number of instances to create')
+    args = argparser.parse_args(sys.argv[1:])
+
+    print "%-8s %12s %12s" % ("mode", "first (ms)", "later (ms)")
+    for mode in ["legacy", "lextab"]:
+        runs = [time_instances(mode, args.instances) for i in range(10)]
+        first = sorted(run[0] for run in runs)[len(runs) // 2]
+        later = sorted(run[1] for run in runs)[len(runs) // 2]
+        print "%-8s %12.3f %12.3f" % (mode, first * 1000, later * 1000)
+
+if __name__ == "__main__":
+    main()
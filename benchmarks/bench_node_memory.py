@@ -0,0 +1,147 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_node_memory.py
+# Memory taken by the AST of a large generated game.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# This parses a game from gen_game.py (10000 scenes by default) in a fresh
+# process and reports the size of its AST. Python 2 has no tracemalloc, so
+# the AST is measured two ways: by adding up sys.getsizeof of every node,
+# its attribute dictionary (if it has one) and its children list (counting
+# a list shared by several nodes once), and by the growth of the resident
+# set size (ru_maxrss) of the process from before parsing to after it. The
+# RSS growth also includes the symbol table and what the parser leaves
+# behind, but not the source or the LALR tables, which are loaded first.
+#
+# With --flat the AST is built in a NodeArena, and its size is that of the
+# arrays (as allocated) and of the lists and dictionaries of the arena. In
+# both cases the values themselves (strings and numbers) are not counted.
+#
+# Usage: python benchmarks/bench_node_memory.py [-n SCENES] [-m ITEMS]
+#                                               [-d DEPTH] [-s STATEMENTS]
+#                                               [--flat]
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import gen_game
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def arena_bytes(arena):
+    """Return the bytes taken by the arrays and tables of arena."""
+    arrays = [arena.kinds, arena.values, arena.v_types, arena.linenos,
+              arena.starts, arena.counts, arena.child_indexes]
+    tables = [arena.keys, arena.constants, arena._constant_codes]
+    return sum(sys.getsizeof(a) for a in arrays + tables)
+
+
+def measure(path, flat=False):
+    """Parse path in this process and return the measurements."""
+    import gc
+    import resource
+    import parser
+    from node import Node
+
+    def rss():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    with open(path) as f:
+        source = f.read()
+    p = parser.ParserForNarratr(flat=flat)
+    gc.collect()
+    before = rss()
+    ast = p.parse(source)
+    gc.collect()
+    after = rss()
+
+    if flat:
+        return {"nodes": len(p.arena), "arena_bytes": arena_bytes(p.arena),
+                "rss_growth": after - before, "peak_rss": after}
+    nodes = node_bytes = dict_bytes = list_bytes = 0
+    seen = set()
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(node.values())
+            continue
+        if not isinstance(node, Node):
+            continue
+        nodes += 1
+        node_bytes += sys.getsizeof(node)
+        if hasattr(node, "__dict__"):
+            dict_bytes += sys.getsizeof(node.__dict__)
+        if id(node.children) not in seen:
+            seen.add(id(node.children))
+            list_bytes += sys.getsizeof(node.children)
+        stack.extend(node.children)
+    return {"nodes": nodes, "node_bytes": node_bytes,
+            "dict_bytes": dict_bytes, "list_bytes": list_bytes,
+            "rss_growth": after - before, "peak_rss": after}
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('-n', '--scenes', type=int, default=10000)
+    argparser.add_argument('-m', '--items', type=int, default=20)
+    argparser.add_argument('-d', '--depth', type=int, default=2)
+    argparser.add_argument('-s', '--statements', type=int, default=4)
+    argparser.add_argument('--flat', action='store_true',
+                           help='build the AST in a NodeArena')
+    argparser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = argparser.parse_args(sys.argv[1:])
+
+    if args.measure:
+        print json.dumps(measure(args.measure, args.flat))
+        return
+
+    tmpdir = tempfile.mkdtemp(prefix="narratr-bench-")
+    try:
+        path = os.path.join(tmpdir, "game.ntr")
+        with open(path, "w") as f:
+            f.write(gen_game.generate(scenes=args.scenes, items=args.items,
+                                      depth=args.depth,
+                                      statements=args.statements))
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        command = [sys.executable, __file__, "--measure", path]
+        if args.flat:
+            command.append("--flat")
+        out = subprocess.check_output(command, env=env)
+        result = json.loads(out)
+    finally:
+        shutil.rmtree(tmpdir)
+
+    mb = 1024.0 * 1024
+    print "%d scenes, %d AST nodes" % (args.scenes, result["nodes"])
+    if args.flat:
+        total = result["arena_bytes"]
+    else:
+        total = result["node_bytes"] + result["dict_bytes"] + \
+            result["list_bytes"]
+        print "%-22s %10.1f MB" % ("nodes", result["node_bytes"] / mb)
+        print "%-22s %10.1f MB" % ("attribute dicts",
+                                   result["dict_bytes"] / mb)
+        print "%-22s %10.1f MB" % ("children lists",
+                                   result["list_bytes"] / mb)
+    print "%-22s %10.1f MB (%.0f bytes/node)" % ("AST total", total / mb,
+                                                 total / result["nodes"])
+    print "%-22s %10.1f MB" % ("RSS growth in parse",
+                               result["rss_growth"] / mb)
+    print "%-22s %10.1f MB" % ("peak RSS", result["peak_rss"] / mb)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_parser_tables.py
+# Cold-start benchmark for building a ParserForNarratr.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Every run starts a fresh interpreter in a fresh, empty working directory,
+# which is what a build farm job looks like. "legacy" is the old behaviour
+# of calling yacc.yacc(module=self) with PLY's defaults (regenerate the
+# tables and write parsetab.py/parser.out into the working directory);
+# "shipped" loads the pickled tables that ship with the compiler.
+#
+# Usage: python benchmarks/bench_parser_tables.py [-n RUNS]
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+MODES = {
+    "legacy": "parser.ParserForNarratr(write_tables=1)",
+    "shipped": "parser.ParserForNarratr()",
+}
+
+CHILD = '''import time
+start = time.time()
+import parser
+%s
+print time.time() - start
+'''
+
+
+def cold_start(mode):
+    """Time one import + construction in a new process and empty CWD."""
+    cwd = tempfile.mkdtemp(prefix="narratr-bench-")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    try:
+        out = subprocess.check_output([sys.executable, "-c",
+                                       CHILD % MODES[mode]],
+                                      cwd=cwd, env=env,
+                                      stderr=open(os.devnull, "w"))
+        written = os.listdir(cwd)
+    finally:
+        shutil.rmtree(cwd)
+    return float(out.split()[-1]), written
+
+
+def warm_constructions(mode, count):
+    """Time repeated constructions within one process."""
+    cwd = tempfile.mkdtemp(prefix="narratr-bench-")
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    child = ("import time\nimport parser\n" + MODES[mode] +
+             "\nstart = time.time()\nfor i in range(%d):\n    %s\n"
+             "print time.time() - start\n") % (count, MODES[mode])
+    try:
+        out = subprocess.check_output([sys.executable, "-c", child],
+                                      cwd=cwd, env=env,
+                                      stderr=open(os.devnull, "w"))
+    finally:
+        shutil.rmtree(cwd)
+    return float(out.split()[-1]) / count
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('-n', '--runs', type=int, default=10,
+                           help='number of cold starts per mode')
+    args = argparser.parse_args(sys.argv[1:])
+
+    print "%-8s %14s %14s  %s" % ("mode", "cold (ms)", "warm (ms)",
+                                  "files written to CWD")
+    for mode in ["legacy", "shipped"]:
+        times = []
+        for i in range(args.runs):
+            elapsed, written = cold_start(mode)
+            times.append(elapsed)
+        warm = warm_constructions(mode, args.runs)
+        print "%-8s %14.2f %14.2f  %s" % (mode, median(times) * 1000,
+                                          warm * 1000,
+                                          ", ".join(sorted(written)) or "-")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_reachability.py
+# Cost of the reachability pass, and what leaving out unreachable scenes and
+# items saves.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Each game from gen_game.py is generated twice: as it is, where most scenes
+# are never reached from $1, and with every scene moving to the next one, so
+# that every scene is reached. For each, the time reachability.unreachable()
+# takes is reported, with the number of scenes it finds unreachable, the code
+# generation time without the pass, with warn_unreachable and with
+# omit_unreachable, and the output size with and without omit_unreachable.
+#
+# Usage: python benchmarks/bench_reachability.py [SCENES...]
+
+import argparse
+import os
+import re
+import sys
+import time
+import gen_game
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def chained(source):
+    """Make every scene of source move to the next one, and the last to $1.
+    """
+    numbers = [int(n) for n in re.findall(r"^scene \$(\d+)", source, re.M)]
+    following = dict(zip(numbers, numbers[1:] + numbers[:1]))
+    return re.sub(r"^(scene \$(\d+) \{\n    setup:\n)",
+                  lambda m: m.group(1) + "        moves up($%d)\n" %
+                  following[int(m.group(2))], source, flags=re.M)
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('scenes', nargs='*', type=int,
+                           default=[1000, 4000],
+                           help='scenes in the generated games')
+    args = argparser.parse_args(sys.argv[1:])
+    sys.path.insert(0, ROOT)
+    import StringIO
+    import codegen
+    import parser
+    from reachability import unreachable
+
+    # The warnings are not what is measured.
+    codegen.stderr = StringIO.StringIO()
+    print "%7s %-8s %5s %10s %13s %13s %13s %9s %9s" % (
+        "scenes", "game", "dead", "pass (ms)", "codegen (ms)", "warned (ms)",
+        "omitted (ms)", "size MB", "omitted")
+    for scenes in args.scenes:
+        source = gen_game.generate(scenes=scenes, items=5, depth=2,
+                                   statements=4)
+        for game, text in [("as is", source), ("chained", chained(source))]:
+            p = parser.ParserForNarratr()
+            ast = p.parse(text)
+            start = time.time()
+            dead = unreachable(ast[0].children)[0]
+            analysis = time.time() - start
+            results = []
+            for warn, omit in [(False, False), (True, False), (False, True)]:
+                c = codegen.CodeGen(omit_unreachable=omit,
+                                    warn_unreachable=warn)
+                start = time.time()
+                c.process(ast, p.symtab)
+                elapsed = time.time() - start
+                size = sum(len(code) for code in c.scenes + c.items) + \
+                    len(c.main)
+                results.append((elapsed, size / 1048576.0))
+            print "%7d %-8s %5d %10.1f %13.1f %13.1f %13.1f %9.2f %9.2f" % (
+                scenes, game, len(dead), analysis * 1000,
+                results[0][0] * 1000, results[1][0] * 1000,
+                results[2][0] * 1000, results[0][1], results[2][1])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_server.py
+# Latency benchmark for compiling through the compile server.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# This compiles one sample program repeatedly with narratr.py and with
+# client.py talking to a server.py started for the benchmark, with the
+# compile cache disabled, and reports the median wall time per compile.
+#
+# Usage: python benchmarks/bench_server.py [-n RUNS] [SOURCE]
+
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def wait_for(path):
+    while True:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            return
+        except socket.error:
+            time.sleep(0.05)
+        finally:
+            probe.close()
+
+
+def time_compiles(script, source, runs, env):
+    output = os.path.join(env["NARRATR_CACHE_DIR"], "out.py")
+    times = []
+    with open(os.devnull, "w") as devnull:
+        for i in range(runs):
+            start = time.time()
+            subprocess.call([sys.executable, os.path.join(ROOT, script),
+                             "--no-cache", source, "-o", output],
+                            stdout=devnull, stderr=devnull, env=env)
+            times.append(time.time() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('-n', '--runs', type=int, default=20,
+                           help='number of compiles per mode')
+    argparser.add_argument('source', nargs='?',
+                           default=os.path.join(ROOT, "sampleprograms",
+                                                "pandora.ntr"),
+                           help='the program to compile')
+    args = argparser.parse_args(sys.argv[1:])
+
+    tmpdir = tempfile.mkdtemp(prefix="narratr-bench-")
+    env = dict(os.environ, NARRATR_SOCKET=os.path.join(tmpdir, "sock"),
+               NARRATR_CACHE_DIR=tmpdir)
+    server = subprocess.Popen([sys.executable,
+                               os.path.join(ROOT, "server.py")], env=env)
+    try:
+        wait_for(env["NARRATR_SOCKET"])
+        print "%-12s %12s" % ("mode", "compile (ms)")
+        for script in ["narratr.py", "client.py"]:
+            elapsed = time_compiles(script, args.source, args.runs, env)
+            print "%-12s %12.2f" % (script, elapsed * 1000)
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(tmpdir)
+
+if __name__ == "__main__":
+    main()
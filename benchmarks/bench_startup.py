@@ -0,0 +1,83 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/bench_startup.py
+# Startup time of generated games, run from source or from bytecode.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Each game from gen_game.py is compiled once with --pyc, and then started
+# RUNS times each way:
+#
+#   source    python game.py, which compiles the generated code every time
+#   bytecode  python game.pyc, which runs the code object as it was written
+#
+# with "exit" as its input, so the game quits at its first prompt. The best
+# wall time of a launch is reported, which includes starting Python itself.
+#
+# Usage: python benchmarks/bench_startup.py [-r RUNS] [SCENES...]
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import gen_game
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def launch(path, runs):
+    """Return the best wall time of starting the game path and quitting."""
+    best = None
+    for i in range(runs):
+        start = time.time()
+        proc = subprocess.Popen([sys.executable, path], stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE)
+        proc.communicate("exit\n")
+        elapsed = time.time() - start
+        if proc.returncode != 0:
+            raise RuntimeError(path + " exited with %d" % proc.returncode)
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('scenes', nargs='*', type=int,
+                           default=[1000, 10000],
+                           help='scenes in the generated games')
+    argparser.add_argument('-r', '--runs', type=int, default=5)
+    args = argparser.parse_args(sys.argv[1:])
+
+    tmpdir = tempfile.mkdtemp(prefix="narratr-bench-")
+    try:
+        print "%7s %10s %-9s %12s" % ("scenes", "size MB", "run", "start (ms)")
+        for scenes in args.scenes:
+            path = os.path.join(tmpdir, "game.ntr")
+            with open(path, "w") as f:
+                f.write(gen_game.generate(scenes=scenes, items=5, depth=2,
+                                          statements=4))
+            game = os.path.join(tmpdir, "game.py")
+            subprocess.check_call(
+                [sys.executable, os.path.join(ROOT, "narratr.py"), path,
+                 "-o", game, "--pyc", "--stream", "--no-cache"], cwd=ROOT)
+            for run, ext in [("source", ".py"), ("bytecode", ".pyc")]:
+                elapsed = launch(game[:-3] + ext, args.runs)
+                print "%7d %10.1f %-9s %12.1f" % (
+                    scenes, os.path.getsize(game[:-3] + ext) / 1048576.0,
+                    run, elapsed * 1000)
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# -----------------------------------------------------------------------------
+# narrtr: benchmarks/gen_game.py
+# Generator for synthetic narratr games of a given size and shape.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# The games only use constructs the compiler accepts: every scene sets up a
+# few variables, says and expositions things, instantiates items and has
+# moves to its neighbours, and its action block nests if/elif/else and while
+# statements. The same parameters and seed always give the same game.
+#
+# Usage: python benchmarks/gen_game.py [-n SCENES] [-m ITEMS] [-d DEPTH]
+#                                      [-s STATEMENTS] [--moves DENSITY]
+#                                      [-e EXPOSITION] [--seed SEED]
+#                                      [-o OUTPUT]
+
+import argparse
+import random
+import sys
+
+INDENT = "    "
+
+WORDS = ["dark", "room", "door", "llama", "dragon", "sword", "key", "lock",
+         "corner", "light", "voice", "basket", "wolf", "safe", "table",
+         "window", "you", "the", "a", "is", "there", "and", "of", "in"]
+
+DIRECTIONS = [("left", -1), ("right", 1), ("up", -10), ("down", 10)]
+
+
+def sentence(rng, length):
+    """Return a string literal of about length characters."""
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return '"' + " ".join(words)[:max(length, 1)].capitalize() + '."'
+
+
+class GameGenerator:
+    """Builds a synthetic game from its shape parameters.
+
+    scenes        the number of scenes.
+    items         the number of item definitions. Scenes instantiate them
+                  round robin.
+    depth         how deeply if/elif/else and while statements are nested
+                  in every action block.
+    statements    the number of simple statements in every block.
+    moves         the fraction of scenes that have moves to their
+                  neighbours (0 to 1).
+    exposition    the length in characters of each scene's exposition."""
+    def __init__(self, scenes=10, items=2, depth=2, statements=4, moves=0.5,
+                 exposition=80, seed=0):
+        self.scenes = scenes
+        self.items = items
+        self.depth = depth
+        self.statements = statements
+        self.moves = moves
+        self.exposition = exposition
+        self.rng = random.Random(seed)
+
+    def generate(self):
+        lines = []
+        for i in range(1, self.scenes + 1):
+            lines += self.scene(i)
+            lines.append("")
+        for i in range(self.items):
+            lines += self.item(i)
+            lines.append("")
+        lines.append("start: $1")
+        return "\n".join(lines) + "\n"
+
+    def scene(self, n):
+        lines = ["scene $%d {" % n, INDENT + "setup:"]
+        setup = [INDENT * 2 + "count is 0",
+                 INDENT * 2 + "total is %d" % n,
+                 INDENT * 2 + "exposition " + sentence(self.rng,
+                                                       self.exposition)]
+        if self.rng.random() < self.moves:
+            setup.append(INDENT * 2 + "moves " + self.scene_moves(n))
+        if self.items:
+            setup.append(INDENT * 2 + "god thing is item%d(%s, %d)" % (
+                n % self.items, sentence(self.rng, 12), n))
+        lines += setup + self.simple(2)
+        lines.append(INDENT + "action:")
+        lines += self.block(2, self.depth)
+        lines.append(INDENT + "cleanup:")
+        lines.append(INDENT * 2 + "say " + sentence(self.rng, 20))
+        lines.append("}")
+        return lines
+
+    def scene_moves(self, n):
+        moves = []
+        for direction, offset in DIRECTIONS:
+            if 1 <= n + offset <= self.scenes:
+                moves.append("%s($%d)" % (direction, n + offset))
+        return ", ".join(moves) or "left($1)"
+
+    def item(self, n):
+        return ["item item%d(name, number) {" % n,
+                INDENT + "id is name",
+                INDENT + "weight is number * %d + 1" % (n + 1),
+                INDENT + "description is " + sentence(self.rng, 30),
+                "}"]
+
+    def simple(self, indent):
+        """Return the simple statements of one block."""
+        prefix = INDENT * indent
+        lines = []
+        for i in range(self.statements):
+            kind = i % 4
+            if kind == 0:
+                lines.append(prefix + "say " + sentence(self.rng, 24))
+            elif kind == 1:
+                lines.append(prefix + "count is count + %d" %
+                             self.rng.randint(1, 9))
+            elif kind == 2:
+                lines.append(prefix + "total is (total * 2 - count) / 3")
+            else:
+                lines.append(prefix + "say count")
+        return lines
+
+    def block(self, indent, depth):
+        """Return a block with compound statements nested depth deep."""
+        lines = self.simple(indent)
+        if depth <= 0:
+            return lines or [INDENT * indent + "say count"]
+        prefix = INDENT * indent
+        if depth % 2:
+            lines.append(prefix + 'if response == "%s":' %
+                         self.rng.choice(WORDS))
+            lines += self.block(indent + 1, depth - 1)
+            lines.append(prefix + "elif count > %d and total != 0:" %
+                         self.rng.randint(0, 99))
+            lines += self.simple(indent + 1) or [prefix + INDENT + "say 1"]
+            lines.append(prefix + "else:")
+            lines += self.simple(indent + 1) or [prefix + INDENT + "say 2"]
+        else:
+            lines.append(prefix + "while count < %d:" %
+                         self.rng.randint(10, 99))
+            lines.append(prefix + INDENT + "count is count + 1")
+            lines += self.block(indent + 1, depth - 1)
+        return lines
+
+
+def generate(**params):
+    """Return the source of a game; see GameGenerator for the params."""
+    return GameGenerator(**params).generate()
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('-n', '--scenes', type=int, default=10)
+    argparser.add_argument('-m', '--items', type=int, default=2)
+    argparser.add_argument('-d', '--depth', type=int, default=2)
+    argparser.add_argument('-s', '--statements', type=int, default=4)
+    argparser.add_argument('--moves', type=float, default=0.5)
+    argparser.add_argument('-e', '--exposition', type=int, default=80)
+    argparser.add_argument('--seed', type=int, default=0)
+    argparser.add_argument('-o', '--output', help='defaults to stdout')
+    args = vars(argparser.parse_args(sys.argv[1:]))
+    output = args.pop("output")
+    source = generate(**args)
+    if output is None:
+        sys.stdout.write(source)
+    else:
+        with open(output, "w") as f:
+            f.write(source)
+
+if __name__ == "__main__":
+    main()
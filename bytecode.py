@@ -0,0 +1,67 @@
+# -----------------------------------------------------------------------------
+# narrtr: bytecode.py
+# This file writes generated games as precompiled Python bytecode (.pyc), so
+# that a game can be started without compiling it first.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Python compiles a script it is given on the command line every time it
+# runs, and never caches the result, so a large game pays for compiling its
+# generated code on every launch. Python runs a .pyc file given on the
+# command line as it is, so `python game.ntr.pyc` starts the game without
+# compiling it. The file has the layout py_compile writes: the magic number
+# of the running Python, the modification time of the source and the
+# marshalled code object.
+
+import imp
+import marshal
+import os
+import struct
+
+MAGIC = imp.get_magic()
+
+
+def bytecode_path(outputfile):
+    """Return where the bytecode for the generated module outputfile goes:
+    game.ntr.py becomes game.ntr.pyc, and any other name gets .pyc added."""
+    if outputfile.endswith(".py"):
+        return outputfile + "c"
+    return outputfile + ".pyc"
+
+
+def write_bytecode(code, sourcefile, path=None):
+    """Write the code object code, compiled from sourcefile, as a .pyc.
+
+    path defaults to bytecode_path(sourcefile). The file is written to
+    path.part and renamed into place, so a game that is running is
+    never started from half a file."""
+    if path is None:
+        path = bytecode_path(sourcefile)
+    mtime = int(os.stat(sourcefile).st_mtime) & 0xFFFFFFFF
+    data = MAGIC + struct.pack("<I", mtime) + marshal.dumps(code)
+    part = path + ".part"
+    try:
+        with open(part, "wb") as f:
+            f.write(data)
+        os.rename(part, path)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    return path
+
+
+def compile_bytecode(sourcefile, path=None):
+    """Compile the generated module sourcefile and write it as a .pyc."""
+    with open(sourcefile, "rU") as f:
+        source = f.read()
+    code = compile(source, sourcefile, "exec", 0, True)
+    return write_bytecode(code, sourcefile, path)
@@ -0,0 +1,142 @@
+# -----------------------------------------------------------------------------
+# narrtr: cache.py
+# This file defines the on-disk compile cache used by the narratr compiler.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+from hashlib import sha1
+
+
+def default_dir():
+    """Return $NARRATR_CACHE_DIR, or ~/.cache/narratr if it is not set."""
+    return os.environ.get("NARRATR_CACHE_DIR",
+                          os.path.join(os.path.expanduser("~"), ".cache",
+                                       "narratr"))
+
+DEFAULT_DIR = default_dir()
+DEFAULT_SIZE = 100 * 1024 * 1024
+
+# The compiler version is a hash over the compiler's own files (its modules,
+# the shipped lexer and parser tables, and the ply package the lexer and
+# parser run on), so any change to the compiler invalidates every entry it
+# produced.
+_compiler_version = None
+_PACKAGES = ["", "ply"]
+
+
+def compiler_version():
+    """Return a hash identifying the compiler that is running."""
+    global _compiler_version
+    if _compiler_version is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        digest = sha1()
+        for package in _PACKAGES:
+            directory = os.path.join(here, package)
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".py") or name.endswith(".pickle"):
+                    with open(os.path.join(directory, name), "rb") as f:
+                        digest.update(os.path.join(package, name) + "\0" +
+                                      f.read() + "\0")
+        _compiler_version = digest.hexdigest()
+    return _compiler_version
+
+
+class CompileCache:
+    """A directory of generated modules keyed by a hash of their inputs.
+
+    directory     where entries are kept. It is created when needed.
+    max_size      the total size in bytes the entries may use. Once a new
+                  entry takes the cache over this limit, the least recently
+                  used entries are evicted.
+
+    Every entry is a generated module (KEY.py) and the warnings that were
+    printed while generating it (KEY.log), which are replayed on a hit.
+    Entries are written to a temporary file and renamed into place, so
+    several compilers can share one cache."""
+    def __init__(self, directory=DEFAULT_DIR, max_size=DEFAULT_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    def key(self, source, flags=()):
+        """Hash a source string together with the compiler and its flags."""
+        digest = sha1()
+        digest.update(compiler_version() + "\0")
+        digest.update(repr(tuple(flags)) + "\0")
+        digest.update(source)
+        return digest.hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, key + ext)
+
+    def fetch(self, key, outputfile):
+        """Copy a cached module to outputfile.
+
+        Returns the cached warnings (a possibly empty list of lines), or None
+        if there is no entry for key. A hit marks the entry as recently used.
+        """
+        module = self._path(key, ".py")
+        try:
+            with open(self._path(key, ".log")) as f:
+                warnings = f.read().splitlines(True)
+            shutil.copyfile(module, outputfile)
+            os.utime(module, None)
+        except (IOError, OSError):
+            return None
+        return warnings
+
+    def store(self, key, outputfile, warnings=()):
+        """Add the module in outputfile and its warnings to the cache."""
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            self._write(key, ".log", "".join(warnings))
+            with open(outputfile, "rb") as f:
+                self._write(key, ".py", f.read())
+            self.evict()
+        except (IOError, OSError):
+            # A cache that cannot be written to is not an error.
+            pass
+
+    def _write(self, key, ext, data):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.rename(tmp, self._path(key, ext))
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".py"):
+                continue
+            key = name[:-3]
+            try:
+                stat = os.stat(self._path(key, ".py"))
+                size = stat.st_size
+                if os.path.exists(self._path(key, ".log")):
+                    size += os.path.getsize(self._path(key, ".log"))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, key, size))
+            total += size
+        entries.sort()
+        while total > self.max_size and entries:
+            mtime, key, size = entries.pop(0)
+            for ext in [".py", ".log"]:
+                try:
+                    os.remove(self._path(key, ext))
+                except OSError:
+                    pass
+            total -= size
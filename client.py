@@ -0,0 +1,111 @@
+# -----------------------------------------------------------------------------
+# narrtr: client.py
+# This file defines the thin client for the narratr compile server.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# The client takes exactly the arguments narratr.py takes, sends them to a
+# running server.py along with its working directory, environment and umask,
+# and prints what the server sends back with the same exit code. If no
+# server is listening, it compiles in this process instead. It only imports
+# the standard library until then, so that it starts as quickly as possible.
+#
+# The request carries the client's whole environment, so the client only
+# talks to a socket that belongs to the user running it. The server keeps
+# its socket in a directory only that user can use (see server.py).
+
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+
+
+def default_socket():
+    """Return $NARRATR_SOCKET, or server.sock in a directory of the user's
+    own: $XDG_RUNTIME_DIR/narratr, or narratr-UID in the temporary
+    directory."""
+    if "NARRATR_SOCKET" in os.environ:
+        return os.environ["NARRATR_SOCKET"]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        directory = os.path.join(os.environ["XDG_RUNTIME_DIR"], "narratr")
+    else:
+        directory = os.path.join(tempfile.gettempdir(),
+                                 "narratr-%d" % os.getuid())
+    return os.path.join(directory, "server.sock")
+
+DEFAULT_SOCKET = default_socket()
+
+# Requests and output are sent as latin-1 decoded strings, which maps every
+# byte to one character and back, so arguments, paths, the environment and
+# output arrive byte for byte whatever their encoding.
+ENCODING = "latin-1"
+
+
+class ForeignSocket(socket.error):
+    """The socket the client would connect to is not the user's own."""
+
+
+def check_owner(path):
+    """Raise socket.error unless path is a socket of the user running the
+    client, and ForeignSocket if it is someone else's."""
+    try:
+        st = os.lstat(path)
+    except OSError as e:
+        raise socket.error(e.errno, e.strerror)
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        raise ForeignSocket(path + " is not a socket of this user")
+
+
+def send(request, path=DEFAULT_SOCKET):
+    """Send a request to the server at path and return its reply."""
+    check_owner(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        sock.sendall(json.dumps(request, encoding=ENCODING) + "\n")
+        sock.shutdown(socket.SHUT_WR)
+        reply = []
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            reply.append(data)
+    finally:
+        sock.close()
+    return json.loads("".join(reply))
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    umask = os.umask(0)
+    os.umask(umask)
+    request = {"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ),
+               "umask": umask}
+    try:
+        reply = send(request)
+    except socket.error as e:
+        if isinstance(e, ForeignSocket):
+            sys.stderr.write("WARNING: Not using the compile server: " +
+                             str(e) + ".\n")
+        sys.argv = [os.path.join(os.path.dirname(__file__), "narratr.py")] + \
+            argv
+        import narratr
+        narratr.main()
+        return 0
+    sys.stdout.write(reply["stdout"].encode(ENCODING))
+    sys.stderr.write(reply["stderr"].encode(ENCODING))
+    return reply["code"]
+
+if __name__ == "__main__":
+    exit(main())
@@ -16,11 +16,104 @@
 # -----------------------------------------------------------------------------
 
 from sys import stderr, exit
+import multiprocessing
+import os
+import sys
 from node import Node
+from visitor import dispatch_table
+from emitter import Emitter
+from reachability import unreachable
+from assignment import unset_reads
+import kinds
 
 
-class CodeGen:
+# ABOUT THE POCKET CLASS: here we define the pocket class and
+# initialize a global instance. The methods are fairly self
+# explanatory.
+POCKET_CLASS = '''class pocket_class:
     def __init__(self):
+        self.data = {}
+
+    def add(self, key, val, verbose=True):
+        if self.data.get(key, None):
+            print " ** '" + key + "' is already in your pocket. **"
+        else:
+            self.data[key] = val
+            if verbose:
+                print " ** '" + key + "' is now in your pocket. **"
+
+    def update(self, key, val):
+        self.data[key] = val
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def remove(self, key):
+        del self.data[key]
+
+    def has(self, key):
+        if self.data.get(key, None):
+            return True
+        return False
+
+pocket = pocket_class()\n'''
+
+# ABOUT THE RESPONSE CODE: the default response code, which is dropped
+# into a function called get_response(), waits for user input. When it
+# it receives this input, it strips the case (i.e. everything is made
+# lower case), removes all punctuation except double quotes (to allow
+# the programmer to add conversational capabilities), converts all
+# whitespace characters into a single space, and then checks for specific
+# situations we agree with the programmer to handle by default. 'exit'
+# will terminate the game (there is no current way to save game state),
+# and "move" followed by a single token will check the dictionary of
+# directions (which it takes as an argument) for an applicable direction.
+# If it does not appear in the dictionary, an error is reported so the user
+# is not confused.  If it does appear, it encodes the next scene's function
+# call within a list so that it can easily be identified by the caller
+# function, which will return that piece of code. This is a centerpiece of
+# our approach to avoiding an overflow of activation records in large
+# games.
+GET_RESPONSE = '''def get_response(direction):
+    response = raw_input(" -->> ")
+    response = response.lower()
+    response = response.translate(None,
+                "!#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~")
+    response = ' '.join(response.split())
+    if response == "exit":
+        print "== GAME TERMINATED =="
+        exit(0)
+    elif response[:5] == "move " and len(response.split(" ")) == 2:
+        if response.split(" ")[1] in direction:
+            return ["s_" + str(direction[response.split(" ")[1]])\\
+                + "_inst.setup()"]
+        else:
+            print "\\"" + response.split(" ")[1] + "\\" is not a "\\
+                + "valid direction from this scene."
+    else:
+        return response\n\n'''
+
+# ABOUT UNSET VARIABLES: each variable of a scene is kept in a slot (see
+# _scene_gen()), which holds an unset_var for the variable until it is set
+# in a visit to the scene. A read of a slot that may come before the slot is
+# set (see assignment.py) goes through get_var(), so reading the variable
+# then raises a KeyError with its name, at the line that reads it, as
+# looking it up in a dictionary of the variables of the scene would. Every
+# other read is a plain index, and the unset_var never leaves the slot.
+UNSET_VAR = '''class unset_var(object):
+    def __init__(self, name):
+        self.name = name
+
+
+def get_var(value):
+    if type(value) is unset_var:
+        raise KeyError(value.name)
+    return value\n\n'''
+
+
+class CodeGen:
+    def __init__(self, jobs=1, omit_unreachable=False,
+                 warn_unreachable=False):
         self.frontmatter = "#!/usr/bin/env python\n" + \
                             "from __future__ import division\n" + \
                             "from sys import exit\n\n"
@@ -29,6 +122,63 @@ class CodeGen:
         self.items = []
         self.item_names = []
         self.main = ""
+        self.warnings = []
+        # The file scenes and items are written to as they are generated, in
+        # stream().
+        self.out = None
+        self.items_started = False
+        # The number of processes scenes and items are generated on (see
+        # _add_generated()).
+        self.jobs = jobs
+        # Whether the scenes and items that are never reached are warned
+        # about, and left out (see _check_reachable()), and the (kind, key)
+        # of each of them left out. Leaving them out warns about them too.
+        self.warn_unreachable = warn_unreachable or omit_unreachable
+        self.omit_unreachable = omit_unreachable
+        self.omitted = set()
+        # The atoms of the scene being generated that may read a variable
+        # before it is set (see _scene_gen()).
+        self.unset_reads = ()
+        # The functions for the kinds of node an expression can be made of,
+        # and for the kinds of statement, indexed by kind (see visitor.py).
+        # Statement functions take the node and its indentation level. They
+        # all return the code for the node, or a list of parts for
+        # _generate().
+        self.expression_handlers = dispatch_table({
+            kinds.OR_TEST: self._process_or_test,
+            kinds.AND_TEST: self._process_and_test,
+            kinds.NOT_TEST: self._process_not_test,
+            kinds.COMPARISON: self._process_comparison,
+            kinds.ARITHMETIC_EXPRESSION: self._process_arithmetic_expression,
+            kinds.TERM: self._process_term,
+            kinds.FACTOR: self._process_factor,
+            kinds.POWER: self._process_power,
+            kinds.ATOM: self._process_atom,
+            kinds.LIST: self._process_list,
+            kinds.NUMBER: self._process_number,
+            kinds.BOOLEAN: self._process_boolean,
+        }, self._process_bad_test)
+        self.statement_handlers = dispatch_table({
+            kinds.SUITE: self._process_suite,
+            kinds.STATEMENTS: self._process_statements,
+            kinds.STATEMENT: self._process_statement,
+            kinds.SIMPLE_STATEMENT: self._process_simple_smt,
+            kinds.BLOCK_STATEMENT: self._process_block_smt,
+            kinds.SAY_STATEMENT: self._process_say_smt,
+            kinds.EXPOSITION: self._process_expo_smt,
+            kinds.WIN_STATEMENT: self._process_win_smt,
+            kinds.LOSE_STATEMENT: self._process_lose_smt,
+            kinds.EXPRESSION_STATEMENT: self._process_expression_smt,
+            kinds.FLOW_STATEMENT: self._process_flow_smt,
+            kinds.CONTINUE_STATEMENT: self._process_continue,
+            kinds.BREAK_STATEMENT: self._process_break,
+            kinds.MOVES_DECLARATION: self._process_moves_dec,
+            kinds.MOVETO_STATEMENT: self._process_moveto,
+            kinds.IF_STATEMENT: self._process_ifstatement,
+            kinds.WHILE_STATEMENT: self._process_whilestatement,
+            kinds.ELIF_STATEMENTS: self._process_elifstatements,
+            kinds.ELIF_STATEMENT: self._process_elifstatement,
+        }, self._process_bad_smt)
 
     def process(self, node, symtab):
         """Call first: generate target code given narratr AST and symbol table.
@@ -39,25 +189,94 @@ class CodeGen:
         to identify the high level nodes (i.e. scenes, items, and startstate),
         sending the appropriate nodes to the appropriate functions for
         processing. Note we know the structure of the AST, so we don't need
-        DFS or other tree searching algorithms, which improves efficiency."""
+        DFS or other tree searching algorithms, which improves efficiency.
+        With more than one job, the scenes and items are generated on a pool
+        of processes, and the output is the same. With warn_unreachable,
+        scenes the start scene cannot lead to and items no reachable scene
+        uses are warned about, and with omit_unreachable they are left out
+        as well."""
         self.symtab = symtab
-        if len(node.children) != 1 or node[0].type != "blocks":
+        if len(node.children) != 1 or node[0].kind != kinds.BLOCKS:
             self._process_error("Unexpected Parse Tree - Incorrect number" +
                                 "or type of children for the top node",
                                 node.lineno)
         blocks = node[0].children
-        for block in blocks:
-            if type(block) is dict:
-                for key, s_i in block.iteritems():
-                    if s_i.type == "scene_block":
-                        self._add_scene(self._scene_gen(s_i, key))
-                    elif s_i.type == "item_block":
-                        self._add_item(self._item_gen(s_i, key))
-            elif block.type == "start_state":
-                self._add_main(block)
-            else:
-                self._process_error("Found unexpected block types.",
-                                    block.lineno)
+        if self.warn_unreachable:
+            self._check_reachable(blocks)
+        pool = None
+        if self.jobs > 1:
+            pool = multiprocessing.Pool(self.jobs, _init_worker,
+                                        (blocks, symtab))
+        try:
+            for index, block in enumerate(blocks):
+                if type(block) is dict and pool is not None:
+                    self._add_generated(pool, index, block)
+                elif type(block) is dict:
+                    for key, s_i in block.iteritems():
+                        if (s_i.kind, key) in self.omitted:
+                            continue
+                        if s_i.kind == kinds.SCENE_BLOCK:
+                            self._add_scene(self._scene_gen(s_i, key))
+                        elif s_i.kind == kinds.ITEM_BLOCK:
+                            self._add_item(self._item_gen(s_i, key))
+                elif block.kind == kinds.START_STATE:
+                    self._add_main(block)
+                else:
+                    self._process_error("Found unexpected block types.",
+                                        block.lineno)
+        except BaseException:
+            if pool is not None:
+                pool.terminate()
+            raise
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # This function warns about the scenes and items that are never reached
+    # (see reachability.py) and, with omit_unreachable, marks them to be
+    # left out, so neither their classes nor the instances of the scenes
+    # are generated.
+    def _check_reachable(self, blocks):
+        scenes, items = unreachable(blocks)
+        for scene in scenes:
+            self._process_warning("Scene $" + str(scene.value) + " cannot " +
+                                  "be reached from the start scene.",
+                                  scene.lineno)
+        for item in items:
+            self._process_warning("Item " + str(item.value) + " is not " +
+                                  "used by any reachable scene.",
+                                  item.lineno)
+        if self.omit_unreachable:
+            for block in scenes + items:
+                self.omitted.add((block.kind, block.value))
+
+    # This function adds the scenes and items of a block, generated on a
+    # pool of processes. The keys of the block are split into chunks, a few
+    # per process so that the processes stay busy, and the chunks are
+    # handed out in the order the keys are in (see _generate_chunk()).
+    # imap() returns the results in that order too, so the scenes and items
+    # are added (and written, when streaming) in the same order as by a
+    # single process, and the warnings and errors of a chunk are reported as
+    # they would be.
+    def _add_generated(self, pool, index, block):
+        keys = [(index, key) for key, s_i in block.iteritems()
+                if (s_i.kind, key) not in self.omitted]
+        size = max(1, len(keys) // (self.jobs * 4))
+        chunks = [keys[i:i + size] for i in range(0, len(keys), size)]
+        for generated, warnings, messages, failed in \
+                pool.imap(_generate_chunk, chunks):
+            for kind, name, code in generated:
+                if kind == kinds.SCENE_BLOCK:
+                    self.scene_nums.append(name)
+                    self._add_scene(code)
+                else:
+                    self.item_names.append(name)
+                    self._add_item(code)
+            self.warnings += warnings
+            for message in messages:
+                self._report(message)
+            if failed:
+                exit(1)
 
     def construct(self, outputfile="stdout"):
         """Class second: write the generated code to a file.
@@ -92,92 +311,86 @@ class CodeGen:
                 f.write("\n\n")
                 f.write(self.main)
 
-    # This function is used internally to add a scene to the scene list. It
-    # takes a string *with correct indentation*.
+    def stream(self, node, symtab, outputfile="stdout"):
+        """Generate target code and write it as it is generated.
+
+        This does what process() and construct() do together, but writes
+        every scene and item to outputfile as soon as its code is generated
+        instead of keeping it in self.scenes or self.items, so the generated
+        program is never held in memory all at once. The main code, which
+        needs every scene, is written last, and the output is the same as
+        the file construct() writes (also when outputfile is "stdout"). The
+        code is written to a file next to outputfile, which replaces it only
+        if code generation succeeds."""
+        if outputfile == "stdout":
+            self.out = sys.stdout
+        else:
+            partfile = outputfile + ".part"
+            self.out = open(partfile, "w", 1 << 16)
+        try:
+            self.out.write(self.frontmatter)
+            self.out.write("\n")
+            self.process(node, symtab)
+            if not self.items_started:
+                self.out.write("\n\n")
+            if self.main == "":
+                self._process_warning("No start scene specified. " +
+                                      "Defaulting to $1.")
+                self._add_main(1)
+            self.out.write("\n\n")
+            self.out.write(self.main)
+            if outputfile == "stdout":
+                self.out.write("\n")
+            else:
+                self.out.close()
+                os.rename(partfile, outputfile)
+        except BaseException:
+            if outputfile != "stdout":
+                self.out.close()
+                os.remove(partfile)
+            raise
+        finally:
+            self.out = None
+
+    # This function is used internally to add a scene to the scene list, or
+    # to write it out when streaming. It takes a string *with correct
+    # indentation*.
     def _add_scene(self, scene):
-        self.scenes.append(scene)
-
-    # This function is used internally to add a item to the item list. It
-    # takes a string *with correct indentation*.
+        if self.out is None:
+            self.scenes.append(scene)
+            return
+        if len(self.scene_nums) > 1:
+            self.out.write("\n")
+        self.out.write(scene)
+
+    # This function is used internally to add a item to the item list, or to
+    # write it out when streaming. It takes a string *with correct
+    # indentation*.
     def _add_item(self, item):
-        self.items.append(item)
+        if self.out is None:
+            self.items.append(item)
+            return
+        self.out.write("\n" if self.items_started else "\n\n")
+        self.items_started = True
+        self.out.write(item)
 
     # This function generates the code for a start state given a start state
     # node. If start state code has already been generated, it produces a
     # warning and keeps the start state declared higher in the program. If
     # called without a node, it triggers the default action, which is a start
     # state of 1. This should only be used internally.
-    # Comments on the literal Python functions are in-line below.
+    # The pocket class, get_response() and unset_var are described with
+    # POCKET_CLASS, GET_RESPONSE and UNSET_VAR above.
     def _add_main(self, startstate):
         if self.main == "":
-            # ABOUT THE POCKET CLASS: here we define the pocket class and
-            # initialize a global instance. The methods are fairly self
-            # explanatory.
-            self.main = '''class pocket_class:
-    def __init__(self):
-        self.data = {}
-
-    def add(self, key, val, verbose=True):
-        if self.data.get(key, None):
-            print " ** '" + key + "' is already in your pocket. **"
-        else:
-            self.data[key] = val
-            if verbose:
-                print " ** '" + key + "' is now in your pocket. **"
-
-    def update(self, key, val):
-        self.data[key] = val
-
-    def get(self, key):
-        return self.data.get(key)
-
-    def remove(self, key):
-        del self.data[key]
-
-    def has(self, key):
-        if self.data.get(key, None):
-            return True
-        return False
-
-pocket = pocket_class()\n'''
-    # ABOUT THE RESPONSE CODE: the default response code, which is dropped
-    # into a function called get_response(), waits for user input. When it
-    # it receives this input, it strips the case (i.e. everything is made
-    # lower case), removes all punctuation except double quotes (to allow
-    # the programmer to add conversational capabilities), converts all
-    # whitespace characters into a single space, and then checks for specific
-    # situations we agree with the programmer to handle by default. 'exit'
-    # will terminate the game (there is no current way to save game state),
-    # and "move" followed by a single token will check the dictionary of
-    # directions (which it takes as an argument) for an applicable direction.
-    # If it does not appear in the dictionary, an error is reported so the user
-    # is not confused.  If it does appear, it encodes the next scene's function
-    # call within a list so that it can easily be identified by the caller
-    # function, which will return that piece of code. This is a centerpiece of
-    # our approach to avoiding an overflow of activation records in large
-    # games.
-            self.main += '''def get_response(direction):
-    response = raw_input(" -->> ")
-    response = response.lower()
-    response = response.translate(None,
-                "!#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~")
-    response = ' '.join(response.split())
-    if response == "exit":
-        print "== GAME TERMINATED =="
-        exit(0)
-    elif response[:5] == "move " and len(response.split(" ")) == 2:
-        if response.split(" ")[1] in direction:
-            return ["s_" + str(direction[response.split(" ")[1]])\\
-                + "_inst.setup()"]
-        else:
-            print "\\"" + response.split(" ")[1] + "\\" is not a "\\
-                + "valid direction from this scene."
-    else:
-        return response\n\n'''
+            out = Emitter()
+            out.write(UNSET_VAR)
+            out.write(POCKET_CLASS)
+            out.write(GET_RESPONSE)
 
             # Create an instance of each scene that has been declared.
             for s in self.scene_nums:
-                self.main += "s_" + str(s) + "_inst = s_" + str(s) + "()\n"
+                out.write("s_" + str(s) + "_inst = s_" + str(s) + "()\n")
 
             if isinstance(startstate, Node):
                 ss = startstate.value
@@ -190,9 +403,10 @@ pocket = pocket_class()\n'''
                 self._process_error("Start scene $" + str(ss) +
                                     " does not exist.")
 
-            self.main += "if __name__ == '__main__':\n    next = s_"\
-                + str(self.startstate) + "_inst.setup()\n    while True:\n"\
-                + "        exec 'next = ' + next"
+            out.write("if __name__ == '__main__':\n    next = s_" +
+                      str(self.startstate) + "_inst.setup()\n" +
+                      "    while True:\n        exec 'next = ' + next")
+            self.main = out.getvalue()
         else:
             self._process_error("Multiple start scene declarations.",
                                 startstate.lineno)
@@ -204,28 +418,51 @@ pocket = pocket_class()\n'''
     # action_block part, adding while(true) loop to get response and then
     # process it. def achition is now taking direction as argument, direction
     # is an empty dictionary by default.
+    # The variables of the scene (other than god variables) are kept in the
+    # list self.__vars, at the slots the SymTab gave them, and each block
+    # that has any binds the list to the local __vars, so reading or setting
+    # one is a local lookup and an index. Each slot starts out, and is reset
+    # by cleanup, as an unset_var (see UNSET_VAR above), and the reads that
+    # may come before a slot is set are checked.
+    # The code of the scene is written to an Emitter (see emitter.py) and
+    # joined once.
     def _scene_gen(self, scene, sid):
-        commands = []
+        out = Emitter()
         direction_sign = False
+        slots = self._slot_names(sid)
+        self.unset_reads = unset_reads(scene, self.symtab) if slots else ()
+        out.write("class s_" + str(sid) + ":")
+        out.line(1, "def __init__(self):")
+        if slots:
+            out.line(2, "self.__vars = " + self._unset_slots(slots))
+        else:
+            out.line(2, "pass")
+        out.write("\n")
         for c in scene.children:
-            if c.type == "SCENEID":
-                sid = c.value
-
-            elif c.type == "setup_block":
-                commands += self._process_setup_block(c)
+            if c.kind == kinds.SETUP_BLOCK:
+                self._process_setup_block(c, out, slots)
 
-            elif c.type == "cleanup_block":
-                commands += self._process_cleanup_block(c)
+            elif c.kind == kinds.CLEANUP_BLOCK:
+                self._process_cleanup_block(c, out, slots)
 
-            elif c.type == "action_block":
-                commands += self._process_action_block(c)
+            elif c.kind == kinds.ACTION_BLOCK:
+                self._process_action_block(c, out, slots)
 
         self.scene_nums.append(sid)
-        scene_code = "class s_" + str(sid) + ":\n    def __init__(self):"\
-            + "\n        self.__namespace = {}\n\n    "\
-            + "\n    ".join(commands)
+        return out.getvalue()
 
-        return scene_code
+    # This returns the names of the variables of scene sid, by slot.
+    def _slot_names(self, sid):
+        names = [None] * self.symtab.slotCount(sid)
+        for symbol, entry in self.symtab.getScope(sid).iteritems():
+            if entry.slot is not None:
+                names[entry.slot] = str(symbol)
+        return names
+
+    # This returns the code for a list of an unset_var for each of names.
+    def _unset_slots(self, names):
+        return "[" + ", ".join("unset_var(" + repr(name) + ")"
+                               for name in names) + "]"
 
     # This function takes a item node and processes the node. It creates
     # a class for the item which includes initiation function and other
@@ -233,25 +470,25 @@ pocket = pocket_class()\n'''
     def _item_gen(self, item, iid):
         iid = item.value
         self.item_names.append(iid)
-        item_code = "class " + str(iid) + ":\n    "
+        out = Emitter()
+        out.write("class " + str(iid) + ":")
         if len(item.children) not in [1, 2]:
             self._process_error("Wrong number of children of item",
                                 item.lineno)
-        elif item[0].type != "itemparams":
+        elif item[0].kind != kinds.ITEMPARAMS:
             self._process_error("Wrong number of items", item.lineno)
         else:
-            item_code += "def __init__(self"
-            item_code += self._process_itemparams(item[0])
-            item_code += "):"
+            out.line(1, "def __init__(self" +
+                     self._process_itemparams(item[0]) + "):")
         if len(item.children) == 1:
-            item_code += "\n        pass"
+            out.line(2, "pass")
         elif len(item.children) == 2:
-            if item[1].type != "suite":
+            if item[1].kind != kinds.SUITE:
                 self._process_error("Wrong type of child for item",
                                     item.lineno)
             else:
-                item_code += self._process_suite(item[1], 2)
-        return item_code
+                self._generate([(item[1], 2)], out)
+        return out.getvalue()
 
     # This function takes item parameters and processes its first children
     # node if it exits.
@@ -261,7 +498,7 @@ pocket = pocket_class()\n'''
             self._process_error("Wrong number of children of itemparams",
                                 itemparams.lineno)
         if len(itemparams.children) == 1:
-            if itemparams[0].type != "fparams":
+            if itemparams[0].kind != kinds.FPARAMS:
                 self._process_error("Wrong type of child of itemparams",
                                     itemparams.lineno)
             else:
@@ -279,40 +516,48 @@ pocket = pocket_class()\n'''
     # Code for adding a setup block. Takes as input a single "setup block"
     # node. Adds boilerplate code (function definition, empty dictionary for
     # direction, and at the end, the code to move to the action block), and
-    # sends the child nodes to _process_suite() to generate their code.
-    def _process_setup_block(self, c):
-        commands = []
-        commands.append("def setup(self):" +
-                        "\n        direction = {}")
+    # sends the child nodes to _generate() to generate their code. The code
+    # is written to out, an Emitter.
+    def _process_setup_block(self, c, out, slots=()):
+        out.line(1, "def setup(self):")
+        out.line(2, "direction = {}")
+        if slots:
+            out.line(2, "__vars = self.__vars")
         if len(c.children) not in [0, 1]:
             self._process_error("setup block has wrong number of children")
         if len(c.children) == 1:
-            if c[0].type != "suite":
+            if c[0].kind != kinds.SUITE:
                 self._process_error("setup block doesn't have suite child")
             else:
-                commands.append(self._process_suite(c[0], 2))
-        commands.append("    return self.action(direction)\n")
-        return commands
+                out.line(1)
+                self._generate([(c[0], 2)], out)
+        out.line(2, "return self.action(direction)")
+        out.write("\n")
 
     # Code for adding a cleanup block. Takes as input a single "cleanup block"
     # node. Adds boilerplate code (function definition and "pass" if necessary,
-    # explained below), then sends the child nodes to _process_suite() to
+    # explained below), then sends the child nodes to _generate() to
     # generate their code. "pass" is required in the scenario that there are no
     # child nodes, in which case Python syntactically requires code, we need to
     # be able to execute the function, but we don't want anything to happen. #
     # "pass" is a Python command that does nothing, so it fits the bill.
-    def _process_cleanup_block(self, c):
-        commands = []
-        commands.append("def cleanup(self):")
+    # Finally, it clears the variables of the scene (their slots are kept).
+    def _process_cleanup_block(self, c, out, slots=()):
+        out.line(1, "def cleanup(self):")
+        if slots:
+            out.line(2, "__vars = self.__vars")
         if len(c.children) not in [0, 1]:
             self._process_error("cleanup block has wrong number of children")
         if len(c.children) == 1:
-            if c[0].type != "suite":
+            if c[0].kind != kinds.SUITE:
                 self._process_error("cleanup block doesn't have suite child")
             else:
-                commands.append(self._process_suite(c[0], 2))
-        commands.append("    self.__namespace = {}")
-        return commands
+                out.line(1)
+                self._generate([(c[0], 2)], out)
+        if slots:
+            out.line(2, "__vars[:] = " + self._unset_slots(slots))
+        else:
+            out.line(2, "pass")
 
     # Code for adding an action block. Takes as input a single "action block"
     # node. Adds boilerplate code (function definition, initialize "response"
@@ -322,71 +567,85 @@ pocket = pocket_class()\n'''
     # the get_response() function. It also passes the name of the class so
     # get_response() knows which scene's cleanup block to call if the user is
     # trying to move between scenes.
-    def _process_action_block(self, c):
-        commands = []
-        commands.append("def action(self, direction):")
-        commands.append("    response = \"\"\n        while True:")
+    def _process_action_block(self, c, out, slots=()):
+        out.line(1, "def action(self, direction):")
+        if slots:
+            out.line(2, "__vars = self.__vars")
+        out.line(2, "response = \"\"")
+        out.line(2, "while True:")
         if len(c.children) not in [0, 1]:
             self._process_error("action block has wrong number of children")
-        commands.append("        response = get_response(" +
-                        "direction)\n            " +
-                        "if isinstance(response, list):" +
-                        "\n                self.cleanup()\n" +
-                        "                return response[0]\n")
+        out.line(3, "response = get_response(direction)")
+        out.line(3, "if isinstance(response, list):")
+        out.line(4, "self.cleanup()")
+        out.line(4, "return response[0]")
+        out.write("\n")
         if len(c.children) == 1:
-            if c[0].type != "suite":
+            if c[0].kind != kinds.SUITE:
                 self._process_error("action block doesn't have suite child")
             else:
-                commands.append(self._process_suite(c[0], 3)[5:])
-
-        return commands
+                self._generate([(c[0], 3)], out)
+
+    # This function generates the code for a list of parts. A part is a
+    # string of code, an expression node or a (statement node, indentation
+    # level) pair. The function for the kind of a node returns its code, or
+    # a list of parts of its own (strings and the children of the node),
+    # which take its place. The parts that are left are kept on a stack
+    # instead of in Python's call stack, so statements and expressions can
+    # be nested as deeply as a game likes without running into the
+    # recursion limit, and a node costs one function call. The code is
+    # returned, or written to out if an Emitter is given.
+    def _generate(self, parts, out=None):
+        expression_handlers = self.expression_handlers
+        statement_handlers = self.statement_handlers
+        code = [] if out is None else out.pieces
+        append = code.append
+        stack = parts[::-1]
+        pop = stack.pop
+        extend = stack.extend
+        while stack:
+            part = pop()
+            kind = type(part)
+            if kind is str or kind is unicode:
+                append(part)
+                continue
+            if kind is tuple:
+                node, indentlevel = part
+                part = statement_handlers[node.kind](node, indentlevel)
+            elif isinstance(part, Node):
+                part = expression_handlers[part.kind](part)
+            else:
+                self._process_bad_test(part)
+            if isinstance(part, basestring):
+                append(part)
+            else:
+                extend(reversed(part))
+        if out is None:
+            return "".join(code)
 
     # This function processes suite node and distinguishes its children
     # nodes from simple statement if the value of the suite is "simple"
     # and statements if the value is not specified.
     def _process_suite(self, suite, indentlevel=1):
-        commands = ""
         if len(suite.children) != 1:
             self._process_error("Too many children in suite.")
-        else:
-            if suite.value == "simple":
-                commands += self._process_simple_smt(suite[0],
-                                                     indentlevel)
-            else:
-                commands += self._process_statements(suite[0],
-                                                     indentlevel)
-        return commands
+        return [(suite[0], indentlevel)]
 
     # This function processes statements node which contains
     # several statement nodes as its children nodes.
     def _process_statements(self, statements, indentlevel=1):
-        commands = ''
-        for smt in statements.children:
-            commands += self._process_statement(smt, indentlevel)
-        return commands
+        return [(smt, indentlevel) for smt in statements.children]
 
     # This function processes statement node which contains two
     # different types of statements: simple statement and
     # block statement.
     def _process_statement(self, statement, indentlevel=1):
-        commands = ''
-        if statement.value == "simple":
-            commands += self._process_simple_smt(statement[0],
-                                                 indentlevel)
-        elif statement.value == "block":
-            commands += self._process_block_smt(statement[0],
-                                                indentlevel)
-        else:
-            self._process_error("Not accepted ")
-        return commands
+        return [(statement[0], indentlevel)]
 
     # Statement is actually a suite node, but we're keeping the name for
     # backwards-compatability. This function takes suite node and passes
-    # to different types of simple statements based on the value of the
-    # suite node.
+    # its child to the function for its kind of simple statement.
     def _process_simple_smt(self, smt, indentlevel=1):
-        commands = ''
-        prefix = "\n" + "    "*indentlevel
         if not isinstance(smt, Node):
             self._process_error("Something bad happened while processing " +
                                 "'simple statement'. Unfortunately, that is " +
@@ -394,26 +653,12 @@ pocket = pocket_class()\n'''
         if len(smt.children) == 0:
             self._process_error("Simple statement has no children to process.",
                                 smt.lineno)
-        if smt.value == "say":
-            commands += prefix + self._process_say_smt(smt[0])
-        elif smt.value == "exposition":
-            commands += prefix + self._process_expo_smt(smt[0])
-        elif smt.value == "win":
-            commands += self._process_win_smt(smt[0], indentlevel)
-        elif smt.value == "lose":
-            commands += self._process_lose_smt(smt[0], indentlevel)
-        elif smt.value == "expression":
-            commands += self._process_expression_smt(smt[0],
-                                                     indentlevel)
-        elif smt.value == "flow":
-            commands += self._process_flow_smt(smt[0], indentlevel)
-        return commands
+        return [(smt[0], indentlevel)]
 
     # This function takes block statement node which includes
     # "if statement" and "while statement" type children
     # nodes.
     def _process_block_smt(self, smt, indentlevel):
-        commands = ''
         prefix = "\n" + "    "*indentlevel
         if not isinstance(smt, Node):
             self._process_error("Something bad happened while processing " +
@@ -422,22 +667,12 @@ pocket = pocket_class()\n'''
         if len(smt.children) != 1:
             self._process_error("Block statement has no children to process.",
                                 smt.lineno)
-        if smt[0].type == "if_statement":
-            commands += prefix + \
-                        self._process_ifstatement(smt[0], indentlevel)
-        elif smt[0].type == "while_statement":
-            commands += prefix + \
-                        self._process_whilestatement(smt[0],
-                                                     indentlevel)
-        else:
-            self._process_error("Block statement does not have valid child " +
-                                "node.")
-        return commands
+        return [prefix, (smt[0], indentlevel)]
 
     # Say statement function is called from simple statement and
     # passes node to _process_testlist()
-    def _process_say_smt(self, smt):
-        commands = 'print '
+    def _process_say_smt(self, smt, indentlevel):
+        commands = "\n" + "    "*indentlevel + 'print '
         if not isinstance(smt, Node):
             self._process_error("Something bad happened while processing " +
                                 "'say statement'. Unfortunately, that is " +
@@ -445,12 +680,11 @@ pocket = pocket_class()\n'''
         if len(smt.children) == 0:
             self._process_error("Say statement has no children to process.",
                                 smt.lineno)
-        commands += self._process_testlist(smt[0])
-        return commands
+        return [commands] + self._process_testlist(smt[0])
 
     # Exposition statement passes node to _process_testlist
-    def _process_expo_smt(self, smt):
-        commands = 'print '
+    def _process_expo_smt(self, smt, indentlevel):
+        commands = "\n" + "    "*indentlevel + 'print '
         if not isinstance(smt, Node):
             self._process_error("Something bad happened while processing " +
                                 "'exposition statement'. Unfortunately, " +
@@ -458,36 +692,33 @@ pocket = pocket_class()\n'''
         if len(smt.children) == 0:
             self._process_error("Exposition statement has no children to" +
                                 " process.", smt.lineno)
-        commands += self._process_testlist(smt[0])
-        return commands
+        return [commands] + self._process_testlist(smt[0])
 
     # Win statement prints the string if there is and exits the scene
     def _process_win_smt(self, smt, indentlevel):
         prefix = "\n" + "    "*indentlevel
-        commands = ""
+        parts = []
         if not isinstance(smt, Node):
             self._process_error("Something bad happened while processing " +
                                 "'win statement'. Unfortunately, that is " +
                                 "all we know.")
         if len(smt.children) != 0:
-            commands += prefix + "print "\
-                        + self._process_testlist(smt[0])
-        commands += prefix + "exit(0)"
-        return commands
+            parts += [prefix + "print "] + self._process_testlist(smt[0])
+        parts.append(prefix + "exit(0)")
+        return parts
 
     # Lose statement prints the string if there is and exits the scene
     def _process_lose_smt(self, smt, indentlevel):
         prefix = "\n" + "    "*indentlevel
-        commands = ""
+        parts = []
         if not isinstance(smt, Node):
             self._process_error("Something bad happened while processing " +
                                 "'lose statement'. Unfortunately, that is " +
                                 "all we know.")
         if len(smt.children) != 0:
-            commands += prefix + "print "\
-                        + self._process_testlist(smt[0])
-        commands += prefix + "exit(0)"
-        return commands
+            parts += [prefix + "print "] + self._process_testlist(smt[0])
+        parts.append(prefix + "exit(0)")
+        return parts
 
     # Expression statement takes expression statement node. If the value
     # of the node is "testlist", then the function passes it to testlist
@@ -497,7 +728,7 @@ pocket = pocket_class()\n'''
     # that the god variable can only be declared onece.
     def _process_expression_smt(self, smt, indentlevel):
         prefix = '\n' + '    '*indentlevel
-        commands = ''
+        parts = []
         if not isinstance(smt, Node):
             self._process_error("Something bad happened while processing " +
                                 "'expression statement'. Unfortunately," +
@@ -507,29 +738,30 @@ pocket = pocket_class()\n'''
                                 " process.",
                                 smt.lineno)
         elif smt.value == "testlist":
-            commands += prefix + self._process_testlist(smt[0])
+            parts += [prefix] + self._process_testlist(smt[0])
         elif smt.value == "is":
             entry = self.symtab.getWithKey(smt[0].key)
-            if entry and (entry.god or isinstance(entry.scope, str) and
-                          entry.scope.startswith("item")):
-                commands += prefix + "self." + smt[0].value + " = "
+            if entry is None:
+                self._process_error("Something bad happened while " +
+                                    "processing 'expression statement'. " +
+                                    "Unfortunately, that is all we know.",
+                                    smt.lineno)
+            elif entry.slot is not None:
+                parts.append(prefix + "__vars[" + str(entry.slot) + "] = ")
             else:
-                commands += prefix + "self.__namespace['" + \
-                            smt[0].value + "'] = "
-            commands += self._process_testlist(smt[1])
+                parts.append(prefix + "self." + smt[0].value + " = ")
+            parts += self._process_testlist(smt[1])
         elif smt.value == "godis":
-            commands += prefix + "try:"
-            commands += prefix + "    self." + smt[0].value
-            commands += prefix + "except AttributeError:"
-            commands += prefix + "    self." + smt[0].value + " = "
-            commands += self._process_testlist(smt[1])
-        return commands
+            parts.append(prefix + "try:" +
+                         prefix + "    self." + smt[0].value +
+                         prefix + "except AttributeError:" +
+                         prefix + "    self." + smt[0].value + " = ")
+            parts += self._process_testlist(smt[1])
+        return parts
 
     # This function takes flow statement node and passes the node to different
     # flow statements.
     def _process_flow_smt(self, smt, indentlevel):
-        prefix = "\n" + "    "*indentlevel
-        commands = ""
         if not isinstance(smt, Node):
             self._process_error("Something bad happened while processing " +
                                 "'flow statement'. Unfortunately, that is " +
@@ -537,42 +769,37 @@ pocket = pocket_class()\n'''
         if len(smt.children) != 1:
             self._process_error("Flow statement has incorrect number of " +
                                 "children to process.", smt.lineno)
+        return [(smt[0], indentlevel)]
 
-        if smt[0].type == "continue_statement":
-            commands += prefix + self._process_continue(smt[0])
-        elif smt[0].type == "break_statement":
-            commands += prefix + self._process_break(smt[0])
-        elif smt[0].type == "moves_declaration":
-            commands += prefix + self._process_moves_dec(smt[0])
-        elif smt[0].type == "moveto_statement":
-            commands += self._process_moveto(smt[0], indentlevel)
-        else:
-            self._process_error("flow statement has wrong type of child")
-        return commands
+    # This function is called for a node of a kind that is not a statement
+    # where a statement was expected.
+    def _process_bad_smt(self, smt, indentlevel):
+        self._process_error("Unexpected " + smt.type + " where a statement " +
+                            "was expected.", smt.lineno)
 
     # This function takes continue statement node and return "continue"
     # if there is no error.
-    def _process_continue(self, smt):
+    def _process_continue(self, smt, indentlevel):
         if not isinstance(smt, Node):
             self._process_error("Something bad happened while processing " +
                                 "'continue statement'. Unfortunately, that " +
                                 "is all we know.")
-        return "continue"
+        return "\n" + "    "*indentlevel + "continue"
 
     # This function takes break statement node and "return" "break" if
     # there is no error
-    def _process_break(self, smt):
+    def _process_break(self, smt, indentlevel):
         if not isinstance(smt, Node):
             self._process_error("Something bad happened while processing " +
                                 "'break statement'. Unfortunately, that is " +
                                 "all we know.")
-        return "break"
+        return "\n" + "    "*indentlevel + "break"
 
     # This function takes moves_declaration type and produces a direction
     # dictionary whose the key is the direction and the value is the scene
     # id.
-    def _process_moves_dec(self, smt):
-        commands = "direction = {"
+    def _process_moves_dec(self, smt, indentlevel):
+        commands = "\n" + "    "*indentlevel + "direction = {"
         if not isinstance(smt, Node):
             self._process_error("Something bad happened while processing " +
                                 "'moves declaration'. Unfortunately, that " +
@@ -580,7 +807,7 @@ pocket = pocket_class()\n'''
         if len(smt.children) != 1:
             self._process_error("moves declaration has wrong number of " +
                                 "children")
-        elif smt[0].type != "directionlist":
+        elif smt[0].kind != kinds.DIRECTIONLIST:
             self._process_error("moves declaration has wrong type of children")
         else:
             commands += self._process_directionlist(smt[0]) + "}"
@@ -618,7 +845,7 @@ pocket = pocket_class()\n'''
         commands += prefix + "self.cleanup()"
         if len(smt.children) != 1:
             self._process_error("moveto has the wrong number of children")
-        elif smt[0].type != "sceneid":
+        elif smt[0].kind != kinds.SCENEID:
             self._process_error("moveto has wrong kind of child")
         else:
             commands += prefix + "return 's_" + str(smt[0].value)
@@ -643,98 +870,66 @@ pocket = pocket_class()\n'''
         if len(testlist.children) == 0:
             self._process_error("Testlist has no children to process.",
                                 testlist.lineno)
-        tests = testlist.children
-        testcode = []
-        for test in tests:
-            testcode.append(self._process_test(test))
-        return ", ".join(testcode)
-
-    # This function takes test node. Since the only children node of test node
-    # is or_test node, the function passes the node to or_test fuction after
-    # doing the error checking.
+        parts = []
+        for test in testlist.children:
+            if parts:
+                parts.append(", ")
+            parts.append(test)
+        return parts
+
+    # This function takes any node of an expression and passes it to the
+    # function for its kind. The parser does not build nodes for the levels
+    # of the expression grammar that only pass their child up, so a test can
+    # be an or_test, an atom, a number or anything in between.
     def _process_test(self, test):
-        if not isinstance(test, Node) or test.type != "test":
-            self._process_error("Something bad happened while processing " +
-                                "'test'. Unfortunately, that is all we know.")
-        if len(test.children) != 1:
-            self._process_error("'test' has incorrect number of children.",
-                                test.lineno)
-        return self._process_or_test(test[0])
-
-    # This function takes or_test node. The number of children node of
-    # or_test node can only be one or two. If the value of the node is
-    # "or", it indicates an or logic expression. If it is not, it indicates
-    # the children node is an and test node.
+        return self._generate([test])
+
+    # This function is called for a test that is not a node, or a node of a
+    # kind that cannot be part of an expression.
+    def _process_bad_test(self, test):
+        self._process_error("Something bad happened while processing " +
+                            "'test'. Unfortunately, that is all we know.")
+
+    # This function takes or_test node, an or logic expression of its two
+    # children nodes.
     def _process_or_test(self, or_test):
-        if not isinstance(or_test, Node) or or_test.type != "or_test":
-            self._process_error("Something bad happened while processing " +
-                                "'or_test'. Unfortunately, that is all we " +
-                                "know.")
-        if len(or_test.children) not in [1, 2]:
+        if len(or_test.children) != 2:
             self._process_error("'or_test' has incorrect number of children.",
                                 or_test.lineno)
-        if or_test.value == 'or':
-            return '(' + self._process_or_test(or_test[0]) + ') or ' \
-                    + self._process_and_test(or_test[1])
-        else:
-            return self._process_and_test(or_test[0])
+        return ['(', or_test[0], ') or ', or_test[1]]
 
-    # This function takes and_test node. The number of children node of
-    # and_test node can only be one or two. If the value of the node is
-    # "and", it indicates an and logic expression. If it is not, it indicates
-    # a not test node.
+    # This function takes and_test node, an and logic expression of its two
+    # children nodes.
     def _process_and_test(self, and_test):
-        if not isinstance(and_test, Node) or and_test.type != "and_test":
-            self._process_error("Something bad happened while processing " +
-                                "'and_test'. Unfortunately, that is all we " +
-                                "know.")
-        if len(and_test.children) not in [1, 2]:
+        if len(and_test.children) != 2:
             self._process_error("'and_test' has incorrect number of children.",
                                 and_test.lineno)
-        if and_test.value == 'and':
-            return '(' + self._process_and_test(and_test[0]) + \
-                    ') and ' + self._process_not_test(and_test[1])
-        else:
-            return self._process_not_test(and_test[0])
+        return ['(', and_test[0], ') and ', and_test[1]]
 
     # This function takes not test node. The number of its children node
-    # can only be one. If the value of the node is "not", the function
-    # would add "not" to the logic expression and recursively calls the
-    # not_test function. Otherwise, the function passes the children node
-    # to comparison function.
+    # can only be one. The function adds "not" to the logic expression of
+    # its child.
     def _process_not_test(self, not_test):
-        if not isinstance(not_test, Node) or not_test.type != "not_test":
-            self._process_error("Something bad happened while processing " +
-                                "'not_test'. Unfortunately, that is all we " +
-                                "know.")
         if len(not_test.children) != 1:
             self._process_error("'not_test' has incorrect number of children.",
                                 not_test.lineno)
-        if not_test.value == 'not':
-            return 'not ' + self._process_not_test(not_test[0])
-        else:
-            return self._process_comparison(not_test[0])
+        return ['not ', not_test[0]]
 
     # This function takes comparison node. The children nodes of comparison
-    # node are comparison, comparison operator and expression if the
-    # value is "comparison". Otherwise, the children node is expression node.
+    # node are the left side, comparison operator and expression.
     def _process_comparison(self, comparison):
-        if not isinstance(comparison, Node) or comparison.type != "comparison":
-            self._process_error("Something bad happened while processing " +
-                                "'comparison'. Unfortunately, that is all we" +
-                                " know.")
-        if len(comparison.children) not in [1, 3]:
+        if len(comparison.children) != 3:
             self._process_error("'comparison' has incorrect number of " +
                                 "children.", comparison.lineno)
-        if comparison.value == 'comparison':
-            return '(' + self._process_comparison(comparison[0]) + \
-                   ') ' + self._process_comparisonop(comparison[1]) \
-                   + " " + self._process_expression(comparison[2])
-        else:
-            return self._process_expression(comparison[0])
+        return ['(', comparison[0],
+                ') ' + self._process_comparisonop(comparison[1]) + " ",
+                comparison[2]]
 
-    # This function takes comparison operator node.
+    # This function takes comparison operator node. "not =" is the same as
+    # "!=".
     def _process_comparisonop(self, comparisonop):
+        if comparisonop.value == "not":
+            return "!="
         return comparisonop.value
 
     # This function takes while node. If the value of its children node
@@ -743,44 +938,40 @@ pocket = pocket_class()\n'''
     # children node to the _process_suite, adds one to indentlevel and
     # processes the statement.
     def _process_whilestatement(self, smt, indentlevel=1):
-        commands = "while "
-        if smt[0].type != "test":
+        parts = ["while "]
+        if not isinstance(smt[0], Node):
             self._process_error("No test in while loop", smt.lineno)
         else:
-            commands += self._process_test(smt[0]) + ":"
-        if smt[1].type != "suite":
+            parts += [smt[0], ":"]
+        if smt[1].kind != kinds.SUITE:
             self._process_error("No suite in while loop", smt.lineno)
         else:
-            commands += self._process_suite(smt[1], indentlevel+1)
-        return commands
+            parts.append((smt[1], indentlevel+1))
+        return parts
 
     # This function takes statement node with "if" value, or an elif node.
     # Note, because of the embedding structure, we need to process it this
     # way, and the constructions are identical, except "if" vs "elif" token.
     def _process_ifstatement(self, smt, indentlevel):
         prefix = "\n" + "    "*indentlevel
-        commands = prefix + "if "
-        commands += self._process_test(smt[0]) + ":"
-        commands += self._process_suite(smt[1], indentlevel+1)
+        parts = [prefix + "if ", smt[0], ":", (smt[1], indentlevel+1)]
         if smt[2]:
-            commands += self._process_elifstatements(smt[2],
-                                                     indentlevel)
+            parts.append((smt[2], indentlevel))
         if smt[3]:
-            commands += prefix + "else:"
-            commands += self._process_suite(smt[3], indentlevel+1)
-        return commands
+            parts += [prefix + "else:", (smt[3], indentlevel+1)]
+        return parts
 
     # This function takes elifstaments node and iterates through
     # all its children node which is elifstatement node.
     def _process_elifstatements(self, elif_smts, indentlevel):
-        commands = ""
+        parts = []
         for child in elif_smts.children:
-            if child.type != "elif_statement":
+            if child.kind != kinds.ELIF_STATEMENT:
                 self._process_error("Invalid child of elif_statements",
                                     elif_smts.lineno)
             else:
-                commands += self._process_elifstatement(child, indentlevel)
-        return commands
+                parts.append((child, indentlevel))
+        return parts
 
     # This function takes elif statement node. If the children type
     # is test, it passes the node to process_test. Otherwise, it
@@ -788,31 +979,26 @@ pocket = pocket_class()\n'''
     # a simliar structure with while statement.
     def _process_elifstatement(self, smt, indentlevel):
         prefix = "\n" + "    "*indentlevel
-        commands = prefix + "elif "
-        if smt[0].type != "test":
+        parts = [prefix + "elif "]
+        if not isinstance(smt[0], Node):
             self._process_error("Invalid elif tree", smt.lineno)
         else:
-            commands += self._process_test(smt[0]) + ":"
-        if smt[1].type != "suite":
+            parts += [smt[0], ":"]
+        if smt[1].kind != kinds.SUITE:
             self._process_error("Invalid elif tree", smt.lineno)
         else:
-            commands += self._process_suite(smt[1], indentlevel+1)
-        return commands
-
-    # This function takes "expression" node. Expression node
-    # only has arithmetic_expression as its children node. The function
-    # passes the node to the process_arithmetic_expression function.
-    def _process_expression(self, expression):
-        return self._process_arithmetic_expression(expression[0])
+            parts.append((smt[1], indentlevel+1))
+        return parts
 
     # This function takes atom nodes. If the atom node is a leaf node,
     # it could be a string node or an id node. For the string node, the
     # function returns the value. For the id or the godid node, the
-    # function returns "self.__namespace" or "self." If the node is not
-    # a leaf node, the function passes children node to different
-    # functions which deal with test, list, number and boolean.
+    # function returns the slot of a scene variable ("__vars[0]", or
+    # "get_var(__vars[0])" if it may not be set yet, see UNSET_VAR above),
+    # or an attribute ("self.x") for a god variable or a variable of an
+    # item. If the node is not a leaf node, it is a parenthesized test.
     def _process_atom(self, atom):
-        if not isinstance(atom, Node) or atom.type != "atom":
+        if not isinstance(atom, Node) or atom.kind != kinds.ATOM:
             self._process_error("Something bad happened while processing " +
                                 "'atom'. Unfortunately, that is all we " +
                                 "know.")
@@ -824,30 +1010,28 @@ pocket = pocket_class()\n'''
                     self._process_error("Name Error: " + str(atom.value) +
                                         " is not defined.", atom.lineno)
                 else:
+                    # Names of scenes and items, and names that are not
+                    # in the SymTab, are left as they are.
                     entry = self.symtab.getWithKey(atom.key)
-                    if not entry:
+                    scopetype = entry and self.symtab.scopeType(entry.scope)
+                    if scopetype not in ["scene", "item"]:
                         return atom.value
-                    if entry and entry.god:
-                        return "self." + atom.value
-                    else:
-                        return "self.__namespace['" + atom.value + "']"
+                    if entry.slot is not None:
+                        if atom in self.unset_reads:
+                            return "get_var(__vars[" + str(entry.slot) + "])"
+                        return "__vars[" + str(entry.slot) + "]"
+                    return "self." + atom.value
         if len(atom.children) != 1:
             self._process_error("'atom' has incorrect number of " +
                                 "children.", atom.lineno)
         if atom.value == "test":
-            return "(" + self._process_test(atom[0]) + ")"
-        elif atom.value == "list":
-            return self._process_list(atom[0])
-        elif atom.value == "number":
-            return self._process_number(atom[0])
-        elif atom.value == "boolean":
-            return self._process_boolean(atom[0])
+            return ["(", atom[0], ")"]
         else:
             self._process_error("'atom' has unknown child type.", atom.lineno)
 
     # This function processes number nodes.
     def _process_number(self, number):
-        if not isinstance(number, Node) or number.type != "number":
+        if not isinstance(number, Node) or number.kind != kinds.NUMBER:
             self._process_error("Something bad happened while processing " +
                                 "'number'. Unfortunately, that is all we " +
                                 "know.")
@@ -859,7 +1043,7 @@ pocket = pocket_class()\n'''
 
     # This function processes boolean nodes.
     def _process_boolean(self, boolean):
-        if not isinstance(boolean, Node) or boolean.type != "boolean":
+        if not isinstance(boolean, Node) or boolean.kind != kinds.BOOLEAN:
             self._process_error("Something bad happened while processing " +
                                 "'boolean'. Unfortunately, that is all we " +
                                 "know.")
@@ -869,107 +1053,67 @@ pocket = pocket_class()\n'''
             self._process_error("'boolean' has children. It should be " +
                                 "sterile.", boolean.lineno)
 
-    # This function takes arithmetic expressions node. The function
-    # recursively processes the arithmetic expression if the value
-    # of its children node is not term. The arithmetic expression
-    # is composed of arithmetic expression, arithmetic operator and
-    # term.
+    # This function takes arithmetic expressions node. The arithmetic
+    # expression is composed of arithmetic expression, arithmetic operator
+    # and term.
     def _process_arithmetic_expression(self, arith_exp):
-        if not isinstance(arith_exp, Node) or \
-           arith_exp.type != "arithmetic_expression":
-            self._process_error("Something bad happened while processing " +
-                                "'arithmetic_expression'. Unfortunately, " +
-                                "that is all we know.")
-        if len(arith_exp.children) not in [1, 2]:
+        if len(arith_exp.children) != 2:
             self._process_error("'arithmetic_expression' has incorrect " +
                                 "number of children.", arith_exp.lineno)
-        if arith_exp.value == "term":
-            return self._process_term(arith_exp[0])
-        elif arith_exp.value in ['+', '-']:
-            return '(' + \
-                self._process_arithmetic_expression(arith_exp[0]) + \
-                ') ' + arith_exp.value + ' ' + \
-                self._process_term(arith_exp[1])
+        if arith_exp.value in ['+', '-']:
+            return ['(', arith_exp[0], ') ' + arith_exp.value + ' ',
+                    arith_exp[1]]
         else:
             self._process_error("Illegal operation type for " +
                                 "'arithmetic_expression'", arith_exp.lineno)
 
     # This function takes term node. Term node deals with multiple and divide,
-    # which have higher precedence than plus and minus. If the value of
-    # children node is factor, the function passes the node to
-    # _process_factor function.
+    # which have higher precedence than plus and minus.
     def _process_term(self, term):
-        if not isinstance(term, Node) or term.type != "term":
-            self._process_error("Something bad happened while processing " +
-                                "'term'. Unfortunately, " +
-                                "that is all we know.")
-        if len(term.children) not in [1, 2]:
+        if len(term.children) != 2:
             self._process_error("'term' has incorrect " +
                                 "number of children.", term.lineno)
-        if term.value == "factor":
-            return self._process_factor(term[0])
-        elif term.value in ['*', '/', '//']:
-            return '(' + \
-                self._process_term(term[0]) + \
-                ') ' + term.value + ' ' + \
-                self._process_factor(term[1])
+        if term.value in ['*', '/', '//']:
+            return ['(', term[0], ') ' + term.value + ' ', term[1]]
         else:
             self._process_error("Illegal operation type for " +
                                 "'term'", term.lineno)
 
-    # This function takes factor node. If the value of factor is power,
-    # the function passes the node to process_power function. Otherwise,
-    # the value of factor should fall in plus and minus.
+    # This function takes factor node. The value of factor should fall in
+    # plus and minus.
     def _process_factor(self, factor):
-        if not isinstance(factor, Node) or factor.type != "factor":
-            self._process_error("Something bad happened while processing " +
-                                "'factor'. Unfortunately, " +
-                                "that is all we know.")
         if len(factor.children) != 1:
             self._process_error("'factor' has incorrect " +
                                 "number of children.", factor.lineno)
-        if factor.value == "power":
-            return self._process_power(factor[0])
-        elif factor.value in ['+', '-']:
-            return '(' + factor.value + \
-                self._process_factor(factor[0]) + ')'
+        if factor.value in ['+', '-']:
+            return ['(' + factor.value, factor[0], ')']
         else:
             self._process_error("Illegal operation type for " +
                                 "'factor'", factor.lineno)
 
-    # This function takes power node. If the value of the power is "atom",
-    # the function passes the children node to function _process_atom. If
-    # the value of the power is "trailer", the function then processes
-    # the value type of its first child. If the value type is id, the function
-    # just passes. If the value type is poceket or otherwise (for narratr it
-    # could only be list), the function passes nodes to process_pocket or
-    # process_list functions.
+    # This function takes power node, an atom followed by trailers. The
+    # function processes the value type of its first child. If the value
+    # type is id, the function just passes. If the value type is poceket or
+    # otherwise (for narratr it could only be list), the function passes
+    # nodes to process_pocket or process_list functions.
     def _process_power(self, power):
-        if not isinstance(power, Node) or power.type != "power":
-            self._process_error("Something bad happened while processing " +
-                                "'power'. Unfortunately, " +
-                                "that is all we know.")
-        if power.value == "atom":
-            return self._process_atom(power[0])
-        elif power.value == "trailer":
-            if power[0].v_type == "id":
-                if power[0].value in ["str", "int", "float"]:
-                    pass
-                elif not self.symtab.get(power[0].value, "GLOBAL"):
-                    if power[0].value == "pocket":
-                        return self._process_pocket(power)
-            atom = self._process_atom(power[0])
-            trailers = ''
-            for trailer in power.children[1:]:
-                trailers += self._process_trailer(trailer)
-            return atom + trailers
-        else:
-            self._process_error("Illegal operation type for " +
-                                "'power'", power.lineno)
+        if len(power.children) < 2:
+            self._process_error("'power' has incorrect " +
+                                "number of children.", power.lineno)
+        if power[0].v_type == "id":
+            if power[0].value in ["str", "int", "float"]:
+                pass
+            elif not self.symtab.resolve(power[0].value, "GLOBAL"):
+                if power[0].value == "pocket":
+                    return self._process_pocket(power)
+        parts = [power[0]]
+        for trailer in power.children[1:]:
+            parts += self._process_trailer(trailer)
+        return parts
 
     # This function processes trailers.
     def _process_trailer(self, trailer):
-        if not isinstance(trailer, Node) or trailer.type != "trailer":
+        if not isinstance(trailer, Node) or trailer.kind != kinds.TRAILER:
             self._process_error("Something bad happened while processing " +
                                 "'trailer'. Unfortunately, " +
                                 "that is all we know.")
@@ -977,7 +1121,7 @@ pocket = pocket_class()\n'''
             self._process_error("'trailer' has incorrect " +
                                 "number of children.", trailer.lineno)
         if trailer.value == "dot":
-            return "." + str(trailer[0])
+            return ["." + str(trailer[0])]
         elif trailer.value == "calllist":
             return self._process_calllist(trailer[0])
         else:
@@ -988,7 +1132,7 @@ pocket = pocket_class()\n'''
     # "args", the function passes its children node to process_args
     # function.
     def _process_calllist(self, calllist):
-        if not isinstance(calllist, Node) or calllist.type != "calllist":
+        if not isinstance(calllist, Node) or calllist.kind != kinds.CALLLIST:
             self._process_error("Something bad happened while processing " +
                                 "'calllist'. Unfortunately, " +
                                 "that is all we know.")
@@ -996,9 +1140,9 @@ pocket = pocket_class()\n'''
             self._process_error("'calllist' has incorrect " +
                                 "number of children.", calllist.lineno)
         if not calllist.value:
-            return '()'
+            return ['()']
         elif calllist.value == 'args':
-            return '(' + self._process_args(calllist[0]) + ')'
+            return ['('] + self._process_args(calllist[0]) + [')']
         else:
             self._process_error("Illegal value type for 'calllist'",
                                 calllist.lineno)
@@ -1008,7 +1152,7 @@ pocket = pocket_class()\n'''
     # process_expression. Otherwise, it iterates through all
     # the expression nodes of its children node.
     def _process_args(self, args):
-        if not isinstance(args, Node) or args.type != "args":
+        if not isinstance(args, Node) or args.kind != kinds.ARGS:
             self._process_error("Something bad happened while processing " +
                                 "'args'. Unfortunately, " +
                                 "that is all we know.")
@@ -1016,12 +1160,14 @@ pocket = pocket_class()\n'''
             self._process_error("'args' has incorrect " +
                                 "number of children.", args.lineno)
         if args.value == "expression":
-            return self._process_expression(args[0])
+            return [args[0]]
         elif args.value == 'args':
-            argscode = []
+            parts = []
             for expression in args.children:
-                argscode.append(self._process_expression(expression))
-            return ", ".join(argscode)
+                if parts:
+                    parts.append(", ")
+                parts.append(expression)
+            return parts
         else:
             self._process_error("Illegal value type for 'args'",
                                 args.lineno)
@@ -1029,23 +1175,19 @@ pocket = pocket_class()\n'''
     # This function processes list node for list declaration and plus
     # arithmetic operation.
     def _process_list(self, nlist):
-        commands = ''
-        if not isinstance(nlist, Node) or nlist.type != "list":
+        if not isinstance(nlist, Node) or nlist.kind != kinds.LIST:
             self._process_error("Something bad happened while processing " +
                                 "'list'. Unfortunately, " +
                                 "that is all we know.")
         if len(nlist.children) == 0:
             return "[]"
         else:
-            commands += '['
-            commands += self._process_testlist(nlist[0])
-            commands += ']'
-            return commands
+            return ['['] + self._process_testlist(nlist[0]) + [']']
 
     # This function takes pocket node and deals with the pocket
     # as list in python.
     def _process_pocket(self, pocket_node):
-        commands = ""
+        parts = []
         if len(pocket_node.children) != 3:
             self._process_error("pocket has wrong number of children",
                                 pocket_node.lineno)
@@ -1056,29 +1198,29 @@ pocket = pocket_class()\n'''
             self._process_error("no method specified for pocket",
                                 pocket_node.lineno)
         if pocket_node[1].children[0] == "add":
-            commands += "pocket.add"
-            commands += self._process_trailer(pocket_node[2])
+            parts.append("pocket.add")
+            parts += self._process_trailer(pocket_node[2])
         elif pocket_node[1].children[0] == "get":
-            commands += "pocket.get"
-            commands += self._process_trailer(pocket_node[2])
+            parts.append("pocket.get")
+            parts += self._process_trailer(pocket_node[2])
         elif pocket_node[1].children[0] == "remove":
-            commands += "pocket.remove"
-            commands += self._process_trailer(pocket_node[2])
+            parts.append("pocket.remove")
+            parts += self._process_trailer(pocket_node[2])
         elif pocket_node[1].children[0] == "has":
-            commands += "pocket.has"
-            commands += self._process_trailer(pocket_node[2])
+            parts.append("pocket.has")
+            parts += self._process_trailer(pocket_node[2])
         elif pocket_node[1].children[0] == "update":
-            commands += "pocket.update"
-            commands += self._process_trailer(pocket_node[2])
+            parts.append("pocket.update")
+            parts += self._process_trailer(pocket_node[2])
         else:
             self._process_error("invalid method for pocket",
                                 pocket_node.lineno)
-        return commands
+        return parts
 
     # This function takes id node which is recognized as list.
     # It interprets and implements the list operations in Python.
     def _process_list_functions(self, nlist):
-        commands = ""
+        parts = []
         if len(nlist.children) != 3:
             self._process_error("list has wrong number of children",
                                 nlist.lineno)
@@ -1089,35 +1231,91 @@ pocket = pocket_class()\n'''
             self._process_error("no method sepcified for list",
                                 nlist.lineno)
         if nlist[1].children[0] == "add":
-            commands += nlist[0].value
-            commands += ".append"
-            commands += self._process_trailer(nlist[2])
+            parts.append(nlist[0].value)
+            parts.append(".append")
+            parts += self._process_trailer(nlist[2])
         elif nlist[1].children[0] == "get":
-            commands += nlist[0].value
-            commands += ".get"
-            commands += self._process_trailer(nlist[2])
+            parts.append(nlist[0].value)
+            parts.append(".get")
+            parts += self._process_trailer(nlist[2])
         elif nlist[1].children[0] == "remove":
-            commands += nlist[0].value
-            commands += ".remove"
-            commands += self._process_trailer(nlist[2])
+            parts.append(nlist[0].value)
+            parts.append(".remove")
+            parts += self._process_trailer(nlist[2])
         else:
             self._process_error("invalid method for list",
                                 nlist.lineno)
-        return commands
+        return parts
 
     # This function processes error in code generator.
     def _process_error(self, error, lineno=0):
         if lineno != 0:
-            stderr.write("ERROR: Line " + str(lineno) + ": " + str(error) +
+            self._report("ERROR: Line " + str(lineno) + ": " + str(error) +
                          "\n")
         else:
-            stderr.write("ERROR: " + str(error) + "\n")
+            self._report("ERROR: " + str(error) + "\n")
         exit(1)
 
-    # This function processes warning in code generator.
+    # This function processes warning in code generator. Warnings are also
+    # kept in self.warnings, so that the compile cache can replay them.
     def _process_warning(self, warning, lineno=0):
         if lineno != 0:
-            stderr.write("WARNING: Line " + str(lineno) + ": " + str(warning) +
-                         "\n")
+            message = "WARNING: Line " + str(lineno) + ": " + str(warning) + \
+                "\n"
         else:
-            stderr.write("WARNING: " + str(warning) + "\n")
+            message = "WARNING: " + str(warning) + "\n"
+        self.warnings.append(message)
+        self._report(message)
+
+    # This function writes out an error or a warning.
+    def _report(self, message):
+        stderr.write(message)
+
+
+# Parallel code generation (see CodeGen._add_generated()). Every process of
+# the pool gets the blocks of the program and the symbol table once, when it
+# starts. Where processes are forked, they share them with the compiler
+# rather than having them pickled, so a task is only a list of (block
+# index, key) pairs and its result is the generated code.
+_worker = None
+
+
+class _ChunkGen(CodeGen):
+    """A code generator that keeps the errors and warnings it reports, to be
+    reported by the compiler instead."""
+    def __init__(self, blocks, symtab):
+        CodeGen.__init__(self)
+        self.blocks = blocks
+        self.symtab = symtab
+        self.messages = []
+
+    def _report(self, message):
+        self.messages.append(message)
+
+
+def _init_worker(blocks, symtab):
+    global _worker
+    _worker = _ChunkGen(blocks, symtab)
+
+
+# This generates the scenes and items of a chunk, as CodeGen.process() does,
+# and returns them as (kind, name, code) triples with the warnings and
+# messages reported and whether an error stopped the chunk.
+def _generate_chunk(chunk):
+    c = _worker
+    c.scene_nums = []
+    c.item_names = []
+    c.warnings = []
+    c.messages = []
+    generated = []
+    try:
+        for index, key in chunk:
+            s_i = c.blocks[index][key]
+            if s_i.kind == kinds.SCENE_BLOCK:
+                generated.append((s_i.kind, key, c._scene_gen(s_i, key)))
+            elif s_i.kind == kinds.ITEM_BLOCK:
+                code = c._item_gen(s_i, key)
+                generated.append((s_i.kind, c.item_names[-1], code))
+    except SystemExit:
+        return generated, c.warnings, c.messages, True
+    return generated, c.warnings, c.messages, False
@@ -0,0 +1,151 @@
+# -----------------------------------------------------------------------------
+# narrtr: compilestats.py
+# This file defines the per-phase timings and counters reported by
+# narratr.py --profile.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+import contextlib
+import json
+import os
+import time
+from node import Node
+
+# The phases of a compile, in the order they are reported. Lexing happens on
+# demand while parsing, so its time is measured per token and taken out of
+# the parse time. The parse time includes building the SymTab.
+PHASES = ["read", "lex", "parse", "codegen", "write"]
+
+
+class CompileProfile:
+    """Wall and CPU time per compiler phase, and counters, for one compile.
+
+    Times are in seconds. CPU time is the time.clock() of this process, so it
+    does not include time spent waiting on the disk."""
+    def __init__(self, source):
+        self.source = source
+        self.wall = {}
+        self.cpu = {}
+        self.counts = {}
+
+    def add(self, phase, wall, cpu):
+        self.wall[phase] = self.wall.get(phase, 0.0) + wall
+        self.cpu[phase] = self.cpu.get(phase, 0.0) + cpu
+
+    @contextlib.contextmanager
+    def phase(self, phase):
+        """Time the body of a with statement as part of phase."""
+        wall, cpu = time.time(), time.clock()
+        try:
+            yield
+        finally:
+            self.add(phase, time.time() - wall, time.clock() - cpu)
+
+    def timed_lexer(self, lexer):
+        """Wrap lexer so that its tokens are counted and timed."""
+        return _TimedLexer(lexer, self)
+
+    def count_results(self, ast, symtab, outputfile=None):
+        """Count the AST nodes, SymTab entries and generated bytes."""
+        self.counts["ast_nodes"] = count_nodes(ast)
+        types = [entry.symboltype for entry in symtab.entries()]
+        self.counts["symtab_entries"] = len(types)
+        self.counts["scenes"] = types.count("scene")
+        self.counts["items"] = types.count("item")
+        self.counts["variables"] = len(types) - self.counts["scenes"] - \
+            self.counts["items"]
+        if outputfile is not None:
+            self.counts["generated_bytes"] = os.path.getsize(outputfile)
+
+    def as_dict(self):
+        phases = [phase for phase in PHASES if phase in self.wall]
+        return {"source": self.source,
+                "phases": dict((phase, {"wall": self.wall[phase],
+                                        "cpu": self.cpu[phase]})
+                               for phase in phases),
+                "total": {"wall": sum(self.wall.values()),
+                          "cpu": sum(self.cpu.values())},
+                "counts": self.counts}
+
+    def report(self, fmt="text"):
+        """Return the profile as a table, or as one line of JSON."""
+        if fmt == "json":
+            return json.dumps(self.as_dict(), sort_keys=True)
+        lines = ["profile: " + self.source,
+                 "%-10s %12s %12s" % ("phase", "wall (ms)", "cpu (ms)")]
+        for phase in PHASES:
+            if phase in self.wall:
+                lines.append("%-10s %12.3f %12.3f" % (
+                    phase, self.wall[phase] * 1000, self.cpu[phase] * 1000))
+        lines.append("%-10s %12.3f %12.3f" % (
+            "total", sum(self.wall.values()) * 1000,
+            sum(self.cpu.values()) * 1000))
+        for name in sorted(self.counts):
+            lines.append("%-23s %12d" % (name.replace("_", " "),
+                                         self.counts[name]))
+        return "\n".join(lines)
+
+
+# This times the body of a with statement as part of phase if there is a
+# profile, and does nothing otherwise.
+def timed(profile, phase):
+    if profile is None:
+        return _untimed()
+    return profile.phase(phase)
+
+
+@contextlib.contextmanager
+def _untimed():
+    yield
+
+
+# This counts the Node instances in the tree below (and including) node. The
+# blocks node keeps its scenes and items in dictionaries. The nodes left to
+# count are kept on a stack, so a tree of any depth is counted.
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        node = pop()
+        if isinstance(node, Node):
+            count += 1
+            extend(node.children)
+        elif isinstance(node, dict):
+            extend(node.values())
+    return count
+
+
+# A stand-in for a LexerForNarratr that counts and times every token it
+# hands to the parser. The parser asks for tokens while it is being timed,
+# so the time spent lexing is moved from the parse phase to the lex phase.
+class _TimedLexer:
+    def __init__(self, lexer, profile):
+        self.lexer = lexer
+        self.profile = profile
+        profile.counts["tokens"] = 0
+
+    def input(self, string_to_scan):
+        self.lexer.input(string_to_scan)
+
+    def token(self):
+        wall, cpu = time.time(), time.clock()
+        token = self.lexer.token()
+        wall, cpu = time.time() - wall, time.clock() - cpu
+        self.profile.add("lex", wall, cpu)
+        self.profile.add("parse", -wall, -cpu)
+        if token is not None:
+            self.profile.counts["tokens"] += 1
+        return token
+
+    def __getattr__(self, name):
+        return getattr(self.lexer, name)
@@ -0,0 +1,47 @@
+# -----------------------------------------------------------------------------
+# narrtr: emitter.py
+# This file defines the buffer the code generator writes generated code to.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+INDENT = "    "
+
+# The start of a line at each of the common indentation levels.
+_PREFIXES = ["\n" + INDENT * level for level in range(16)]
+
+
+class Emitter(object):
+    """Generated code as a list of pieces that is joined once, at the end.
+
+    line(indentlevel, text) starts a new line: a newline, indentlevel
+    levels of indentation and text. write(code) adds code as it is, for
+    code that brings its own newlines (such as the code CodeGen._generate
+    makes for a block, which can write straight into an emitter).
+    getvalue() returns all the code. Nothing is copied until then, so
+    building a large scene or program takes time in proportion to its
+    size."""
+    __slots__ = ("pieces",)
+
+    def __init__(self):
+        self.pieces = []
+
+    def line(self, indentlevel, text=""):
+        if indentlevel < len(_PREFIXES):
+            self.pieces.append(_PREFIXES[indentlevel])
+        else:
+            self.pieces.append("\n" + INDENT * indentlevel)
+        self.pieces.append(text)
+
+    def write(self, code):
+        self.pieces.append(code)
+
+    def getvalue(self):
+        return "".join(self.pieces)
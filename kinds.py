@@ -0,0 +1,102 @@
+# -----------------------------------------------------------------------------
+# narrtr: kinds.py
+# This file defines the kinds of nodes in the narratr AST.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# Every node has a kind, a small integer that says what the node is. The
+# parser and the code generator compare and dispatch on kinds. The name of
+# a kind is the string the node used to have as its type (and still has,
+# as Node.type): NAMES[kind] is the name of kind and code(name) is its
+# kind.
+
+# Blocks.
+PROGRAM = 0
+BLOCKS = 1
+SCENE_BLOCK = 2
+ITEM_BLOCK = 3
+START_STATE = 4
+SETUP_BLOCK = 5
+ACTION_BLOCK = 6
+CLEANUP_BLOCK = 7
+ITEMPARAMS = 8
+FPARAMS = 9
+
+# Statements.
+SUITE = 10
+STATEMENTS = 11
+STATEMENT = 12
+SIMPLE_STATEMENT = 13
+BLOCK_STATEMENT = 14
+SAY_STATEMENT = 15
+EXPOSITION = 16
+WIN_STATEMENT = 17
+LOSE_STATEMENT = 18
+FLOW_STATEMENT = 19
+EXPRESSION_STATEMENT = 20
+BREAK_STATEMENT = 21
+CONTINUE_STATEMENT = 22
+MOVES_DECLARATION = 23
+DIRECTIONLIST = 24
+DIRECTION = 25
+SCENEID = 26
+MOVETO_STATEMENT = 27
+IF_STATEMENT = 28
+ELIF_STATEMENTS = 29
+ELIF_STATEMENT = 30
+WHILE_STATEMENT = 31
+ID = 32
+GOD_ID = 33
+
+# Expressions.
+TESTLIST = 34
+OR_TEST = 35
+AND_TEST = 36
+NOT_TEST = 37
+COMPARISON = 38
+COMPARISON_OP = 39
+ARITHMETIC_EXPRESSION = 40
+TERM = 41
+FACTOR = 42
+POWER = 43
+ATOM = 44
+TRAILER = 45
+CALLLIST = 46
+ARGS = 47
+LIST = 48
+NUMBER = 49
+BOOLEAN = 50
+
+NAMES = ("program", "blocks", "scene_block", "item_block", "start_state",
+         "setup_block", "action_block", "cleanup_block", "itemparams",
+         "fparams", "suite", "statements", "statement", "simple_statement",
+         "block_statement", "say_statement", "exposition", "win_statement",
+         "lose_statement", "flow_statement", "expression_statement",
+         "break_statement", "continue_statement", "moves_declaration",
+         "directionlist", "direction", "sceneid", "moveto_statement",
+         "if_statement", "elif_statements", "elif_statement",
+         "while_statement", "id", "god_id", "testlist", "or_test",
+         "and_test", "not_test", "comparison", "comparison_op",
+         "arithmetic_expression", "term", "factor", "power", "atom",
+         "trailer", "calllist", "args", "list", "number", "boolean")
+
+CODES = dict((name, kind) for kind, name in enumerate(NAMES))
+
+
+def code(name):
+    """Return the kind with the given name.
+
+    The kinds are all defined above, once; a name that is not one of them
+    (a misspelt node type, say) is a ValueError rather than a new kind."""
+    kind = CODES.get(name)
+    if kind is None:
+        raise ValueError("There is no node kind named " + repr(name) + ".")
+    return kind
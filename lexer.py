@@ -15,10 +15,27 @@
 #
 # -----------------------------------------------------------------------------
 
-from sys import stderr, exit
+import collections
+import copy
+import os
 import re
+from hashlib import md5
+from sys import stderr, exit
 import ply.lex as lex
 
+# The compiled lexer state is shipped with the compiler in lextab.py (written
+# by PLY's writetab()), so that building a lexer does not have to validate
+# the rules and form the master regular expression again. Run this file as a
+# script to rebuild lextab.py after changing any of the token rules.
+try:
+    import lextab
+except ImportError:
+    lextab = None
+
+# Lexers already built in this process, keyed by lexer class. New instances
+# are cloned from these and have their rule functions rebound to themselves.
+_prototypes = {}
+
 
 class LexerForNarratr:
 
@@ -69,12 +86,81 @@ class LexerForNarratr:
         list(reserved.values())
 
     # The constructor here builds the lexer. The re.MULTILINE flag is critical
-    # in matching indents.
+    # in matching indents. Any explicit PLY options fall back to the plain
+    # lex() behaviour; otherwise the lexer is cloned from a prototype.
     def __init__(self, **kwargs):
-        self.lexer = lex.lex(module=self, reflags=re.MULTILINE, **kwargs)
+        if kwargs:
+            self.lexer = lex.lex(module=self, reflags=re.MULTILINE, **kwargs)
+        else:
+            self.lexer = self._clone(self._prototype())
+        self.reset()
+
+    # This puts the lexer back in the state of a new instance: no input, line
+    # 1, and no indentation. It must be called before scanning another
+    # program with the same instance.
+    def reset(self):
         self.indentstack = [0]
-        self.dedenting = False
+        self.pending = collections.deque()
         self.lasttoken = None
+        self.lexer.input("")
+        self.lexer.lineno = 1
+        self.lexer.lexstatestack = []
+        self.lexer.begin("INITIAL")
+
+    # This returns the prototype lexer for this class, building it the first
+    # time it is needed in a process. The shipped lextab is used only if it
+    # was generated from the current token rules.
+    def _prototype(self):
+        prototype = _prototypes.get(self.__class__)
+        if prototype is None:
+            if getattr(lextab, "_lexsignature", None) == self._signature():
+                prototype = lex.lex(module=self, reflags=re.MULTILINE,
+                                    optimize=1, lextab=lextab)
+            else:
+                prototype = lex.lex(module=self, reflags=re.MULTILINE)
+            _prototypes[self.__class__] = prototype
+        return prototype
+
+    # This copies a prototype lexer and rebinds its rule functions, which
+    # are bound methods of the prototype's owner, to this instance. It does
+    # the job of Lexer.clone(self), which in PLY 3.4 leaves the current
+    # master regex and error function bound to the old owner.
+    def _clone(self, prototype):
+        lexer = copy.copy(prototype)
+        lexer.lexstatere = {}
+        for state, master in prototype.lexstatere.items():
+            lexer.lexstatere[state] = [
+                (regex, [(getattr(self, f[0].__name__), f[1])
+                         if f and f[0] else f for f in findex])
+                for regex, findex in master]
+        lexer.lexstateerrorf = {}
+        for state, errorf in prototype.lexstateerrorf.items():
+            if errorf:
+                errorf = getattr(self, errorf.__name__)
+            lexer.lexstateerrorf[state] = errorf
+        lexer.lexmodule = self
+        lexer.begin(prototype.lexstate)
+        return lexer
+
+    # This computes a signature over everything lextab.py is generated from:
+    # the token list, the regex flags and the rules, with function rules in
+    # the order PLY adds them to the master regular expression.
+    @classmethod
+    def _signature(cls):
+        strings = []
+        funcs = []
+        for name in dir(cls):
+            if not name.startswith("t_"):
+                continue
+            rule = getattr(cls, name)
+            if isinstance(rule, str):
+                strings.append((name, rule))
+            elif callable(rule):
+                line = rule.im_func.func_code.co_firstlineno
+                funcs.append((line, name, rule.__doc__))
+        funcs = [(name, doc) for line, name, doc in sorted(funcs)]
+        return md5(repr((sorted(cls.tokens), re.MULTILINE, sorted(strings),
+                         funcs))).hexdigest()
 
     # Regular expression rules for simple tokens are specified here.
     t_LCURLY = r'{'
@@ -160,7 +246,9 @@ class LexerForNarratr:
     # All DEDENTs are not generated here. Only the DEDENTs on lines beginning
     # with a white space are geenrated here.
     # INDENTs and DEDENTs are generated by maintaining state with the help of
-    # a stack.
+    # a stack. When several levels close at once, the first DEDENT is
+    # returned and the rest are queued for token(). If the line ends up
+    # between two levels, it opens a new level after the DEDENTs.
     def t_INDENT(self, t):
         r'^[ \t\r\f\v]+'
         spaces = len(t.value)
@@ -173,45 +261,37 @@ class LexerForNarratr:
         else:
             t.value = self.indentstack.pop()
             t.type = 'DEDENT'
-            t.lexer.lexpos -= spaces
+            while spaces < self.indentstack[-1]:
+                self._queue(t, 'DEDENT', self.indentstack.pop())
+            if spaces > self.indentstack[-1]:
+                self.indentstack.append(spaces)
+                self._queue(t, 'INDENT', spaces)
             return t
 
     # This rule matches new lines and increments the line count.
-    # If the indent level is lowered in a susequent line, this function also
-    # generates an appropriate number of DEDENT tokens.
-    # A state variable self.dedenting is used to maintain if the lexer is
-    # currently in dedenting mode. This function is repeatedly encountered
-    # until the stack is fully dendented. This is because there is no white
-    # space at the beginning of the line.
+    # If the next line starts without white space (or a comment), every open
+    # indent level is closed: a DEDENT token is queued for each level, after
+    # the NEWLINE token, all with the position of the NEWLINE.
     def t_NEWLINE(self, t):
-        r'\n+[^ \t\r\f\v%]?'
-        if t.value[-1] == '\n':
-            t.value = len(t.value)
-            t.lexer.lineno += t.value
-            return t
-        else:
-            if self.dedenting:
-                if self.indentstack[-1] > 0:
-                    t.lexer.lexpos -= len(t.value)
-                    t.value = self.indentstack.pop()
-                    t.type = 'DEDENT'
-                    return t
-                else:
-                    self.dedenting = False
-                    t.lexer.lineno += len(t.value) - 1
-                    t.lexer.lexpos -= 1
-                    pass
-            else:
-                if self.indentstack[-1] > 0:
-                    self.dedenting = True
-                    t.lexer.lexpos -= len(t.value)
-                    t.value = len(t.value) - 1
-                    return t
-                else:
-                    t.value = len(t.value) - 1
-                    t.lexer.lineno += t.value
-                    t.lexer.lexpos -= 1
-                    return t
+        r'\n+'
+        t.value = len(t.value)
+        t.lexer.lineno += t.value
+        next_char = t.lexer.lexdata[t.lexer.lexpos:t.lexer.lexpos + 1]
+        if next_char and next_char not in " \t\r\f\v%":
+            while self.indentstack[-1] > 0:
+                self._queue(t, 'DEDENT', self.indentstack.pop())
+        return t
+
+    # This queues a token of the given type and value, positioned like the
+    # token t, to be returned by token() after t.
+    def _queue(self, t, token_type, value):
+        token = lex.LexToken()
+        token.type = token_type
+        token.value = value
+        token.lineno = t.lineno
+        token.lexpos = t.lexpos
+        token.lexer = t.lexer
+        self.pending.append(token)
 
     # All white spaces not at the beginning of a logical line are ignored.
     def t_ignore_whitespace(self, t):
@@ -231,9 +311,13 @@ class LexerForNarratr:
     def input(self, string_to_scan):
         self.lexer.input(string_to_scan)
 
-    # This method provides an interface to the lexer's token() function
+    # This method provides an interface to the lexer's token() function.
+    # Tokens queued by the rules above are returned first.
     def token(self):
-        self.lasttoken = self.lexer.token()
+        if self.pending:
+            self.lasttoken = self.pending.popleft()
+        else:
+            self.lasttoken = self.lexer.token()
         return self.lasttoken
 
     # This method prints all tokens scanned by the lexer. This method should be
@@ -244,3 +328,16 @@ class LexerForNarratr:
         while nextToken:
             print nextToken
             nextToken = self.token()
+
+
+def build_lextab(outputdir=os.path.dirname(os.path.abspath(__file__))):
+    """Regenerate the shipped lextab.py for the current token rules."""
+    owner = LexerForNarratr()
+    lexer = lex.lex(module=owner, reflags=re.MULTILINE)
+    lexer.writetab("lextab", outputdir)
+    with open(os.path.join(outputdir, "lextab.py"), "a") as f:
+        f.write("_lexsignature = %r\n" % owner._signature())
+
+
+if __name__ == "__main__":
+    build_lextab()
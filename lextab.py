@@ -0,0 +1,10 @@
+# lextab.py. This file automatically created by PLY (version 3.4). Don't edit!
+_tabversion   = '3.4'
+_lextokens    = {'DEDENT': 1, 'NOTEQUALS': 1, 'ELIF': 1, 'LESS': 1, 'SETUP': 1, 'EXPOSITION': 1, 'SCENEID': 1, 'LCURLY': 1, 'WHILE': 1, 'CLEANUP': 1, 'TRUE': 1, 'MINUS': 1, 'DOT': 1, 'DIVIDE': 1, 'RSQUARE': 1, 'MOVETO': 1, 'RCURLY': 1, 'RPARAN': 1, 'NEWLINE': 1, 'SCENE': 1, 'INTEGERDIVIDE': 1, 'SAY': 1, 'PLUS': 1, 'ACTION': 1, 'COLON': 1, 'MOVES': 1, 'LEFT': 1, 'STRING': 1, 'GOD': 1, 'IS': 1, 'EQUALS': 1, 'TIMES': 1, 'START': 1, 'GREATEREQUALS': 1, 'LSQUARE': 1, 'INTEGER': 1, 'FALSE': 1, 'ELSE': 1, 'ID': 1, 'IF': 1, 'AND': 1, 'DOWN': 1, 'LPARAN': 1, 'RIGHT': 1, 'INDENT': 1, 'GREATER': 1, 'WIN': 1, 'LESSEQUALS': 1, 'FLOAT': 1, 'UP': 1, 'BREAK': 1, 'ITEM': 1, 'CONTINUE': 1, 'LOSE': 1, 'NOT': 1, 'COMMA': 1, 'OR': 1}
+_lexreflags   = 8
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_comments>[ \\t\\r\\f\\v]*%[^\\n]*\\n)|(?P<t_ID>[a-zA-Z_][a-zA-Z_0-9]*)|(?P<t_FLOAT>(\\+|-)?([0-9]*\\.[0-9]+)|([0-9]+\\.[0-9]*))|(?P<t_INTEGER>(\\+|-)?(0|[1-9][0-9]*))|(?P<t_DOT>\\.)|(?P<t_SCENEID>\\$[0-9]+)|(?P<t_STRING>\\"(?:\\\\.|[^\\"\\\\])*\\")|(?P<t_INDENT>^[ \\t\\r\\f\\v]+)|(?P<t_NEWLINE>\\n+)|(?P<t_ignore_whitespace>[ \\t\\r\\f\\v]+)|(?P<t_EQUALS>==|=)|(?P<t_RSQUARE>\\])|(?P<t_PLUS>\\+)|(?P<t_NOTEQUALS>!=)|(?P<t_LESSEQUALS><=)|(?P<t_LSQUARE>\\[)|(?P<t_INTEGERDIVIDE>//)|(?P<t_GREATEREQUALS>>=)|(?P<t_RPARAN>\\))|(?P<t_TIMES>\\*)|(?P<t_LPARAN>\\()|(?P<t_COLON>:)|(?P<t_COMMA>,)|(?P<t_DIVIDE>/)|(?P<t_MINUS>-)|(?P<t_GREATER>>)|(?P<t_RCURLY>})|(?P<t_LESS><)|(?P<t_LCURLY>{)', [None, ('t_comments', 'comments'), ('t_ID', 'ID'), ('t_FLOAT', 'FLOAT'), None, None, None, ('t_INTEGER', 'INTEGER'), None, None, ('t_DOT', 'DOT'), ('t_SCENEID', 'SCENEID'), ('t_STRING', 'STRING'), ('t_INDENT', 'INDENT'), ('t_NEWLINE', 'NEWLINE'), ('t_ignore_whitespace', 'ignore_whitespace'), (None, 'EQUALS'), (None, 'RSQUARE'), (None, 'PLUS'), (None, 'NOTEQUALS'), (None, 'LESSEQUALS'), (None, 'LSQUARE'), (None, 'INTEGERDIVIDE'), (None, 'GREATEREQUALS'), (None, 'RPARAN'), (None, 'TIMES'), (None, 'LPARAN'), (None, 'COLON'), (None, 'COMMA'), (None, 'DIVIDE'), (None, 'MINUS'), (None, 'GREATER'), (None, 'RCURLY'), (None, 'LESS'), (None, 'LCURLY')])]}
+_lexstateignore = {'INITIAL': ''}
+_lexstateerrorf = {'INITIAL': 't_error'}
+_lexsignature = '7ee3a53f9faf641a0246702c1cb6c017'
@@ -16,68 +16,131 @@
 # -----------------------------------------------------------------------------
 
 import sys
+import os
+import time
+import contextlib
+import tempfile
+import traceback
+import multiprocessing
 import parser
+from cache import CompileCache, DEFAULT_SIZE, default_dir
 from codegen import CodeGen
+from astgen import ASTCodeGen
+from bytecode import compile_bytecode, write_bytecode
+from compilestats import CompileProfile, timed
 from node import Node
 import argparse
 
+# Whether to print each step of the compile. main() sets it from -v.
+verbose = False
 
+
+# This prints the AST, a node per line, indented by its depth. Anything
+# in the tree that is not a node (the None of an if statement without an
+# else) is printed as "[Something bad happened]". The nodes left to print
+# are kept on a stack rather than by recursion, so a deeply nested game
+# cannot reach the recursion limit.
 def print_tree(node, indent):
-    prefix = "    " * indent
-    try:
-        val = ""
-        if node.value is not None:
-            val += " (value: " + str(node.value) + ")"
-        if node.v_type is not None:
-            val += " (value type: " + str(node.v_type) + ")"
-        if node.lineno is not None:
-            val += " (line num: " + str(node.lineno) + ")"
-
-        print prefix + node.type + val
-
-        if not node.is_leaf():
-            for n in node.children:
-                if type(n) is dict:
-                    print "    " + prefix + "(dictionary)"
-                    for key, value in n.iteritems():
-                        print_tree(value, indent + 2)
-                else:
-                    print_tree(n, indent + 1)
-    except:
-        print prefix + "[Something bad happened]"
+    stack = [(node, indent)]
+    while stack:
+        node, indent = stack.pop()
+        prefix = "    " * indent
+        if type(node) is dict:
+            print prefix + "(dictionary)"
+            stack.extend((value, indent + 1)
+                         for value in reversed(node.values()))
+            continue
+        try:
+            val = ""
+            if node.value is not None:
+                val += " (value: " + str(node.value) + ")"
+            if node.v_type is not None:
+                val += " (value type: " + str(node.v_type) + ")"
+            if node.lineno is not None:
+                val += " (line num: " + str(node.lineno) + ")"
+
+            print prefix + node.type + val
+
+            stack.extend((n, indent + 1) for n in node.children[::-1])
+        except:
+            print prefix + "[Something bad happened]"
 
 
 def print_symtab(symtab):
     print symtab
 
 
-def parse(source):
+# Parsers are reused from one compile to the next in a process (batch
+# workers and the compile server compile many files).
+parsers = parser.ParserPool()
+
+
+def parse(source, profile=None, flat=False):
     if verbose:
         print "parsing...",
-    p = parser.ParserForNarratr()
-    ast = p.parse(source)
+    p = parsers.acquire()
+    lexer = p.lexer
+    try:
+        p.flat = flat
+        if profile is not None:
+            p.lexer = profile.timed_lexer(lexer)
+        with timed(profile, "parse"):
+            ast = p.parse_fresh(source)
+    finally:
+        p.lexer = lexer
+        parsers.release(p)
     symtab = p.symtab
     if verbose:
         print u'\u2713'
     return ast, symtab
 
 
-def generate_code(ast, symtab, outfile):
+# With stream, every scene and item is written as soon as its code is
+# generated (see CodeGen.stream), so writing is timed as part of codegen.
+# With use_ast, the program is built as a Python ast (see astgen.py), and
+# the source written is rendered from the ast.
+# With pyc, the program is also written as bytecode (see bytecode.py). With
+# use_ast too, the bytecode is compiled from the ast rather than the source.
+# With more than one job, scenes and items are generated on that many
+# processes (see CodeGen.process). With warn, the scenes and items that are
+# never reached are warned about, and with omit they are left out as well.
+def generate_code(ast, symtab, outfile, profile=None, stream=False,
+                  use_ast=False, pyc=False, jobs=1, omit=False, warn=False):
     if verbose:
         print "generating code...",
-    c = CodeGen()
-    c.process(ast, symtab)
-    c.construct(outfile)
+    if use_ast:
+        c = ASTCodeGen(omit, warn)
+        with timed(profile, "codegen"):
+            c.process(ast, symtab)
+        with timed(profile, "write"):
+            c.construct(outfile)
+            if pyc:
+                write_bytecode(c.code(outfile), outfile)
+    elif stream:
+        c = CodeGen(jobs, omit, warn)
+        with timed(profile, "codegen"):
+            c.stream(ast, symtab, outfile)
+    else:
+        c = CodeGen(jobs, omit, warn)
+        with timed(profile, "codegen"):
+            c.process(ast, symtab)
+        with timed(profile, "write"):
+            c.construct(outfile)
+    if pyc and not use_ast:
+        with timed(profile, "write"):
+            compile_bytecode(outfile)
     if verbose:
         print u'\u2713'
+    return c
 
 
-def read(path):
+def read(path, profile=None):
     if verbose:
         print "reading file...",
     try:
-        with open(path, 'r') as f:
-            source = f.read()
+        with timed(profile, "read"):
+            with open(path, 'r') as f:
+                source = f.read()
     except IOError as e:
         print "\nERROR: Couldn't read source file " + path
         exit(1)
@@ -87,47 +150,310 @@ def read(path):
         return source
 
 
-def main():
+# These are the flags that change the generated code or the warnings. They
+# are part of the compile cache key.
+CODEGEN_FLAGS = ["ast", "omit_unreachable", "warn_unreachable"]
+
+
+def fetch_cached(cache, key, outfile, pyc=False):
+    if verbose:
+        print "checking compile cache...",
+    warnings = cache.fetch(key, outfile)
+    if verbose:
+        print u'\u2713' if warnings is not None else "miss"
+    if warnings is not None:
+        sys.stderr.write("".join(warnings))
+        if pyc:
+            compile_bytecode(outfile)
+        return True
+    return False
+
+
+def compile_source(source, outputfile, args):
+    """Compile one narratr source file, honouring the command line flags.
+
+    Unless the cache is disabled, the generated module is looked up in the
+    compile cache first. The tree and symbol table dumps and the profile
+    need a real compile, so they bypass the lookup (but still refresh the
+    cache). Code printed to stdout is not a module file the cache can keep
+    or copy, so it always bypasses the cache."""
+    profile = None
+    if args.profile:
+        profile = CompileProfile(source)
+    source = read(source, profile)
+    cache = None
+    if not args.inert and not args.no_cache and outputfile != "stdout":
+        cache = CompileCache(args.cache_dir, args.cache_size * 1024 * 1024)
+        flags = [(flag, getattr(args, flag)) for flag in CODEGEN_FLAGS]
+        key = cache.key(source, flags)
+        if not args.tree and not args.symtab and not args.profile and \
+                fetch_cached(cache, key, outputfile, args.pyc):
+            if verbose:
+                print "Your game is ready. Have fun!"
+            return
+
+    ast, symtab = parse(source, profile, args.flat_ast)
+    if args.tree:
+        print "\n------------------- AST ---------------------"
+        print_tree(ast, 0)
+        print "------------------- /AST ---------------------\n"
+
+    if args.symtab:
+        print "\n------------------- SymTab ---------------------"
+        print_symtab(symtab)
+        print "------------------- /Symtab ---------------------\n"
+
+    if not args.inert:
+        c = generate_code(ast, symtab, outputfile, profile, args.stream,
+                          args.ast, args.pyc, args.codegen_jobs,
+                          args.omit_unreachable, args.warn_unreachable)
+        if cache is not None:
+            cache.store(key, outputfile, c.warnings)
+    if profile is not None:
+        profile.count_results(ast, symtab,
+                              None if args.inert else outputfile)
+        print profile.report(args.profile_format)
+    if verbose:
+        print "Your game is ready. Have fun!"
+
+
+# Batch mode: every argument that is a directory is expanded to the .ntr
+# files below it, in sorted order. Files are compiled on a process pool, and
+# each worker loads the lexer and parser tables once when it starts. The
+# output of every compile is captured and printed in the order the files
+# were given, so the output and the exit code do not depend on scheduling.
+def find_sources(paths):
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = []
+            for dirpath, dirnames, filenames in os.walk(path):
+                for filename in filenames:
+                    if filename.endswith(".ntr"):
+                        found.append(os.path.join(dirpath, filename))
+            sources += sorted(found)
+        else:
+            sources.append(path)
+    return sources
+
+
+def _init_worker(args):
+    global verbose
+    verbose = args.verbose
+    parsers.warm()
+
+
+# A file wrapper for captured output that encodes unicode strings (such as
+# the verbose check marks) as UTF-8, like a terminal would.
+class _CapturedFile:
+    def __init__(self, f):
+        self.file = f
+        self.softspace = 0
+
+    def write(self, string):
+        if isinstance(string, unicode):
+            string = string.encode("utf-8")
+        self.file.write(string)
+
+    def flush(self):
+        self.file.flush()
+
+
+# This runs the body of a with statement with stdout and stderr redirected to
+# temporary files, both at the file descriptor level (the compiler phases
+# write to the stderr they imported) and for sys.stdout/sys.stderr. The
+# files are yielded as a list and hold the captured strings afterwards.
+@contextlib.contextmanager
+def captured_output():
+    files = [tempfile.TemporaryFile(), tempfile.TemporaryFile()]
+    streams = (sys.stdout, sys.stderr)
+    for stream in streams:
+        stream.flush()
+    saved = (os.dup(1), os.dup(2))
+    os.dup2(files[0].fileno(), 1)
+    os.dup2(files[1].fileno(), 2)
+    sys.stdout, sys.stderr = [_CapturedFile(f) for f in files]
+    try:
+        yield files
+    finally:
+        for f in files:
+            f.flush()
+        sys.stdout, sys.stderr = streams
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        os.close(saved[0])
+        os.close(saved[1])
+        for i, f in enumerate(files):
+            f.seek(0)
+            files[i] = f.read()
+            f.close()
+
+
+# This turns the SystemExit raised by the compiler phases into an exit code.
+def exit_code(e):
+    code = e.code or 0
+    if not isinstance(code, int):
+        code = 1
+    return code
+
+
+# This compiles one file in batch mode and returns everything the caller has
+# to print. Diagnostics are prefixed with the file they belong to.
+def _compile_job(job):
+    source, args = job
+    start = time.time()
+    with captured_output() as output:
+        try:
+            compile_source(source, source + ".py", args)
+            code = 0
+        except SystemExit as e:
+            code = exit_code(e)
+        except Exception:
+            traceback.print_exc()
+            code = 1
+    elapsed = time.time() - start
+    err = "".join(source + ": " + line
+                  for line in output[1].splitlines(True))
+    return source, code, elapsed, output[0], err
+
+
+def compile_batch(sources, args):
+    """Compile many files in parallel and return the combined exit code."""
+    start = time.time()
+    jobs = [(source, args) for source in sources]
+    if args.jobs == 1 or len(jobs) == 1:
+        _init_worker(args)
+        pool = None
+        results = (_compile_job(job) for job in jobs)
+    else:
+        pool = multiprocessing.Pool(args.jobs, _init_worker, (args,))
+        results = pool.imap(_compile_job, jobs)
+
+    failed = []
+    for source, code, elapsed, out, err in results:
+        sys.stdout.write(out)
+        sys.stdout.flush()
+        sys.stderr.write(err)
+        sys.stderr.flush()
+        if code != 0:
+            failed.append(source)
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    print "Compiled %d file(s) in %.2fs: %d succeeded, %d failed." % \
+        (len(sources), time.time() - start, len(sources) - len(failed),
+         len(failed))
+    for source in failed:
+        print "FAILED: " + source
+    return 1 if failed else 0
+
+
+# The command line of the compiler. Tests parse their flags with it too, so
+# every flag has its default wherever args are used.
+def build_argparser():
     argparser = argparse.ArgumentParser()
     argparser.add_argument('-t', '--tree', action='store_true',
                            help='print a representation of the abstract' +
                            ' syntax tree from the parser')
     argparser.add_argument('-v', '--verbose', action="store_true",
                            help='print updates on each step of the compile')
-    argparser.add_argument('source', action="store", help='the source file')
+    argparser.add_argument('source', action="store", nargs='+',
+                           help='the source file. Several files or ' +
+                           'directories compile them all in parallel')
     argparser.add_argument('-o', '--output', nargs=1, action="store",
                            help='specify an output file. defaults to' +
                            ' [input file].py')
+    argparser.add_argument('-j', '--jobs', type=int,
+                           default=multiprocessing.cpu_count(),
+                           help='number of files to compile in parallel ' +
+                           'in batch mode. defaults to the number of CPUs')
+    argparser.add_argument('--codegen-jobs', type=int, default=1,
+                           help='number of processes to generate the ' +
+                           'scenes and items of a single file on. ' +
+                           'defaults to 1')
     argparser.add_argument('-i', '--inert', action="store_true",
                            help='does not try to use code generator')
     argparser.add_argument('-s', '--symtab', action='store_true',
                            help='print the symbol table')
+    argparser.add_argument('--profile', action='store_true',
+                           help='report the time spent in each phase of the ' +
+                           'compile and the size of what it produced')
+    argparser.add_argument('--profile-format', choices=['text', 'json'],
+                           default='text',
+                           help='print the profile as a table (the ' +
+                           'default) or as one line of JSON per file')
+    argparser.add_argument('--flat-ast', action='store_true',
+                           help='keep the syntax tree in flat arrays ' +
+                           'instead of node objects, which takes less ' +
+                           'memory for very large games')
+    argparser.add_argument('--stream', action='store_true',
+                           help='write every scene and item as soon as its ' +
+                           'code is generated, so the generated program ' +
+                           'is never all in memory at once')
+    argparser.add_argument('--ast', action='store_true',
+                           help='build the program as a Python ast and ' +
+                           'compile it directly. the source written is ' +
+                           'rendered from the ast, for debugging')
+    argparser.add_argument('--omit-unreachable', action='store_true',
+                           help='leave out the scenes the start scene ' +
+                           'cannot lead to and the items no reachable ' +
+                           'scene uses, and warn about them')
+    argparser.add_argument('--warn-unreachable', action='store_true',
+                           help='warn about the scenes the start scene ' +
+                           'cannot lead to and the items no reachable ' +
+                           'scene uses, but keep them')
+    argparser.add_argument('--pyc', action='store_true',
+                           help='also write the game as Python bytecode ' +
+                           '(game.ntr.pyc), which starts without ' +
+                           'compiling the generated code first')
+    argparser.add_argument('--no-cache', action='store_true',
+                           help='always compile from scratch, without ' +
+                           'reading or writing the compile cache')
+    argparser.add_argument('--cache-dir', action='store',
+                           default=default_dir(),
+                           help='where to keep the compile cache. defaults ' +
+                           'to $NARRATR_CACHE_DIR or ~/.cache/narratr')
+    argparser.add_argument('--cache-size', action='store', type=int,
+                           default=DEFAULT_SIZE // (1024 * 1024),
+                           help='size limit of the compile cache in MB. ' +
+                           'least recently used entries are evicted')
+    return argparser
+
+
+def main():
+    argparser = build_argparser()
     args = argparser.parse_args(sys.argv[1:])
 
     global verbose
     verbose = args.verbose
 
+    if args.ast and args.stream:
+        argparser.error("--stream cannot be used with --ast")
+
+    if args.codegen_jobs < 1:
+        argparser.error("--codegen-jobs must be at least 1")
+    if args.codegen_jobs > 1 and args.ast:
+        argparser.error("--codegen-jobs cannot be used with --ast")
+
+    if args.pyc and args.output == ["stdout"]:
+        argparser.error("--pyc needs an output file")
+
+    if len(args.source) > 1 or os.path.isdir(args.source[0]):
+        if args.output is not None:
+            argparser.error("-o/--output needs a single source file")
+        if args.codegen_jobs > 1:
+            argparser.error("--codegen-jobs needs a single source file")
+        if args.jobs < 1:
+            argparser.error("-j/--jobs must be at least 1")
+        exit(compile_batch(find_sources(args.source), args))
+
     if args.output is None:
-        outputfile = args.source + ".py"
+        outputfile = args.source[0] + ".py"
     else:
         outputfile = args.output[0]
 
-    source = read(args.source)
-    ast, symtab = parse(source)
-    if args.tree:
-        print "\n------------------- AST ---------------------"
-        print_tree(ast, 0)
-        print "------------------- /AST ---------------------\n"
-
-    if args.symtab:
-        print "\n------------------- SymTab ---------------------"
-        print_symtab(symtab)
-        print "------------------- /Symtab ---------------------\n"
-
-    if not args.inert:
-        generate_code(ast, symtab, outputfile)
-    if verbose:
-        print "Your game is ready. Have fun!"
+    compile_source(args.source[0], outputfile, args)
 
 if __name__ == "__main__":
     main()
@@ -15,15 +15,27 @@
 #
 # -----------------------------------------------------------------------------
 
+import kinds
 
-# Class for nodes in the narratr AST.
-class Node:
-    def __init__(self, v, t, c=[], v_type=None, lineno=0, key=None):
+# The children of a node made without any. It is shared by all those nodes,
+# so it is immutable: a node that gets children later must be made with a
+# list of its own.
+NO_CHILDREN = ()
+
+
+# Class for nodes in the narratr AST. There are a few million nodes in the
+# AST of a large game, so they have slots instead of a __dict__. A node
+# keeps its kind (see kinds.py); its type is the name of the kind.
+class Node(object):
+    __slots__ = ("value", "kind", "children", "v_type", "lineno", "key")
+
+    def __init__(self, v, t, c=NO_CHILDREN, v_type=None, lineno=0,
+                 key=None):
         """Create node for narratr AST.
 
         Constructor takes:
         v           the value of the node
-        t           the variable type, defined by Lexer/Parser
+        t           the kind of node (see kinds.py), or its name
         c           a list of children nodes (Optional)
         v_type      the type of the value (int, float, string, boolean,
                   id). Technically optional, but include for all new
@@ -32,24 +44,31 @@ class Node:
                   optional, but include for all new nodes.
         """
         self.value = v
-        self.type = t
+        self.kind = t if isinstance(t, int) else kinds.code(t)
         self.children = c
         self.v_type = v_type
         self.lineno = lineno
         self.key = key
 
+    # The type of a node is the name of its kind. Setting it sets the kind.
+    def _get_type(self):
+        return kinds.NAMES[self.kind]
+
+    def _set_type(self, name):
+        self.kind = kinds.code(name)
+
+    type = property(_get_type, _set_type)
+
     # This method is helpful for string representations
     def __repr__(self):
         return "Node(%r, %r, %r, %r, %r, %r)" % (self.value, self.type,
-                                                 self.children, self.v_type,
-                                                 self.lineno, self.key)
+                                                 list(self.children),
+                                                 self.v_type, self.lineno,
+                                                 self.key)
 
     def is_leaf(self):
         """This method checks if a node is a leaf node."""
-        if len(self.children) > 0:
-            return False
-        else:
-            return True
+        return not self.children
 
     # This method overloads the indexing [] operator to return the child
     # corresponding to the index.
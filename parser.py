@@ -16,28 +16,116 @@
 #
 # -----------------------------------------------------------------------------
 
+import os
 from sys import stderr, exit
 import ply.yacc as yacc
 from ply.lex import LexToken
 from lexer import LexerForNarratr
 from node import Node
+import kinds
+from arena import NodeArena
 from symtab import SymTabEntry, SymTab
 
+# The LALR tables for this grammar are shipped with the compiler as a pickle
+# next to this file, so building a parser never has to regenerate them or
+# write parsetab.py/parser.out into the working directory. The file name
+# carries the PLY version and the pickle carries the grammar signature. If
+# either does not match, the tables are regenerated in memory (and never
+# written out). Run this file as a script to rebuild the shipped pickle after
+# changing the grammar.
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "parsetab-" + yacc.__version__ + ".pickle")
+
+# LALR tables already loaded in this process, keyed by parser class. Each
+# value is a (signature, action, goto, productions) tuple; the productions
+# are plain tuples so every parser instance can bind its own methods.
+_tables = {}
+
 # Error checking: Make sure when item added to list, the item is of the same
 # type as the rest of the list.
 
 
 class ParserForNarratr:
 
-    def __init__(self, **kwargs):
+    # A ParserForNarratr keeps the symbol table of what it parsed, so a new
+    # program needs a new instance or a reset(). Instances are cheap to make
+    # once the tables are loaded, and a ParserPool keeps a few for reuse.
+    # With flat set, the AST is built in a NodeArena (see arena.py), which
+    # takes a fraction of the memory of Node objects for large games.
+    def __init__(self, flat=False, **kwargs):
         self.lexer = LexerForNarratr()
         self.tokens = self.lexer.tokens
-        self.parser = yacc.yacc(module=self, **kwargs)
+        # Any explicit PLY options fall back to the plain yacc() behaviour.
+        if kwargs:
+            self.parser = yacc.yacc(module=self, **kwargs)
+        else:
+            self.parser = self._build_parser()
         self.symtab = SymTab()
+        self.flat = flat
+        self._new_ast()
+        self._new_scope(None)
+
+    # The p_ methods make every node with self.node, which is Node, or the
+    # node method of the arena for this parse if the AST is flat.
+    def _new_ast(self):
+        if self.flat:
+            self.arena = NodeArena()
+            self.node = self.arena.node
+        else:
+            self.arena = None
+            self.node = Node
+
+    # This builds a parser for this instance from the cached LALR tables.
+    # The tables are shared between instances, but the productions are
+    # bound to this instance's p_ methods.
+    def _build_parser(self):
+        signature, action, goto, productions = self._load_tables()
+        lr = yacc.LRTable()
+        lr.lr_method = "LALR"
+        lr.lr_action = action
+        lr.lr_goto = goto
+        lr.lr_productions = [yacc.MiniProduction(*prod)
+                             for prod in productions]
+        lr.bind_callables(dict((prod[3], getattr(self, prod[3]))
+                               for prod in productions if prod[3]))
+        return yacc.LRParser(lr, self.p_error)
+
+    # This returns the LALR tables for this grammar, reading them from
+    # TABLE_FILE the first time they are needed in a process. Tables that do
+    # not match the grammar signature are regenerated in memory.
+    def _load_tables(self):
+        tables = _tables.get(self.__class__)
+        if tables is not None:
+            return tables
+
+        pdict = dict((name, getattr(self, name)) for name in dir(self))
+        pinfo = yacc.ParserReflect(pdict, log=yacc.NullLogger())
+        pinfo.get_all()
+        signature = pinfo.signature()
+
+        lr = yacc.LRTable()
+        try:
+            read_signature = lr.read_pickle(TABLE_FILE)
+        except Exception:
+            read_signature = None
+        if read_signature == signature:
+            productions = lr.lr_productions
+            action, goto = lr.lr_action, lr.lr_goto
+        else:
+            generated = yacc.yacc(module=self, debug=False,
+                                  write_tables=False)
+            productions = generated.productions
+            action, goto = generated.action, generated.goto
+
+        tables = (signature, action, goto,
+                  [(prod.str, prod.name, prod.len, prod.func, prod.file,
+                    prod.line) for prod in productions])
+        _tables[self.__class__] = tables
+        return tables
 
     def p_program(self, p):
         "program : newlines_optional blocks"
-        p[0] = Node(None, "program", [p[2]])
+        p[0] = self.node(None, kinds.PROGRAM, [p[2]])
 
     # The starttart state may be given multiple times.
     # This is handled in the code
@@ -51,42 +139,42 @@ class ParserForNarratr:
                   | blocks start_state newlines_optional'''
         # This statement differentiate parsing for a scene block
         # as it is added to the list of blocks.
-        if p[1].type == "blocks" and p[2].type == "scene_block":
+        if p[1].kind == kinds.BLOCKS and p[2].kind == kinds.SCENE_BLOCK:
             p[1].children[0][p[2].value] = p[2]
             p[0] = p[1]
         # This statement
         # differentiates parsing for an item block
         # as it is added to the list of blocks.
-        elif p[1].type == "blocks" and p[2].type == "item_block":
+        elif p[1].kind == kinds.BLOCKS and p[2].kind == kinds.ITEM_BLOCK:
             p[1].children[1][p[2].value] = p[2]
             p[0] = p[1]
         # For a startstate that is declared after blocks have been
         # created,
         # the start state is one of the children
         # of the main program.
-        elif p[1].type == "blocks" and p[2].type == "start_state":
+        elif p[1].kind == kinds.BLOCKS and p[2].kind == kinds.START_STATE:
             p[1].children.append(p[2])
             p[0] = p[1]
         # This parses the first scene block, as the first block
         # in the program.
         # It starts a Node containing all blocks.
-        elif p[1].type == "scene_block":
+        elif p[1].kind == kinds.SCENE_BLOCK:
             if(not isinstance(p[0], Node)):
-                p[0] = Node(None, "blocks", [{}, {}])
+                p[0] = self.node(None, kinds.BLOCKS, [{}, {}])
             p[0].children[0][p[1].value] = p[1]
         # This parses the first item block, as the first block
         # in the program.
         # It starts a Node containing all blocks.
-        elif p[1].type == "item_block":
+        elif p[1].kind == kinds.ITEM_BLOCK:
             if(not isinstance(p[0], Node)):
-                p[0] = Node(None, "blocks", [{}, {}])
+                p[0] = self.node(None, kinds.BLOCKS, [{}, {}])
             p[0].children[1][p[1].value] = p[1]
         # This parses the start state, as the first block
         # in the program.
         # It starts a Node containing all blocks.
-        elif p[1].type == "start_state":
+        elif p[1].kind == kinds.START_STATE:
             if(not isinstance(p[0], Node)):
-                p[0] = Node(None, "blocks", [{}, {}])
+                p[0] = self.node(None, kinds.BLOCKS, [{}, {}])
             p[0].children.append(p[2])
 
     # Because newlines are ignored, these functions
@@ -103,74 +191,99 @@ class ParserForNarratr:
     # A scene block consists of a setup, action, and cleanup block
     # all as children. Depending on the format, it creates the
     # block node with the parts as children
-    # and inserts the resulting scene in to the symbol table.
+    # and puts the resulting scene in its symbol table entry (see
+    # p_scene_id).
     def p_scene_block(self, p):
-        '''scene_block : SCENE SCENEID LCURLY newlines INDENT setup_block \
+        '''scene_block : SCENE scene_id LCURLY newlines INDENT setup_block \
                           action_block cleanup_block DEDENT newlines_optional \
                           RCURLY
-                       | SCENE SCENEID LCURLY newlines setup_block \
+                       | SCENE scene_id LCURLY newlines setup_block \
                           action_block cleanup_block RCURLY'''
-        if isinstance(p[6], Node) and p[6].type == 'setup_block':
+        if isinstance(p[6], Node) and p[6].kind == kinds.SETUP_BLOCK:
             children = [p[6], p[7], p[8]]
-        elif isinstance(p[5], Node) and p[5].type == 'setup_block':
+        elif isinstance(p[5], Node) and p[5].kind == kinds.SETUP_BLOCK:
             children = [p[5], p[6], p[7]]
-        p[0] = Node(p[2], "scene_block", children, lineno=p.lineno(2))
+        p[0] = self.node(p[2], kinds.SCENE_BLOCK, children, lineno=p.lineno(2))
+        self.symtab.update(p[2], p[0], "scene", "GLOBAL", False)
+        self._new_scope(None)
+
+    # The id of a scene is reduced before anything in the scene, so this
+    # inserts the scene into the symbol table (its value is set once the
+    # scene is parsed) and opens its scope for the names in it.
+    def p_scene_id(self, p):
+        '''scene_id : SCENEID'''
+        p[0] = p[1]
+        p.set_lineno(0, p.lineno(1))
         try:
-            self.symtab.insert(p[2], p[0], "scene", "GLOBAL", False)
+            self.symtab.insert(p[1], None, "scene", "GLOBAL", False)
         except:
             self._semantic_error("Error at line " + str(p.lineno(1)) +
-                                 ": A scene with the id '" + str(p[2]) +
+                                 ": A scene with the id '" + str(p[1]) +
                                  "' already exists.")
-        self.pass_down(p[0], p[2])
+        self.symtab.addScope(p[1], "scene")
+        self._new_scope(p[1])
 
     # This item block consists of a suite and parameters
     # both children of the item block.
     # Depending on whether it is an empty block
-    # or not, it inserts the resulting item
-    # into the symbol table.
+    # or not, it puts the resulting item
+    # in its symbol table entry (see p_item_id).
     def p_item_block(self, p):
-        '''item_block : ITEM ID itemparams LCURLY newlines_optional RCURLY
-                      | ITEM ID itemparams LCURLY suite RCURLY'''
-        if isinstance(p[5], Node) and p[5].type == "suite":
+        '''item_block : ITEM item_id itemparams LCURLY newlines_optional \
+                        RCURLY
+                      | ITEM item_id itemparams LCURLY suite RCURLY'''
+        if isinstance(p[5], Node) and p[5].kind == kinds.SUITE:
             children = [p[3], p[5]]
         else:
             children = [p[3]]
-        p[0] = Node(p[2], "item_block", children, lineno=p.lineno(2))
+        p[0] = self.node(p[2], kinds.ITEM_BLOCK, children, lineno=p.lineno(2))
+        self.symtab.update(p[2], p[0], "item", "GLOBAL", False)
+        self._new_scope(None)
+
+    # Like p_scene_id, this inserts an item and opens its scope.
+    def p_item_id(self, p):
+        '''item_id : ID'''
+        p[0] = p[1]
+        p.set_lineno(0, p.lineno(1))
         try:
-            self.symtab.insert(p[2], p[0], "item", "GLOBAL", False)
+            self.symtab.insert(p[1], None, "item", "GLOBAL", False)
         except:
             self._semantic_error("Error at line " + str(p.lineno(1)) +
-                                 ": An item with the id '" + str(p[2]) +
+                                 ": An item with the id '" + str(p[1]) +
                                  "' already exists.")
-        self.pass_down(p[0], "item." + p[2])
+        self.symtab.addScope("item." + p[1], "item")
+        self._new_scope("item." + p[1])
 
     def p_start_state(self, p):
         'start_state : START COLON SCENEID'
-        p[0] = Node(p[3], "start_state", lineno=p.lineno(3))
+        p[0] = self.node(p[3], kinds.START_STATE, lineno=p.lineno(3))
 
     def p_setup_block(self, p):
         '''setup_block : SETUP COLON suite
                        | SETUP COLON newlines'''
-        if isinstance(p[3], Node) and p[3].type == "suite":
-            p[0] = Node(None, "setup_block", [p[3]], lineno=p.lineno(1))
+        if isinstance(p[3], Node) and p[3].kind == kinds.SUITE:
+            p[0] = self.node(None, kinds.SETUP_BLOCK, [p[3]],
+                             lineno=p.lineno(1))
         else:
-            p[0] = Node(None, "setup_block", lineno=p.lineno(1))
+            p[0] = self.node(None, kinds.SETUP_BLOCK, lineno=p.lineno(1))
 
     def p_action_block(self, p):
         '''action_block : ACTION COLON suite
                         | ACTION COLON newlines'''
-        if isinstance(p[3], Node) and p[3].type == "suite":
-            p[0] = Node(None, "action_block", [p[3]], lineno=p.lineno(1))
+        if isinstance(p[3], Node) and p[3].kind == kinds.SUITE:
+            p[0] = self.node(None, kinds.ACTION_BLOCK, [p[3]],
+                             lineno=p.lineno(1))
         else:
-            p[0] = Node(None, "action_block", lineno=p.lineno(1))
+            p[0] = self.node(None, kinds.ACTION_BLOCK, lineno=p.lineno(1))
 
     def p_cleanup_block(self, p):
         '''cleanup_block : CLEANUP COLON suite
                          | CLEANUP COLON newlines'''
-        if isinstance(p[3], Node) and p[3].type == "suite":
-            p[0] = Node(None, "cleanup_block", [p[3]], lineno=p.lineno(1))
+        if isinstance(p[3], Node) and p[3].kind == kinds.SUITE:
+            p[0] = self.node(None, kinds.CLEANUP_BLOCK, [p[3]],
+                             lineno=p.lineno(1))
         else:
-            p[0] = Node(None, "cleanup_block", lineno=p.lineno(1))
+            p[0] = self.node(None, kinds.CLEANUP_BLOCK, lineno=p.lineno(1))
 
     # A suite can either be a single statement or a block of statements.
     # Accordingly, either the block or statement is added as a child to the
@@ -178,10 +291,11 @@ class ParserForNarratr:
     def p_suite(self, p):
         '''suite : simple_statement
                  | newlines INDENT statements DEDENT newlines_optional'''
-        if isinstance(p[1], Node) and p[1].type == "simple_statement":
-            p[0] = Node("simple", "suite", [p[1]], lineno=p[1].lineno)
+        if isinstance(p[1], Node) and p[1].kind == kinds.SIMPLE_STATEMENT:
+            p[0] = self.node("simple", kinds.SUITE, [p[1]], lineno=p[1].lineno)
         else:
-            p[0] = Node("statements", "suite", [p[3]], lineno=p.lineno(2))
+            p[0] = self.node("statements", kinds.SUITE, [p[3]],
+                             lineno=p.lineno(2))
 
     # A list of statements is handled here.
     # A single statement is added as the child node of a statement
@@ -189,20 +303,21 @@ class ParserForNarratr:
     def p_statements(self, p):
         '''statements : statements statement
                       | statement'''
-        if p[1].type == "statements":
+        if p[1].kind == kinds.STATEMENTS:
             p[1].children.append(p[2])
             p[0] = p[1]
         else:
-            p[0] = Node(None, "statements", [p[1]], lineno=p[1].lineno)
+            p[0] = self.node(None, kinds.STATEMENTS, [p[1]],
+                             lineno=p[1].lineno)
 
     def p_statement(self, p):
         '''statement : simple_statement
                      | block_statement'''
-        if p[1].type == 'simple_statement':
+        if p[1].kind == kinds.SIMPLE_STATEMENT:
             value = 'simple'
         else:
             value = 'block'
-        p[0] = Node(value, 'statement', [p[1]], lineno=p[1].lineno)
+        p[0] = self.node(value, kinds.STATEMENT, [p[1]], lineno=p[1].lineno)
 
     # A simple statement can be of many set forms.
     # Here we treat all these forms the same and encapsulate
@@ -215,30 +330,32 @@ class ParserForNarratr:
                             | flow_statement newlines
                             | expression_statement newlines'''
         if isinstance(p[1], Node):
-            if p[1].type == "say_statement":
+            if p[1].kind == kinds.SAY_STATEMENT:
                 value = "say"
-            elif p[1].type == "exposition":
+            elif p[1].kind == kinds.EXPOSITION:
                 value = "exposition"
-            elif p[1].type == "win_statement":
+            elif p[1].kind == kinds.WIN_STATEMENT:
                 value = "win"
-            elif p[1].type == "expression_statement":
+            elif p[1].kind == kinds.EXPRESSION_STATEMENT:
                 value = "expression"
-            elif p[1].type == "flow_statement":
+            elif p[1].kind == kinds.FLOW_STATEMENT:
                 value = "flow"
-            elif p[1].type == "lose_statement":
+            elif p[1].kind == kinds.LOSE_STATEMENT:
                 value = "lose"
         else:
             self._semantic_error("Syntax Error forming simple_statement.")
-        p[0] = Node(value, 'simple_statement', [p[1]], lineno=p[1].lineno)
+        p[0] = self.node(value, kinds.SIMPLE_STATEMENT, [p[1]],
+                         lineno=p[1].lineno)
 
     def p_say_statement(self, p):
         '''say_statement : SAY testlist'''
-        p[0] = Node(None, "say_statement", [p[2]], lineno=p[2].lineno)
+        p[0] = self.node(None, kinds.SAY_STATEMENT, [p[2]], lineno=p[2].lineno)
 
     def p_exposition_statement(self, p):
         '''exposition_statement : EXPOSITION testlist'''
         if p[1] == "exposition":
-            p[0] = Node(None, "exposition", [p[2]], lineno=p.lineno(1))
+            p[0] = self.node(None, kinds.EXPOSITION, [p[2]],
+                             lineno=p.lineno(1))
 
     def p_win_statement(self, p):
         '''win_statement : WIN
@@ -248,7 +365,7 @@ class ParserForNarratr:
                 children = []
             if len(p) == 3:
                 children = [p[2]]
-            p[0] = Node("win", "win_statement", children)
+            p[0] = self.node("win", kinds.WIN_STATEMENT, children)
 
     def p_lose_statement(self, p):
         '''lose_statement : LOSE
@@ -258,7 +375,7 @@ class ParserForNarratr:
                 children = []
             if len(p) == 3:
                 children = [p[2]]
-            p[0] = Node("lose", "lose_statement", children)
+            p[0] = self.node("lose", kinds.LOSE_STATEMENT, children)
 
     # Flow statements are statements that break the flow of the
     # scene.
@@ -271,17 +388,18 @@ class ParserForNarratr:
                           | moves_declaration
                           | moveto_statement'''
         if isinstance(p[1], Node):
-            if p[1].type == 'break_statement':
+            if p[1].kind == kinds.BREAK_STATEMENT:
                 value = "break"
-            elif p[1].type == 'continue_statement':
+            elif p[1].kind == kinds.CONTINUE_STATEMENT:
                 value = "continue"
-            elif p[1].type == 'moves_declaration':
+            elif p[1].kind == kinds.MOVES_DECLARATION:
                 value = "moves"
-            elif p[1].type == 'moveto_statement':
+            elif p[1].kind == kinds.MOVETO_STATEMENT:
                 value = "moveto"
         else:
             self._semantic_error("Parse error in flow_statement.")
-        p[0] = Node(value, "flow_statement", [p[1]], lineno=p[1].lineno)
+        p[0] = self.node(value, kinds.FLOW_STATEMENT, [p[1]],
+                         lineno=p[1].lineno)
 
     # Here we handle variable declarations,
     # god variables, and regular variables.
@@ -290,26 +408,31 @@ class ParserForNarratr:
                                 | GOD ID IS testlist
                                 | testlist'''
         if isinstance(p[1], Node):
-            p[0] = Node("testlist", "expression_statement", [p[1]],
-                        lineno=p[1].lineno)
+            p[0] = self.node("testlist", kinds.EXPRESSION_STATEMENT, [p[1]],
+                             lineno=p[1].lineno)
         elif p[1] == "god":
-            p[0] = Node("godis", "expression_statement", [Node(p[2], "god_id"),
-                        p[4]], lineno=p.lineno(1))
+            p[0] = self.node("godis", kinds.EXPRESSION_STATEMENT,
+                             [self.node(p[2], kinds.GOD_ID), p[4]],
+                             lineno=p.lineno(1))
         else:
-            p[0] = Node("is", "expression_statement", [Node(p[1], "id"), p[3]],
-                        lineno=p.lineno(1))
+            p[0] = self.node("is", kinds.EXPRESSION_STATEMENT,
+                             [self.node(p[1], kinds.ID), p[3]],
+                             lineno=p.lineno(1))
+        if not isinstance(p[1], Node):
+            self._declare_names(p[0], p.lexpos(1))
 
     def p_break_statement(self, p):
         '''break_statement : BREAK'''
-        p[0] = Node(p[1], 'break_statement', [], lineno=p.lineno(1))
+        p[0] = self.node(p[1], kinds.BREAK_STATEMENT, lineno=p.lineno(1))
 
     def p_continue_statement(self, p):
         '''continue_statement : CONTINUE'''
-        p[0] = Node(p[1], 'continue_statement', [], lineno=p.lineno(1))
+        p[0] = self.node(p[1], kinds.CONTINUE_STATEMENT, lineno=p.lineno(1))
 
     def p_moves_declaration(self, p):
         '''moves_declaration : MOVES directionlist'''
-        p[0] = Node("moves", 'moves_declaration', [p[2]], lineno=p.lineno(1))
+        p[0] = self.node("moves", kinds.MOVES_DECLARATION, [p[2]],
+                         lineno=p.lineno(1))
 
     # Here we create a list of the possible directions that
     # are declared to lead you out of a scene.
@@ -320,26 +443,29 @@ class ParserForNarratr:
         '''directionlist : direction LPARAN SCENEID RPARAN
                          | directionlist COMMA direction LPARAN SCENEID \
                                 RPARAN'''
-        if p[1].type == 'direction':
-            p[1].children.append(Node(p[3], 'sceneid', [], lineno=p.lineno(3)))
-            p[0] = Node(None, 'directionlist', [p[1]], lineno=p[1].lineno)
+        if p[1].kind == kinds.DIRECTION:
+            p[1].children.append(self.node(p[3], kinds.SCENEID,
+                                           lineno=p.lineno(3)))
+            p[0] = self.node(None, kinds.DIRECTIONLIST, [p[1]],
+                             lineno=p[1].lineno)
         else:
-            p[3].children.append(Node(p[5], 'sceneid', [], lineno=p.lineno(5)))
+            p[3].children.append(self.node(p[5], kinds.SCENEID,
+                                           lineno=p.lineno(5)))
             p[1].children.append(p[3])
             p[0] = p[1]
-        p[0].type = 'directionlist'
+        p[0].kind = kinds.DIRECTIONLIST
 
     def p_direction(self, p):
         '''direction : LEFT
                      | RIGHT
                      | UP
                      | DOWN'''
-        p[0] = Node(p[1], 'direction', [], lineno=p.lineno(1))
+        p[0] = self.node(p[1], kinds.DIRECTION, [], lineno=p.lineno(1))
 
     def p_moveto_statement(self, p):
         '''moveto_statement : MOVETO SCENEID'''
-        p[0] = Node('moveto', 'moveto_statement', [Node(p[2], "sceneid")],
-                    lineno=p.lineno(1))
+        p[0] = self.node('moveto', kinds.MOVETO_STATEMENT,
+                         [self.node(p[2], kinds.SCENEID)], lineno=p.lineno(1))
 
     # A testlist is a generic expression for some inequality
     # conditional expression.
@@ -348,44 +474,50 @@ class ParserForNarratr:
     def p_testlist(self, p):
         '''testlist : testlist COMMA test
                     | test'''
-        if p[1].type == 'test':
-            p[0] = Node(None, 'testlist', [p[1]], p[1].v_type,
-                        lineno=p[1].lineno)
-            p[0].type = 'testlist'
+        if len(p) == 2:
+            p[0] = self.node(None, kinds.TESTLIST, [p[1]], lineno=p[1].lineno)
         else:
             p[0] = p[1]
             p[0].children.append(p[3])
-            p[0].type = 'testlist'
 
+    # The expression grammar below has a level for every precedence, and
+    # most expressions only use a few of them. A level that just passes its
+    # only child up (a unit production, like "test : or_test") does not get
+    # a node of its own: the child is the node for that level. So x is an
+    # atom whether it appears in a testlist, a comparison or a term, and
+    # only operators, trailers and parenthesized tests add nodes to the
+    # tree. The v_type of an atom, power, factor, term or arithmetic
+    # expression is kept as it is for the type checks.
     def p_test(self, p):
         '''test : or_test'''
-        p[0] = Node(None, 'test', [p[1]], lineno=p[1].lineno)
+        p[0] = p[1]
 
     def p_or_test(self, p):
         '''or_test : or_test OR and_test
                    | and_test'''
-        if p[1].type == 'and_test':
-            p[0] = Node(None, 'or_test', [p[1]], lineno=p[1].lineno)
+        if len(p) == 2:
+            p[0] = p[1]
         else:
             children = [p[1], p[3]]
-            p[0] = Node('or', 'or_test', children, lineno=p[1].lineno)
+            p[0] = self.node('or', kinds.OR_TEST, children, lineno=p[1].lineno)
 
     def p_and_test(self, p):
         '''and_test : and_test AND not_test
                     | not_test'''
-        if p[1].type == 'not_test':
-            p[0] = Node(None, 'and_test', [p[1]], lineno=p[1].lineno)
+        if len(p) == 2:
+            p[0] = p[1]
         else:
             children = [p[1], p[3]]
-            p[0] = Node('and', 'and_test', children, lineno=p[1].lineno)
+            p[0] = self.node('and', kinds.AND_TEST, children,
+                             lineno=p[1].lineno)
 
     def p_not_test(self, p):
         '''not_test : NOT not_test
                     | comparison'''
-        if isinstance(p[1], Node) and p[1].type == 'comparison':
-            p[0] = Node(None, 'not_test', [p[1]], lineno=p[1].lineno)
+        if len(p) == 2:
+            p[0] = p[1]
         else:
-            p[0] = Node('not', 'not_test', [p[2]], lineno=p[2].lineno)
+            p[0] = self.node('not', kinds.NOT_TEST, [p[2]], lineno=p[2].lineno)
 
     # This concatenates expressions and comparison nodes
     # to a comparison statement.
@@ -393,17 +525,15 @@ class ParserForNarratr:
     def p_comparison(self, p):
         '''comparison : comparison comparison_op expression
                       | expression'''
-        if p[1].type == 'comparison':
-            p[0] = Node('comparison', 'comparison', [p[1], p[2], p[3]],
-                        p[1].v_type, lineno=p[1].lineno)
+        if len(p) == 2:
+            p[0] = p[1]
         else:
-            p[0] = Node(None, 'comparison', [p[1]], p[1].v_type,
-                        lineno=p[1].lineno)
-        p[0].type = 'comparison'
+            p[0] = self.node('comparison', kinds.COMPARISON,
+                             [p[1], p[2], p[3]], lineno=p[1].lineno)
 
     def p_expression(self, p):
         '''expression : arithmetic_expression'''
-        p[0] = Node(p[1].value, "expression", [p[1]], lineno=p[1].lineno)
+        p[0] = p[1]
 
     def p_comparison_op(self, p):
         '''comparison_op : LESS
@@ -415,7 +545,7 @@ class ParserForNarratr:
                          | NOT EQUALS'''
         if p[1] == '=':
             p[1] = '=='
-        p[0] = Node(p[1], 'comparison_op', [], lineno=p.lineno(1))
+        p[0] = self.node(p[1], kinds.COMPARISON_OP, lineno=p.lineno(1))
 
     # In the first two productions for this rule, we need to ensure that
     # the two sides are combinable. We overload to PLUS operator to string
@@ -425,23 +555,22 @@ class ParserForNarratr:
         '''arithmetic_expression : arithmetic_expression PLUS term
                                  | arithmetic_expression MINUS term
                                  | term'''
-        if p[1].type == 'term':
-            p[0] = Node("term", "arithmetic_expression", [p[1]], p[1].v_type,
-                        lineno=p[1].lineno)
+        if len(p) == 2:
+            p[0] = p[1]
         else:
             # Extra condition for '+': allow string concatenation.
             if p[1].v_type == "string":
                 if p[2] == "+":
                     if p[3].v_type in ["string", "id"]:
-                        p[0] = Node(p[2], 'arithmetic_expression',
-                                    [p[1], p[3]], "string", p.lineno(2))
+                        p[0] = self.node(p[2], kinds.ARITHMETIC_EXPRESSION,
+                                         [p[1], p[3]], "string", p.lineno(2))
                     else:
                         self._semantic_error(p, err_type="combination_error")
                 # Reject any expression trying to subtract strings.
                 elif p[2] == "-":
                     self._semantic_error(p, err_type="combination_error")
             else:
-                p[0] = self.combination_rules(p, 'arithmetic_expression')
+                p[0] = self.combination_rules(p, kinds.ARITHMETIC_EXPRESSION)
 
     # This specifies a term, used for arithmetic operations,
     # as specified below.
@@ -450,62 +579,65 @@ class ParserForNarratr:
                 | term DIVIDE factor
                 | term INTEGERDIVIDE factor
                 | factor '''
-        if p[1].type == "term":
+        if len(p) == 2:
+            p[0] = p[1]
+        else:
             # Type checking: reject anything with strings
             if (p[1].v_type in ["string", "list"] or
                     p[3].v_type in ["string", "list"]):
                 self._semantic_error(p, err_type="combination_error")
 
-            p[0] = self.combination_rules(p, 'term')
+            p[0] = self.combination_rules(p, kinds.TERM)
             # For integer division, we can just reset the v_type
             if p[2] == "//":
                 p[0].v_type = "integer"
             p[0].lineno = p.lineno(1)
-        else:
-            p[0] = Node("factor", 'term', [p[1]], p[1].v_type,
-                        lineno=p[1].lineno)
 
     def p_factor(self, p):
         '''factor : PLUS factor
                   | MINUS factor
                   | power'''
-        if p[1].type == 'power':
-            p[0] = Node("power", "factor", [p[1]], p[1].v_type,
-                        lineno=p[1].lineno)
+        if len(p) == 2:
+            p[0] = p[1]
         else:
-            p[0] = Node(p[1], 'factor', [p[2]], p[2].v_type,
-                        lineno=p.lineno(1))
+            p[0] = self.node(p[1], kinds.FACTOR, [p[2]], p[2].v_type,
+                             lineno=p.lineno(1))
 
+    # An atom followed by trailers is a power node with the atom as its
+    # first child and the trailers after it.
     def p_power(self, p):
         '''power : power trailer
                  | atom'''
-        if p[1].type == 'power':
-            p[1].value = "trailer"
+        if len(p) == 2:
+            p[0] = p[1]
+        elif p[1].kind == kinds.POWER:
             p[1].children.append(p[2])
             p[0] = p[1]
         else:
-            p[0] = Node("atom", 'power', [p[1]], p[1].v_type,
-                        lineno=p[1].lineno)
+            p[0] = self.node("trailer", kinds.POWER, [p[1], p[2]], p[1].v_type,
+                             lineno=p[1].lineno)
 
+    # A parenthesized test keeps its atom node, as the parentheses are part
+    # of the generated code. Its v_type is unknown (None), like that of any
+    # other test. Lists, numbers and booleans are atoms on their own.
     def p_atom_node(self, p):
         '''atom : LPARAN test RPARAN
                 | list
                 | number
                 | boolean'''
-        if isinstance(p[1], Node):
-            p[0] = Node(p[1].type, "atom", [p[1]], p[1].v_type,
-                        lineno=p[1].lineno)
+        if len(p) == 2:
+            p[0] = p[1]
         else:
-            p[0] = Node("test", "atom", [p[2]],  p[2].v_type,
-                        lineno=p.lineno(1))
+            p[0] = self.node("test", kinds.ATOM, [p[2]], lineno=p.lineno(1))
 
     def p_atom_string(self, p):
         '''atom : STRING'''
-        p[0] = Node(p[1], 'atom', [], "string", lineno=p.lineno(1))
+        p[0] = self.node(p[1], kinds.ATOM, v_type="string", lineno=p.lineno(1))
 
     def p_atom_id(self, p):
         '''atom : ID'''
-        p[0] = Node(p[1], 'atom', [], "id", lineno=p.lineno(1))
+        p[0] = self.node(p[1], kinds.ATOM, v_type="id", lineno=p.lineno(1))
+        self._resolve_name(p[0], p.lexpos(1))
 
     # This expression calls a function
     # in one of two syntactic ways.
@@ -513,58 +645,66 @@ class ParserForNarratr:
     def p_trailer(self, p):
         '''trailer : calllist
                    | DOT ID'''
-        if isinstance(p[1], Node) and p[1].type == "calllist":
-            p[0] = Node("calllist", "trailer", [p[1]], lineno=p[1].lineno)
+        if isinstance(p[1], Node) and p[1].kind == kinds.CALLLIST:
+            p[0] = self.node("calllist", kinds.TRAILER, [p[1]],
+                             lineno=p[1].lineno)
         else:
-            p[0] = Node("dot", 'trailer', [p[2]], p.lineno(1))
+            p[0] = self.node("dot", kinds.TRAILER, [p[2]], p.lineno(1))
 
     def p_list(self, p):
         '''list : LSQUARE RSQUARE
                 | LSQUARE testlist RSQUARE'''
-        if isinstance(p[2], Node) and p[2].type == 'testlist':
-            p[0] = Node(None, "list", [p[2]], "list", p.lineno(1))
+        if isinstance(p[2], Node) and p[2].kind == kinds.TESTLIST:
+            p[0] = self.node(None, kinds.LIST, [p[2]], "list", p.lineno(1))
         else:
-            p[0] = Node(None, "list", [], "list", p.lineno(1))
+            p[0] = self.node(None, kinds.LIST, v_type="list",
+                             lineno=p.lineno(1))
 
     def p_number_int(self, p):
         '''number : INTEGER'''
-        p[0] = Node(p[1], 'number', [], "integer", lineno=p.lineno(1))
+        p[0] = self.node(p[1], kinds.NUMBER, v_type="integer",
+                         lineno=p.lineno(1))
 
     def p_number_float(self, p):
         '''number : FLOAT'''
-        p[0] = Node(p[1], 'number', [], "float", lineno=p.lineno(1))
+        p[0] = self.node(p[1], kinds.NUMBER, v_type="float",
+                         lineno=p.lineno(1))
 
     def p_boolean(self, p):
         '''boolean : TRUE
                    | FALSE'''
-        p[0] = Node(p[1], 'boolean', [], "boolean", lineno=p.lineno(1))
+        p[0] = self.node(p[1], kinds.BOOLEAN, v_type="boolean",
+                         lineno=p.lineno(1))
 
     def p_calllist(self, p):
         '''calllist : LPARAN args RPARAN
                     | LPARAN RPARAN'''
         if isinstance(p[2], Node):
-            p[0] = Node("args", "calllist", [p[2]], lineno=p.lineno(1))
+            p[0] = self.node("args", kinds.CALLLIST, [p[2]],
+                             lineno=p.lineno(1))
         else:
-            p[0] = Node(None, 'calllist', [], lineno=p.lineno(1))
+            p[0] = self.node(None, kinds.CALLLIST, lineno=p.lineno(1))
 
     def p_args(self, p):
         '''args : args COMMA expression
                 | expression'''
-        if p[1].type == 'args':
+        if len(p) == 2:
+            p[0] = self.node("expression", kinds.ARGS, [p[1]],
+                             lineno=p[1].lineno)
+        else:
             p[0] = p[1]
             p[0].value = "args"
             p[0].children.append(p[3])
-        else:
-            p[0] = Node("expression", 'args', [p[1]], lineno=p[1].lineno)
 
     # This parses parameters for an item block definition.
     def p_itemparams(self, p):
         '''itemparams : LPARAN RPARAN
                       | LPARAN fparams RPARAN'''
         if isinstance(p[2], Node):
-            p[0] = Node('fparams', 'itemparams', [p[2]], lineno=p[2].lineno)
+            p[0] = self.node('fparams', kinds.ITEMPARAMS, [p[2]],
+                             lineno=p[2].lineno)
         else:
-            p[0] = Node(None, 'itemparams', lineno=p.lineno(1))
+            p[0] = self.node(None, kinds.ITEMPARAMS, lineno=p.lineno(1))
 
     # This parses parameters for a function.
     def p_fparams(self, p):
@@ -572,11 +712,11 @@ class ParserForNarratr:
                    | ID'''
         if isinstance(p[1], Node):
             p[1].value = "fparams"
-            p[1].children.append(Node(p[3], "id"))
+            p[1].children.append(self.node(p[3], kinds.ID))
             p[0] = p[1]
         else:
-            p[0] = Node("id", "fparams", [Node(p[1], "id")],
-                        lineno=p.lineno(1))
+            p[0] = self.node("id", kinds.FPARAMS, [self.node(p[1], kinds.ID)],
+                             lineno=p.lineno(1))
 
     # Blocks statements are conditional
     # operations of the type if or while.
@@ -585,12 +725,12 @@ class ParserForNarratr:
         '''block_statement : if_statement
                            | while_statement'''
         if isinstance(p[1], Node):
-            if p[1].type == 'if_statement':
-                p[0] = Node('if', 'block_statement', [p[1]],
-                            lineno=p[1].lineno)
-            elif p[1].type == 'while_statement':
-                p[0] = Node('while', 'block_statement', [p[1]],
-                            lineno=p[1].lineno)
+            if p[1].kind == kinds.IF_STATEMENT:
+                p[0] = self.node('if', kinds.BLOCK_STATEMENT, [p[1]],
+                                 lineno=p[1].lineno)
+            elif p[1].kind == kinds.WHILE_STATEMENT:
+                p[0] = self.node('while', kinds.BLOCK_STATEMENT, [p[1]],
+                                 lineno=p[1].lineno)
 
     # This parses an if statement expression into a
     # new node with children,
@@ -601,76 +741,98 @@ class ParserForNarratr:
                         | IF test COLON suite elif_statements
                         | IF test COLON suite'''
         if len(p) == 9:
-            p[0] = Node(None, 'if_statement', [p[2], p[4], p[5], p[8]],
-                        lineno=p[2].lineno)
+            p[0] = self.node(None, kinds.IF_STATEMENT,
+                             [p[2], p[4], p[5], p[8]], lineno=p[2].lineno)
         elif len(p) == 8:
-            p[0] = Node(None, 'if_statement', [p[2], p[4], None, p[7]],
-                        lineno=p[2].lineno)
+            p[0] = self.node(None, kinds.IF_STATEMENT,
+                             [p[2], p[4], None, p[7]], lineno=p[2].lineno)
         elif len(p) == 6:
-            p[0] = Node(None, 'if_statement', [p[2], p[4], p[5], None],
-                        lineno=p[2].lineno)
+            p[0] = self.node(None, kinds.IF_STATEMENT,
+                             [p[2], p[4], p[5], None],
+                             lineno=p[2].lineno)
         else:
-            p[0] = Node(None, 'if_statement', [p[2], p[4], None, None],
-                        lineno=p[2].lineno)
+            p[0] = self.node(None, kinds.IF_STATEMENT,
+                             [p[2], p[4], None, None],
+                             lineno=p[2].lineno)
 
     # This parses an elif statement expression into a new node with children,
     # skipping over key words and colons.
     def p_elif_statements(self, p):
         '''elif_statements : elif_statements ELIF test COLON suite
                            | ELIF test COLON suite'''
-        if isinstance(p[1], Node) and p[1].type == 'elif_statements':
+        if isinstance(p[1], Node) and p[1].kind == kinds.ELIF_STATEMENTS:
             p[0] = p[1]
-            new_elif = Node(None, 'elif_statement', [p[3], p[5]])
+            new_elif = self.node(None, kinds.ELIF_STATEMENT, [p[3], p[5]])
             p[0].children.append(new_elif)
         else:
-            elif_statement = Node(None, 'elif_statement', [p[2], p[4]],
-                                  lineno=p.lineno(1))
-            p[0] = Node(None, 'elif_statements', [elif_statement],
-                        lineno=elif_statement.lineno)
+            elif_statement = self.node(None, kinds.ELIF_STATEMENT,
+                                       [p[2], p[4]],
+                                       lineno=p.lineno(1))
+            p[0] = self.node(None, kinds.ELIF_STATEMENTS, [elif_statement],
+                             lineno=elif_statement.lineno)
 
     def p_while_statement(self, p):
         '''while_statement : WHILE test COLON suite'''
-        p[0] = Node(p[2], 'while_statement', [p[2], p[4]], lineno=p[2].lineno)
-        p[0].type = 'while_statement'
-
-    # In order to create SymTab entries (in particular, in order to know
-    # the appropriate scope) for named entities discovered below a main
-    # branch (i.e. variables in a scene), we need to travel back down
-    # the branches once we get to the main node. This function does so,
-    # creating symtab entries as it goes. It is called recursively on
-    # every branch, looking for named entities. It takes as its argument
-    # a branch and the scope to be assigned to all found named entities.
-    def pass_down(self, branch, scope):
-        for i, child in enumerate(branch.children):
-            if not isinstance(child, Node):
-                continue
-            if child.type == "expression_statement":
-                if child[0].type == "id":
-                    child[0].key = self.symtab.getKey(child[0].value, scope)
-                    entry = self.symtab.getWithKey(child[0].key)
-                    if not entry:
-                        self.symtab.insert(child[0].value, None, None, scope,
-                                           False)
-                elif child[0].type == "god_id":
-                    child[0].key = self.symtab.getKey(child[0].value, scope)
-                    entry = self.symtab.getWithKey(child[0].key)
-                    if not entry:
-                        self.symtab.insert(child[0].value, None, None, scope,
-                                           True)
-                    else:
-                        if entry.god:
-                            self._semantic_error("Re-declaring god " +
-                                                 "variable in same scope",
-                                                 lineno=child.lineno)
-                        else:
-                            self._semantic_error("Declaring previously " +
-                                                 "declared variable as god",
-                                                 lineno=child.lineno)
-            elif child.type == "atom" and child.v_type == "id":
-                entry = self.symtab.get(child.value, scope)
-                if entry:
-                    child.key = self.symtab.getKey(child.value, scope)
-            self.pass_down(child, scope)
+        p[0] = self.node(p[2], kinds.WHILE_STATEMENT, [p[2], p[4]],
+                         lineno=p[2].lineno)
+        p[0].kind = kinds.WHILE_STATEMENT
+
+    # Named entities (i.e. variables in a scene) get their SymTab entries,
+    # and id atoms the keys of the entries they resolve to (see
+    # SymTab.resolve), as they are reduced, in the scope of the scene or
+    # item that is being parsed. That is the order of the source, except
+    # that the atoms on the right of an assignment are reduced before it
+    # declares its variable. The atoms that are not bound in the scope
+    # itself are kept on a list of unbound atoms with their positions, and
+    # the assignment binds those after its own position again once the
+    # variable is declared. This way every name is resolved as if the
+    # finished block were walked top down, in the same pass as the parse.
+    def _new_scope(self, scope):
+        self.scope = scope
+        self.unbound = []
+
+    # This creates the SymTab entry for the variable an expression
+    # statement assigns to, if it is the first assignment in scope, then
+    # binds the atoms on its right. The atoms before lexpos can no longer
+    # be bound, so they are dropped.
+    def _declare_names(self, child, lexpos):
+        scope = self.scope
+        if child[0].kind == kinds.ID:
+            child[0].key = self.symtab.getKey(child[0].value, scope)
+            entry = self.symtab.getWithKey(child[0].key)
+            if not entry:
+                self.symtab.insert(child[0].value, None, None, scope, False)
+        elif child[0].kind == kinds.GOD_ID:
+            child[0].key = self.symtab.getKey(child[0].value, scope)
+            entry = self.symtab.getWithKey(child[0].key)
+            if not entry:
+                self.symtab.insert(child[0].value, None, None, scope, True)
+            else:
+                if entry.god:
+                    self._semantic_error("Re-declaring god variable in " +
+                                         "same scope", lineno=child.lineno)
+                else:
+                    self._semantic_error("Declaring previously declared " +
+                                         "variable as god",
+                                         lineno=child.lineno)
+        unbound = self.unbound
+        while unbound and unbound[-1][0] > lexpos:
+            self._bind(unbound.pop()[1])
+        del unbound[:]
+
+    # This gives an id atom the key of the SymTab entry it resolves to, if
+    # there is one, and leaves it unbound for the assignment it may be on
+    # the right of unless the entry is in the scope being parsed.
+    def _resolve_name(self, child, lexpos):
+        entry = self._bind(child)
+        if entry is None or entry.scope != self.scope:
+            self.unbound.append((lexpos, child))
+
+    def _bind(self, atom):
+        entry = self.symtab.resolve(atom.value, self.scope)
+        if entry is not None:
+            atom.key = self.symtab.getKey(entry.symbol, entry.scope)
+        return entry
 
     # This checks numbers for interoperability. If they are of
     # differing types, the result is always the more general of
@@ -679,32 +841,33 @@ class ParserForNarratr:
     # those as well.
     def combination_rules(self, p, n_type):
         if p[1].v_type == "id" or p[3].v_type == "id":
-            p[0] = Node(p[2], n_type, [p[1], p[3]], "id", p.lineno(2))
+            p[0] = self.node(p[2], n_type, [p[1], p[3]], "id", p.lineno(2))
         elif p[1].v_type == "integer":
             if p[3].v_type == "integer":
-                p[0] = Node(p[2], n_type, [p[1], p[3]],
-                            "integer", p.lineno(2))
+                p[0] = self.node(p[2], n_type, [p[1], p[3]],
+                                 "integer", p.lineno(2))
             elif p[3].v_type == "float":
-                p[0] = Node(p[2], n_type, [p[1], p[3]],
-                            "float", p.lineno(2))
+                p[0] = self.node(p[2], n_type, [p[1], p[3]],
+                                 "float", p.lineno(2))
             else:
                 self._semantic_error(p, "combination_error")
         elif p[1].v_type == "float":
             if p[3].v_type in ["integer", "float"]:
-                p[0] = Node(p[2], n_type, [p[1], p[3]],
-                            "float", p.lineno(2))
+                p[0] = self.node(p[2], n_type, [p[1], p[3]],
+                                 "float", p.lineno(2))
             else:
                 self._semantic_error(p, "combination_error")
         elif p[1].v_type == "list":
             if p[3].v_type == "list":
-                p[0] = Node(p[2], n_type, [p[1], p[3]],
-                            "list", p.lineno(2))
+                p[0] = self.node(p[2], n_type, [p[1], p[3]],
+                                 "list", p.lineno(2))
             else:
                 self._semantic_error(p, "combination_error")
         elif p[1].v_type == "boolean":
             self.p_error(p, "combination_error")
         else:
-            p[0] = Node(p[2], n_type, [p[1], p[3]], "unknown", p.lineno(2))
+            p[0] = self.node(p[2], n_type, [p[1], p[3]], "unknown",
+                             p.lineno(2))
 
         return p[0]
 
@@ -728,4 +891,61 @@ class ParserForNarratr:
         exit(1)
 
     def parse(self, string_to_parse, **kwargs):
-        return self.parser.parse(string_to_parse, lexer=self.lexer, **kwargs)
+        ast = self.parser.parse(string_to_parse, lexer=self.lexer, **kwargs)
+        if self.arena is not None:
+            self.arena.compact()
+        return ast
+
+    # This clears everything a parse leaves behind, so that the instance can
+    # parse another program: the lexer state, the parser stacks, the symbol
+    # table and the arena. The symbol table and the arena are replaced, not
+    # emptied, so those from the last parse stay valid for whoever holds
+    # them.
+    def reset(self):
+        self.lexer.reset()
+        if hasattr(self.parser, "symstack"):
+            self.parser.restart()
+        self.symtab = SymTab()
+        self._new_ast()
+        self._new_scope(None)
+
+    def parse_fresh(self, string_to_parse, **kwargs):
+        """Reset this parser, then parse string_to_parse with it."""
+        self.reset()
+        return self.parse(string_to_parse, **kwargs)
+
+
+class ParserPool:
+    """A few ParserForNarratr instances that are reused between programs.
+
+    acquire() returns an idle parser, or a new one if there is none, and
+    release() returns it to the pool. Parsers from the pool must be used
+    with parse_fresh()."""
+    def __init__(self, size=1):
+        self.size = size
+        self.idle = []
+
+    def acquire(self):
+        try:
+            return self.idle.pop()
+        except IndexError:
+            return ParserForNarratr()
+
+    def release(self, parser):
+        if len(self.idle) < self.size:
+            self.idle.append(parser)
+
+    def warm(self):
+        """Make sure a parser is ready before the first program arrives."""
+        self.release(self.acquire())
+
+
+def build_tables(path=TABLE_FILE):
+    """Regenerate the shipped LALR table pickle for the current grammar."""
+    if os.path.exists(path):
+        os.remove(path)
+    yacc.yacc(module=ParserForNarratr(), debug=False, picklefile=path)
+
+
+if __name__ == "__main__":
+    build_tables()
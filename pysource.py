@@ -0,0 +1,358 @@
+# -----------------------------------------------------------------------------
+# narrtr: pysource.py
+# This file renders Python ast trees (such as those astgen.py builds) as
+# Python source.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+import ast
+
+INDENT = "    "
+
+_BOOLOPS = {ast.And: "and", ast.Or: "or"}
+_BINOPS = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/",
+           ast.FloorDiv: "//", ast.Mod: "%", ast.Pow: "**",
+           ast.LShift: "<<", ast.RShift: ">>", ast.BitOr: "|",
+           ast.BitXor: "^", ast.BitAnd: "&"}
+_UNARYOPS = {ast.Not: "not ", ast.USub: "-", ast.UAdd: "+",
+             ast.Invert: "~"}
+_CMPOPS = {ast.Eq: "==", ast.NotEq: "!=", ast.Lt: "<", ast.LtE: "<=",
+           ast.Gt: ">", ast.GtE: ">=", ast.Is: "is", ast.IsNot: "is not",
+           ast.In: "in", ast.NotIn: "not in"}
+
+# Expressions that are put in parentheses when they are the operand of
+# another expression, so the source does not depend on precedence.
+_COMPOUND = (ast.BoolOp, ast.BinOp, ast.UnaryOp, ast.Compare, ast.IfExp)
+
+
+def render(tree):
+    """Return the Python source of tree, a module or a list of statements.
+
+    The source compiles to the same code as tree, although it is not laid
+    out the way a person would write it: every operand that is not a name,
+    a literal or a call is put in parentheses. The parts of the tree left to
+    render are kept on a stack rather than by recursion, as in
+    CodeGen._generate, so a tree of any depth can be rendered."""
+    if isinstance(tree, ast.Module):
+        tree = tree.body
+    parts = [(stmt, 0) for stmt in tree]
+    return _Renderer().generate(parts).lstrip("\n") + "\n"
+
+
+class _Renderer(object):
+    """The function for each kind of ast node. A statement function takes
+    the node and its indentation level and an expression function takes
+    the node; each returns a list of parts: strings, expressions and
+    (statement, indentation level) pairs."""
+    def __init__(self):
+        self.handlers = {}
+        for name in dir(self):
+            if name.startswith("visit_"):
+                self.handlers[getattr(ast, name[6:])] = getattr(self, name)
+
+    def generate(self, parts):
+        handlers = self.handlers
+        code = []
+        append = code.append
+        stack = parts[::-1]
+        pop = stack.pop
+        extend = stack.extend
+        while stack:
+            part = pop()
+            if isinstance(part, basestring):
+                append(part)
+                continue
+            if type(part) is tuple:
+                node, indentlevel = part
+                handler = handlers.get(type(node))
+                if handler is None:
+                    raise ValueError("cannot render " + type(node).__name__)
+                extend(reversed(handler(node, indentlevel)))
+            else:
+                handler = handlers.get(type(part))
+                if handler is None:
+                    raise ValueError("cannot render " + type(part).__name__)
+                extend(reversed(handler(part)))
+        return "".join(code)
+
+    # Helpers for the parts of a statement: the start of its line, a body
+    # and a list of expressions separated by commas.
+    def _line(self, indentlevel):
+        return "\n" + INDENT * indentlevel
+
+    def _body(self, body, indentlevel):
+        return [(stmt, indentlevel) for stmt in body]
+
+    def _commas(self, nodes):
+        parts = []
+        for node in nodes:
+            if parts:
+                parts.append(", ")
+            parts.append(node)
+        return parts
+
+    def _operand(self, node):
+        if isinstance(node, _COMPOUND) or \
+                isinstance(node, ast.Num) and repr(node.n)[0] == "-":
+            return ["(", node, ")"]
+        return [node]
+
+    # Statements.
+    def visit_ClassDef(self, node, indentlevel):
+        prefix = self._line(indentlevel)
+        parts = [prefix]
+        for decorator in node.decorator_list:
+            parts += [prefix + "@", decorator]
+        parts.append(prefix + "class " + node.name)
+        if node.bases:
+            parts += ["("] + self._commas(node.bases) + [")"]
+        return parts + [":"] + self._body(node.body, indentlevel + 1)
+
+    def visit_FunctionDef(self, node, indentlevel):
+        prefix = self._line(indentlevel)
+        parts = [prefix]
+        for decorator in node.decorator_list:
+            parts += [prefix + "@", decorator]
+        parts.append(prefix + "def " + node.name + "(")
+        parts += self._arguments(node.args)
+        return parts + ["):"] + self._body(node.body, indentlevel + 1)
+
+    def _arguments(self, args):
+        parts = []
+        first_default = len(args.args) - len(args.defaults)
+        for i, arg in enumerate(args.args):
+            if parts:
+                parts.append(", ")
+            parts.append(arg)
+            if i >= first_default:
+                parts += ["=", args.defaults[i - first_default]]
+        if args.vararg:
+            parts.append((", *" if parts else "*") + args.vararg)
+        if args.kwarg:
+            parts.append((", **" if parts else "**") + args.kwarg)
+        return parts
+
+    def visit_Assign(self, node, indentlevel):
+        parts = [self._line(indentlevel)]
+        for target in node.targets:
+            parts += [target, " = "]
+        return parts + [node.value]
+
+    def visit_AugAssign(self, node, indentlevel):
+        return [self._line(indentlevel), node.target,
+                " " + _BINOPS[type(node.op)] + "= ", node.value]
+
+    def visit_Expr(self, node, indentlevel):
+        return [self._line(indentlevel), node.value]
+
+    def visit_Print(self, node, indentlevel):
+        parts = [self._line(indentlevel) + "print"]
+        if node.dest is not None:
+            parts += [" >>", node.dest]
+            if node.values:
+                parts.append(",")
+        if node.values:
+            parts += [" "] + self._commas(node.values)
+        if not node.nl:
+            parts.append(",")
+        return parts
+
+    def visit_If(self, node, indentlevel):
+        prefix = self._line(indentlevel)
+        parts = [prefix + "if ", node.test, ":"]
+        parts += self._body(node.body, indentlevel + 1)
+        orelse = node.orelse
+        while len(orelse) == 1 and isinstance(orelse[0], ast.If):
+            parts += [prefix + "elif ", orelse[0].test, ":"]
+            parts += self._body(orelse[0].body, indentlevel + 1)
+            orelse = orelse[0].orelse
+        if orelse:
+            parts.append(prefix + "else:")
+            parts += self._body(orelse, indentlevel + 1)
+        return parts
+
+    def visit_While(self, node, indentlevel):
+        prefix = self._line(indentlevel)
+        parts = [prefix + "while ", node.test, ":"]
+        parts += self._body(node.body, indentlevel + 1)
+        if node.orelse:
+            parts.append(prefix + "else:")
+            parts += self._body(node.orelse, indentlevel + 1)
+        return parts
+
+    def visit_For(self, node, indentlevel):
+        prefix = self._line(indentlevel)
+        parts = [prefix + "for ", node.target, " in ", node.iter, ":"]
+        parts += self._body(node.body, indentlevel + 1)
+        if node.orelse:
+            parts.append(prefix + "else:")
+            parts += self._body(node.orelse, indentlevel + 1)
+        return parts
+
+    def visit_TryExcept(self, node, indentlevel):
+        prefix = self._line(indentlevel)
+        parts = [prefix + "try:"] + self._body(node.body, indentlevel + 1)
+        for handler in node.handlers:
+            parts.append(prefix + "except")
+            if handler.type is not None:
+                parts += [" ", handler.type]
+            if handler.name is not None:
+                parts += [", ", handler.name]
+            parts.append(":")
+            parts += self._body(handler.body, indentlevel + 1)
+        if node.orelse:
+            parts.append(prefix + "else:")
+            parts += self._body(node.orelse, indentlevel + 1)
+        return parts
+
+    def visit_Return(self, node, indentlevel):
+        if node.value is None:
+            return [self._line(indentlevel) + "return"]
+        return [self._line(indentlevel) + "return ", node.value]
+
+    def visit_Raise(self, node, indentlevel):
+        parts = [self._line(indentlevel) + "raise"]
+        if node.type is not None:
+            parts += [" ", node.type]
+        if node.inst is not None:
+            parts += [", ", node.inst]
+        if node.tback is not None:
+            parts += [", ", node.tback]
+        return parts
+
+    def visit_Delete(self, node, indentlevel):
+        return [self._line(indentlevel) + "del "] + \
+            self._commas(node.targets)
+
+    def visit_Exec(self, node, indentlevel):
+        parts = [self._line(indentlevel) + "exec ", node.body]
+        if node.globals is not None:
+            parts += [" in ", node.globals]
+        if node.locals is not None:
+            parts += [", ", node.locals]
+        return parts
+
+    def visit_Pass(self, node, indentlevel):
+        return [self._line(indentlevel) + "pass"]
+
+    def visit_Break(self, node, indentlevel):
+        return [self._line(indentlevel) + "break"]
+
+    def visit_Continue(self, node, indentlevel):
+        return [self._line(indentlevel) + "continue"]
+
+    def visit_Import(self, node, indentlevel):
+        return [self._line(indentlevel) + "import "] + \
+            self._commas(node.names)
+
+    def visit_ImportFrom(self, node, indentlevel):
+        return [self._line(indentlevel) + "from " + "." * (node.level or 0) +
+                (node.module or "") + " import "] + self._commas(node.names)
+
+    # Expressions, and the parts of statements that are not statements.
+    def visit_alias(self, node):
+        if node.asname:
+            return [node.name + " as " + node.asname]
+        return [node.name]
+
+    def visit_BoolOp(self, node):
+        parts = []
+        for value in node.values:
+            if parts:
+                parts.append(" " + _BOOLOPS[type(node.op)] + " ")
+            parts += self._operand(value)
+        return parts
+
+    def visit_BinOp(self, node):
+        return self._operand(node.left) + \
+            [" " + _BINOPS[type(node.op)] + " "] + self._operand(node.right)
+
+    # Python reads -1 as the number -1, so a sign is kept apart from the
+    # number it is applied to.
+    def visit_UnaryOp(self, node):
+        if isinstance(node.operand, ast.Num):
+            return [_UNARYOPS[type(node.op)] + "(", node.operand, ")"]
+        return [_UNARYOPS[type(node.op)]] + self._operand(node.operand)
+
+    def visit_Compare(self, node):
+        parts = self._operand(node.left)
+        for op, comparator in zip(node.ops, node.comparators):
+            parts.append(" " + _CMPOPS[type(op)] + " ")
+            parts += self._operand(comparator)
+        return parts
+
+    def visit_IfExp(self, node):
+        return self._operand(node.body) + [" if "] + \
+            self._operand(node.test) + [" else "] + self._operand(node.orelse)
+
+    def visit_Call(self, node):
+        parts = self._operand(node.func) + ["("]
+        arguments = list(node.args) + list(node.keywords)
+        parts += self._commas(arguments)
+        if node.starargs is not None:
+            parts += [", *" if arguments else "*", node.starargs]
+        if node.kwargs is not None:
+            parts += [", **" if arguments or node.starargs else "**",
+                      node.kwargs]
+        return parts + [")"]
+
+    def visit_keyword(self, node):
+        return [node.arg + "=", node.value]
+
+    def visit_Attribute(self, node):
+        if isinstance(node.value, ast.Num):
+            return ["(", node.value, ")." + node.attr]
+        return self._operand(node.value) + ["." + node.attr]
+
+    def visit_Subscript(self, node):
+        return self._operand(node.value) + ["[", node.slice, "]"]
+
+    def visit_Index(self, node):
+        return [node.value]
+
+    def visit_Slice(self, node):
+        parts = []
+        if node.lower is not None:
+            parts.append(node.lower)
+        parts.append(":")
+        if node.upper is not None:
+            parts.append(node.upper)
+        if node.step is not None:
+            parts += [":", node.step]
+        return parts
+
+    def visit_Name(self, node):
+        return [node.id]
+
+    def visit_Num(self, node):
+        n = node.n
+        if isinstance(n, float) and n in (float("inf"), -float("inf")):
+            return ["1e999" if n > 0 else "-1e999"]
+        return [repr(n)]
+
+    def visit_Str(self, node):
+        return [repr(node.s)]
+
+    def visit_List(self, node):
+        return ["["] + self._commas(node.elts) + ["]"]
+
+    def visit_Tuple(self, node):
+        if len(node.elts) == 1:
+            return ["(", node.elts[0], ",)"]
+        return ["("] + self._commas(node.elts) + [")"]
+
+    def visit_Dict(self, node):
+        parts = ["{"]
+        for key, value in zip(node.keys, node.values):
+            if len(parts) > 1:
+                parts.append(", ")
+            parts += [key, ": ", value]
+        return parts + ["}"]
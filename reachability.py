@@ -0,0 +1,91 @@
+# -----------------------------------------------------------------------------
+# narrtr: reachability.py
+# This file finds the scenes a game can never reach and the items it never
+# uses.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+from node import Node
+import kinds
+
+
+# This adds the scenes a block can move to (by moves or moveto) and the
+# names it uses to scenes and names. It is a loop over a stack of nodes,
+# since it runs over every scene that is reached on every compile.
+def _references(block, scenes, names):
+    stack = list(block.children)
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        node = pop()
+        if not isinstance(node, Node):
+            continue
+        kind = node.kind
+        if kind == kinds.SCENEID:
+            scenes.append(node.value)
+        elif kind == kinds.ATOM and node.v_type == "id":
+            names.append(node.value)
+        extend(node.children)
+
+
+def unreachable(blocks, start=1):
+    """Return the scenes and items of a game that are never reached.
+
+    blocks are the children of the blocks node of the AST: the scenes and
+    the items, by key, and the start states. The start scene is the first
+    start state, or start if there is none. A scene is reached if it is the
+    start scene or a scene that is reached moves to it; an item is reached
+    if a scene or item that is reached names it. This is an over-estimate
+    of what a game can reach, since it does not look at the conditions a
+    move is under.
+
+    The result is a list of the scene blocks that are not reached, by scene
+    number, and a list of the item blocks that are not, in the order they
+    are in the source. Both are empty if there is no scene to start from,
+    which is an error reported by the code generator instead."""
+    scenes = {}
+    items = {}
+    starts = []
+    for block in blocks:
+        if type(block) is dict:
+            for key, s_i in block.iteritems():
+                if s_i.kind == kinds.SCENE_BLOCK:
+                    scenes[key] = s_i
+                elif s_i.kind == kinds.ITEM_BLOCK:
+                    items[s_i.value] = s_i
+        elif block.kind == kinds.START_STATE:
+            starts.append(block.value)
+    if starts:
+        start = starts[0]
+    if start not in scenes:
+        return [], []
+
+    # The blocks left to look at are kept on a stack, so a game of any size
+    # is walked without recursion.
+    reached = set([("scene", start)])
+    stack = [scenes[start]]
+    while stack:
+        sids = []
+        names = []
+        _references(stack.pop(), sids, names)
+        for sid in sids:
+            if sid in scenes and ("scene", sid) not in reached:
+                reached.add(("scene", sid))
+                stack.append(scenes[sid])
+        for name in names:
+            if name in items and ("item", name) not in reached:
+                reached.add(("item", name))
+                stack.append(items[name])
+    return ([scenes[key] for key in sorted(scenes)
+             if ("scene", key) not in reached],
+            sorted((items[name] for name in items
+                    if ("item", name) not in reached),
+                   key=lambda item: (item.lineno, item.value)))
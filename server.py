@@ -0,0 +1,150 @@
+# -----------------------------------------------------------------------------
+# narrtr: server.py
+# This file defines a long-lived compile server for narratr.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+# The server imports the compiler and builds a parser (and with it the lexer
+# and parser tables) once, then listens on a Unix domain socket for requests
+# from client.py. Every request is handled in a process forked from the warm
+# server, which runs narratr.py's main with the client's arguments, working
+# directory, environment and umask, and sends back its exit code, stdout and
+# stderr. Since each request has a process of its own, concurrent requests
+# cannot see each other's parser, symbol table, code generator or flags.
+#
+# A request can run the compiler with any arguments, so only the user who
+# started the server may connect. The socket is made in a directory that
+# only that user can use, and with a umask that leaves it readable and
+# writable by that user alone from the moment it exists.
+#
+# Usage: python server.py [--socket PATH]
+
+import argparse
+import json
+import os
+import signal
+import socket
+import SocketServer
+import stat
+import sys
+import traceback
+import narratr
+from cache import compiler_version
+from client import DEFAULT_SOCKET, ENCODING
+
+
+class CompileServer(SocketServer.ForkingMixIn, SocketServer.UnixStreamServer):
+    pass
+
+
+class CompileHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        line = self.rfile.readline()
+        if not line:
+            # A client that only checked whether we are listening.
+            return
+        request = json.loads(line)
+        reply = run([arg.encode(ENCODING) for arg in request["argv"]],
+                    request["cwd"].encode(ENCODING),
+                    dict((name.encode(ENCODING), value.encode(ENCODING))
+                         for name, value in request["env"].iteritems()),
+                    request["umask"])
+        self.wfile.write(json.dumps(reply, encoding=ENCODING))
+
+
+def run(argv, cwd, env, umask):
+    """Run narratr.py with argv as the client would have.
+
+    This changes the working directory, environment and umask of the
+    process, so it must only be called in a process forked for the request.
+    """
+    os.chdir(cwd)
+    os.environ.clear()
+    os.environ.update(env)
+    os.umask(umask)
+    sys.argv = ["narratr.py"] + argv
+    with narratr.captured_output() as output:
+        try:
+            narratr.main()
+            code = 0
+        except SystemExit as e:
+            if e.code is not None and not isinstance(e.code, int):
+                print >> sys.stderr, e.code
+            code = narratr.exit_code(e)
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        # The interpreter ends a pending "print x," line when it exits.
+        if sys.stdout.softspace:
+            print
+    return {"code": code, "stdout": output[0], "stderr": output[1]}
+
+
+# This builds everything that can be shared between requests, so that forked
+# processes start with it.
+def warm_up():
+    narratr.parsers.warm()
+    compiler_version()
+
+
+# This makes the directory of the socket, if it is not there, and checks that
+# it belongs to the user and that no one else can use it.
+def private_directory(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.lexists(directory):
+        os.mkdir(directory, 0700)
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or \
+            st.st_mode & 0077:
+        exit("The socket must be in a directory only you can use, and " +
+             directory + " is not.")
+
+
+def serve(path):
+    private_directory(path)
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            exit("A server is already listening on " + path + ".")
+        except socket.error:
+            os.remove(path)
+        finally:
+            probe.close()
+    warm_up()
+    umask = os.umask(0177)
+    try:
+        server = CompileServer(path, CompileHandler)
+    finally:
+        os.umask(umask)
+    signal.signal(signal.SIGTERM, lambda signum, frame: exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('--socket', action='store', default=DEFAULT_SOCKET,
+                           help='the socket to listen on, in a directory ' +
+                           'only you can use. defaults to $NARRATR_SOCKET ' +
+                           'or server.sock in $XDG_RUNTIME_DIR/narratr or ' +
+                           'narratr-UID in the temporary directory')
+    args = argparser.parse_args(sys.argv[1:])
+    serve(args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,17 @@
 POCKET = -0x90CCE7
 GLOBAL = -0xC10BA1
 
+# The scopes the POCKET and GLOBAL constants stand for.
+_SCOPE_NAMES = {POCKET: "POCKET", GLOBAL: "GLOBAL"}
+
+
+# This is the scope or symbol a part of a string key stands for. Scene
+# numbers are ints, and the names of everything else start with a letter.
+def _key_part(part):
+    if part.isdigit():
+        return int(part)
+    return part
+
 
 class SymTabEntry:
     """An entry in the narratr symbol table.
@@ -33,13 +44,17 @@ class SymTabEntry:
                   variable has scope. It may also be POCKET, or GLOBAL.
                   GLOBAL is for scenes and items.
     god           a boolean corresponding to whether the variable was
-                  declared as a god variable."""
-    def __init__(self, symbol, value, symboltype, scope, god):
+                  declared as a god variable.
+    slot          the index of a variable of a scene (other than a god
+                  variable) in the list of variables of the scene in the
+                  generated code, or None for anything else."""
+    def __init__(self, symbol, value, symboltype, scope, god, slot=None):
         self.symbol = symbol
         self.value = value
         self.symboltype = symboltype
         self.scope = scope
         self.god = god
+        self.slot = slot
 
     def __repr__(self):
         return "[" + str(self.symbol) + ", " + str(self.value) + ", " \
@@ -47,27 +62,88 @@ class SymTabEntry:
                 + str(self.god) + "]"
 
 
-class SymTab:
+class SymTab(object):
+    """The narratr symbol table.
+
+    Entries are kept in a dictionary per scope, scopes, which maps a scope
+    to a dictionary from symbols to entries. A key is the tuple (scope,
+    symbol), so looking an entry up does not build any strings, and the
+    symbols of one scope (a scene, say) can be listed without going through
+    the others. Scopes and symbols are compared as they are given: scene
+    $1 is the symbol 1 in GLOBAL and the scope 1 for its variables.
+
+    Every scope has a parent, in which the names it does not have are
+    looked up by resolve(): a scene or an item is inside GLOBAL, and
+    GLOBAL is inside POCKET. The parser adds the scope of each scene and
+    item with addScope(), which also records its type; a scope that was
+    not added is taken to be a scene inside GLOBAL."""
     def __init__(self):
-        self.table = {}
+        self.scopes = {}
+        self.parents = {"GLOBAL": "POCKET", "POCKET": None}
+        self.scopeTypes = {"GLOBAL": "global", "POCKET": "pocket"}
+        self.slotCounts = {}
+        # What resolve() found, by symbol and then by scope.
+        self._resolved = {}
+
+    def addScope(self, scope, scopetype, parent=GLOBAL):
+        """Add scope, of scopetype ("scene" or "item"), inside parent."""
+        scope = _SCOPE_NAMES.get(scope, scope)
+        self.parents[scope] = _SCOPE_NAMES.get(parent, parent)
+        self.scopeTypes[scope] = scopetype
+        self._resolved.clear()
+
+    def scopeType(self, scope):
+        """Return the type of scope: "scene", "item", "global" or
+        "pocket"."""
+        return self.scopeTypes.get(_SCOPE_NAMES.get(scope, scope), "scene")
+
+    def chain(self, scope):
+        """Return scope and the scopes it is inside, innermost first."""
+        scope = _SCOPE_NAMES.get(scope, scope)
+        chain = []
+        while scope is not None:
+            chain.append(scope)
+            scope = self.parents.get(scope, "GLOBAL")
+        return chain
+
+    def resolve(self, symbol, scope):
+        """Return the entry symbol refers to in scope.
+
+        That is the entry for symbol in the first scope of chain(scope) that
+        has one, or None if none has. The answer is kept until an entry for
+        symbol is added or changed."""
+        scope = _SCOPE_NAMES.get(scope, scope)
+        resolved = self._resolved.get(symbol)
+        if resolved is None:
+            resolved = self._resolved[symbol] = {}
+        elif scope in resolved:
+            return resolved[scope]
+        entry = None
+        for outer in self.chain(scope):
+            symbols = self.scopes.get(outer)
+            if symbols is not None and symbol in symbols:
+                entry = symbols[symbol]
+                break
+        resolved[scope] = entry
+        return entry
 
     def getKey(self, symbol, scope):
         """Use scope and symbol to construct the internal key representation.
 
-        Note, this is just string manipulation; it does not access the symbol
-        table entries."""
-        if scope == POCKET:
-            key = "POCKET." + str(symbol)
-        elif scope == GLOBAL:
-            key = "GLOBAL." + str(symbol)
-        else:
-            key = str(scope) + "." + str(symbol)
-        return key
+        Note, this just makes a tuple; it does not access the symbol table
+        entries. The POCKET and GLOBAL constants are the same scopes as the
+        strings "POCKET" and "GLOBAL"."""
+        return (_SCOPE_NAMES.get(scope, scope), symbol)
 
     def overwrite(self, entry):
         """Overwrites an existing entry in the Symbol Table."""
         if isinstance(entry, SymTabEntry):
-            self.table[self.getKey(entry.symbol, entry.scope)] = entry
+            scope = _SCOPE_NAMES.get(entry.scope, entry.scope)
+            symbols = self.scopes.get(scope)
+            if symbols is None:
+                symbols = self.scopes[scope] = {}
+            symbols[entry.symbol] = entry
+            self._resolved.pop(entry.symbol, None)
         else:
             raise Exception("Insert needs a valid Symbol Table entry.")
 
@@ -75,34 +151,94 @@ class SymTab:
         """Interface used to add new SymTab entries.
 
         Parameters are explained above in SymTabEntry. god defaults to
-        False for backward compatability."""
-        if self.getKey(symbol, scope) in self.table:
+        False for backward compatability. A variable of a scene that is not
+        a god variable gets the next slot of the scene."""
+        if self.get(symbol, scope) is not None:
             raise Exception("Symbol already in the Symbol Table in " +
                             "the same scope.")
         else:
-            self.overwrite(SymTabEntry(symbol, value, symboltype, scope, god))
+            slot = None
+            if not god and self.scopeType(scope) == "scene":
+                scope_name = _SCOPE_NAMES.get(scope, scope)
+                slot = self.slotCounts.get(scope_name, 0)
+                self.slotCounts[scope_name] = slot + 1
+            self.overwrite(SymTabEntry(symbol, value, symboltype, scope, god,
+                                       slot))
+
+    def slotCount(self, scope):
+        """Return the number of slots given out in scope."""
+        return self.slotCounts.get(_SCOPE_NAMES.get(scope, scope), 0)
 
     def get(self, symbol, scope):
         """The interface used to get a SymTab Entry from the table.
 
         Returns None if there is no entry."""
-        return self.table.get(self.getKey(symbol, scope), None)
+        symbols = self.scopes.get(_SCOPE_NAMES.get(scope, scope))
+        if symbols is None:
+            return None
+        return symbols.get(symbol)
 
     def getWithKey(self, key):
-        """Get a symbol table entry if you already have the key."""
-        return self.table.get(key, None)
+        """Get a symbol table entry if you already have the key.
+
+        key is a key from getKey, or None, for which there is no entry. Keys
+        used to be strings ("1.x" for x in scene $1); those are still
+        accepted, and are split into the scope and the symbol."""
+        if key is None:
+            return None
+        if isinstance(key, basestring):
+            scope, dot, symbol = key.rpartition(".")
+            if not dot:
+                return None
+            key = (_key_part(scope), _key_part(symbol))
+        symbols = self.scopes.get(key[0])
+        if symbols is None:
+            return None
+        return symbols.get(key[1])
+
+    def getScope(self, scope):
+        """Return a dictionary from the symbols of scope to their entries.
+
+        The dictionary is the one in the table, so it should not be
+        changed."""
+        return self.scopes.get(_SCOPE_NAMES.get(scope, scope), {})
+
+    def entries(self):
+        """Return a list of all the entries in the table."""
+        entries = []
+        for symbols in self.scopes.itervalues():
+            entries.extend(symbols.itervalues())
+        return entries
 
     def update(self, symbol, value, symboltype, scope, god=False):
-        """Update an existing entry in the symbol table."""
-        if self.getKey(symbol, scope) not in self.table:
+        """Update an existing entry in the symbol table. The entry keeps
+        its slot."""
+        entry = self.get(symbol, scope)
+        if entry is None:
             raise Exception("Symbol not in the Symbol Table in the same" +
                             "scope. Nothing to update")
         else:
-            self.overwrite(SymTabEntry(symbol, value, symboltype, scope, god))
+            self.overwrite(SymTabEntry(symbol, value, symboltype, scope, god,
+                                       entry.slot))
+
+    # A dictionary of every entry by the string key it used to have, such
+    # as "GLOBAL.1" for scene $1. It is built each time, for code that still
+    # reads the table as one dictionary.
+    def _get_table(self):
+        table = {}
+        for scope, symbols in self.scopes.iteritems():
+            for symbol, entry in symbols.iteritems():
+                table[str(scope) + "." + str(symbol)] = entry
+        return table
+
+    table = property(_get_table)
+
+    def __len__(self):
+        return sum(len(symbols) for symbols in self.scopes.itervalues())
 
     # String representation of the Symbol Table
     def __repr__(self):
         items = []
-        for key in self.table:
-            items.append(str(key) + " : " + self.table[key].__repr__())
+        for key, entry in self.table.iteritems():
+            items.append(str(key) + " : " + entry.__repr__())
         return "\n".join(items)
@@ -0,0 +1,18 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    """A test case with a temporary directory, self.tmpdir, that is made
+    before each test and removed after it."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
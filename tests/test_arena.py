@@ -0,0 +1,87 @@
+from narratr.arena import NodeArena, ArenaNode
+from narratr.codegen import CodeGen
+from narratr.node import Node
+from narratr import kinds
+import narratr.parser as parser
+import os
+import shutil
+import tempfile
+import unittest
+
+SAMPLES = ["sampleprograms/demo.ntr", "sampleprograms/lockandkey.ntr",
+           "sampleprograms/3_arithmetic.ntr", "sampleprograms/4_nesting.ntr"]
+
+
+class TestNodeArena(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def compile(self, path, flat):
+        p = parser.ParserForNarratr(flat=flat)
+        with open(path) as f:
+            ast = p.parse(f.read())
+        outputfile = os.path.join(self.tmpdir, "out%d.py" % flat)
+        c = CodeGen()
+        c.process(ast, p.symtab)
+        c.construct(outputfile)
+        with open(outputfile) as f:
+            code = f.read()
+        return repr(ast), sorted((key, repr(entry)) for key, entry in
+                                 p.symtab.table.items()), code
+
+    def test_flat_ast_matches_nodes(self):
+
+        """Test that a flat AST gives the same tree, SymTab and code."""
+        for path in SAMPLES:
+            self.assertEqual(self.compile(path, True),
+                             self.compile(path, False))
+
+    def test_views(self):
+
+        """Test that views read and write the nodes in the arena."""
+        arena = NodeArena()
+        leaf = arena.node(1, "number", v_type="integer", lineno=3)
+        node = arena.node(None, "args", [leaf, "add", None], lineno=3)
+        self.assertTrue(isinstance(node, Node))
+        self.assertTrue(leaf.is_leaf())
+        self.assertEqual(node[0], leaf)
+        self.assertEqual(list(node.children)[1:], ["add", None])
+        node.value = "args"
+        node[0].key = "1.x"
+        self.assertEqual(repr(node), repr(Node("args", "args", [
+            Node(1, "number", v_type="integer", lineno=3, key="1.x"),
+            "add", None], lineno=3)))
+        self.assertEqual(list(arena.kinds), [kinds.NUMBER, kinds.ARGS])
+        node.type = "calllist"
+        self.assertEqual((node.kind, node.type), (kinds.CALLLIST, "calllist"))
+        self.assertRaises(Exception, leaf.__getitem__, 0)
+        self.assertRaises(Exception, node.__getitem__, 3)
+
+    def test_constants(self):
+
+        """Test that equal values of different types stay apart."""
+        arena = NodeArena()
+        values = [arena.node(v, "atom").value for v in [1, True, 1.0, "1"]]
+        self.assertEqual([type(v) for v in values], [int, bool, float, str])
+        self.assertEqual(arena.node("1", "atom").value, "1")
+        self.assertEqual(len(arena.constants), 5)
+
+    def test_append_and_compact(self):
+
+        """Test that children can be appended after other nodes are made."""
+        arena = NodeArena()
+        first = arena.node(None, "statements", [arena.node(0, "number")])
+        second = arena.node(None, "statements", [arena.node(1, "number")])
+        for i in range(2, 5):
+            first.children.append(arena.node(i, "number"))
+            second.children.append(arena.node(-i, "number"))
+        self.assertTrue(arena.moved > 0)
+        arena.compact()
+        self.assertEqual(arena.moved, 0)
+        self.assertEqual(len(arena.child_indexes), 8)
+        self.assertEqual([n.value for n in first.children], [0, 2, 3, 4])
+        self.assertEqual([n.value for n in second.children], [1, -2, -3, -4])
@@ -0,0 +1,89 @@
+from narratr.assignment import unset_reads
+import narratr.parser as parser
+import sys
+import unittest
+
+
+def scene(setup, action=("say 1",), cleanup=("say 2",)):
+    """Return the source of a game of one scene whose blocks are the lists
+    of lines setup, action and cleanup. Each line of a block is indented
+    eight spaces more."""
+    lines = ["scene $1 {"]
+    for name, block in [("setup", setup), ("action", action),
+                        ("cleanup", cleanup)]:
+        lines.append("    " + name + ":")
+        lines += ["        " + line for line in block]
+    return "\n".join(lines + ["}", "start: $1"]) + "\n"
+
+
+class TestUnsetReads(unittest.TestCase):
+
+    def check(self, source, reads, flat=False):
+        """Check that the reads that may come before a variable is set are
+        reads, a list of (line, name) pairs."""
+        p = parser.ParserForNarratr(flat=flat)
+        ast = p.parse(source)
+        found = unset_reads(ast[0][0][1], p.symtab)
+        self.assertEqual(sorted((atom.lineno, atom.value) for atom in found),
+                         reads)
+
+    def test_straight_line(self):
+
+        """Test that a read is unset only before the variable is set."""
+        self.check(scene(["x is 1", "say x", "if x > 1:", "    y is x",
+                          "say y", "y is x + y", "say y"]),
+                   [(7, "y"), (8, "y")])
+
+    def test_if(self):
+
+        """Test that a variable is set after an if if every branch sets it."""
+        self.check(scene(["if 1 > 2:", "    x is 1", "else:", "    x is 2",
+                          "say x"]), [])
+        self.check(scene(["if 1 > 2:", "    x is 1", "say x"]),
+                   [(5, "x")])
+        self.check(scene(["if 1 > 2:", "    x is 1", "elif 2 > 1:",
+                          "    x is 2", "else:", "    say 3", "say x"]),
+                   [(9, "x")])
+        self.check(scene(["if 1 > 2:", "    x is 1", "    say x",
+                          "elif x > 1:", "    say x", "else:",
+                          "    x is 3", "say x"]),
+                   [(6, "x"), (7, "x"), (10, "x")])
+
+    def test_while(self):
+
+        """Test that the body of a while may not run."""
+        self.check(scene(["x is 0", "while x < 3:", "    y is x",
+                          "    x is x + 1", "    say y", "say y",
+                          "while y < 3:", "    y is y + 1", "y is 2",
+                          "say y"]),
+                   [(8, "y"), (9, "y"), (10, "y")])
+
+    def test_blocks(self):
+
+        """Test that action goes on from setup, and cleanup from nothing."""
+        self.check(scene(["x is 1", "if x > 2:", "    y is 2"],
+                         ["say x", "say y"], ["say x"]),
+                   [(8, "y"), (10, "x")])
+
+    def test_deep_nesting(self):
+
+        """Test that ifs nested deeper than the recursion limit are walked."""
+        lines = ["x is 1", "if x > 0:", "    y is 1"]
+        for level in range(1000):
+            lines.append("    " * level + "if x > %d:" % level)
+        lines.append("    " * 1000 + "say x + y")
+        limit = sys.getrecursionlimit()
+        p = parser.ParserForNarratr()
+        ast = p.parse(scene(lines))
+        sys.setrecursionlimit(100)
+        try:
+            found = unset_reads(ast[0][0][1], p.symtab)
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual([atom.value for atom in found], ["y"])
+
+    def test_flat(self):
+
+        """Test that the reads of a flat AST are found."""
+        self.check(scene(["if 1 > 2:", "    x is 1", "say x"]),
+                   [(5, "x")], flat=True)
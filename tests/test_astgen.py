@@ -0,0 +1,154 @@
+from narratr.astgen import ASTCodeGen, depth
+from narratr.codegen import CodeGen
+import narratr.parser as parser
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import types
+import unittest
+
+SAMPLES = ["sampleprograms/demo.ntr", "sampleprograms/lockandkey.ntr",
+           "sampleprograms/2_derived.ntr", "sampleprograms/3_arithmetic.ntr",
+           "sampleprograms/4_nesting.ntr", "sampleprograms/5_moves.ntr"]
+
+INPUT = "yes\nmove right\nmove left\nlook\nmove up\nexit\n"
+
+
+def nested(construct, depth):
+    lines = ["scene $1 {", "    setup:", "        x is 1"]
+    for level in range(depth):
+        lines.append("    " * (level + 2) + "%s x > %d:" % (construct, level))
+    lines.append("    " * (depth + 2) + 'say "deep"')
+    lines += ["    action:", '        say "action"',
+              "    cleanup:", '        say "cleanup"', "}", "start: $1"]
+    return "\n".join(lines) + "\n"
+
+
+class TestASTCodeGen(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def generate(self, source, codegen=ASTCodeGen):
+        p = parser.ParserForNarratr()
+        ast = p.parse(source)
+        c = codegen()
+        c.process(ast, p.symtab)
+        return c
+
+    def run_game(self, c, name):
+        path = os.path.join(self.tmpdir, name)
+        c.construct(path)
+        proc = subprocess.Popen([sys.executable, path],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT)
+        return proc.communicate(INPUT)[0]
+
+    def test_same_game(self):
+
+        """Test that the games do the same as those CodeGen writes."""
+        for path in SAMPLES:
+            with open(path) as f:
+                source = f.read()
+            self.assertEqual(self.run_game(self.generate(source), "ast.py"),
+                             self.run_game(self.generate(source, CodeGen),
+                                           "source.py"), path)
+
+    def test_variables(self):
+
+        """Test that an unset scene variable fails and items keep theirs."""
+        source = ("scene $1 {\n    setup:\n        p is pony(3)\n" +
+                  "        if p.id > 5:\n            x is 1\n" +
+                  "        say x\n    action:\n    cleanup:\n}\n" +
+                  "item pony(pony_id) {\n    id is pony_id\n" +
+                  "    say id\n}\nstart: $1\n")
+        for codegen in [CodeGen, ASTCodeGen]:
+            out = self.run_game(self.generate(source, codegen), "game.py")
+            self.assertTrue(out.startswith("3\n"), out)
+            self.assertTrue(out.endswith("KeyError: 'x'\n"), out)
+
+    def test_unset_read(self):
+
+        """Test that reading an unset scene variable fails at the read."""
+        source = ("scene $1 {\n    setup:\n        p is pony(3)\n" +
+                  "        if p.id > 5:\n            x is 1\n" +
+                  "        y is x\n        say \"after\"\n" +
+                  "    action:\n    cleanup:\n}\n" +
+                  "item pony(pony_id) {\n    id is pony_id\n}\n" +
+                  "start: $1\n")
+        for codegen in [CodeGen, ASTCodeGen]:
+            out = self.run_game(self.generate(source, codegen), "game.py")
+            lines = out.splitlines()
+            self.assertEqual(lines[-1], "KeyError: 'x'", out)
+            self.assertEqual(lines[-4].strip(),
+                             "__vars[2] = get_var(__vars[1])", out)
+            self.assertFalse("after" in out, out)
+
+    def test_code(self):
+
+        """Test that code() compiles the program to a code object."""
+        with open("sampleprograms/lockandkey.ntr") as f:
+            c = self.generate(f.read())
+        code = c.code("lockandkey")
+        self.assertTrue(isinstance(code, types.CodeType))
+        self.assertEqual(code.co_filename, "lockandkey")
+        namespace = {"__name__": "lockandkey"}
+        exec code in namespace
+        self.assertEqual(sorted(name for name in namespace
+                                if name.startswith("s_")),
+                         ["s_1", "s_1_inst", "s_2", "s_2_inst",
+                          "s_3", "s_3_inst", "s_4", "s_4_inst"])
+        self.assertTrue(namespace["lock"] and namespace["key"])
+        self.assertEqual(namespace["pocket"].data, {})
+
+    def test_deep_nesting(self):
+
+        """Test that deeply nested ifs are built without recursion."""
+        limit = sys.getrecursionlimit()
+        c = self.generate(nested("if", 1000))
+        sys.setrecursionlimit(100)
+        try:
+            self.assertTrue(isinstance(c.code(), types.CodeType))
+        finally:
+            sys.setrecursionlimit(limit)
+
+    def test_loops_too_deep(self):
+
+        """Test that a program Python cannot compile is an error."""
+        c = self.generate(nested("while", 25))
+        self.assertRaises(SystemExit, c.code)
+
+    def test_source_too_deep(self):
+
+        """Test that a program Python cannot read as source is an error."""
+        path = os.path.join(self.tmpdir, "game.py")
+        lists = ("scene $1 {\n    setup:\n        x is " + "[" * 200 + "1" +
+                 "]" * 200 + "\n    action:\n    cleanup:\n}\nstart: $1\n")
+        for source in [nested("if", 200), lists]:
+            c = self.generate(source)
+            self.assertTrue(isinstance(c.code(), types.CodeType))
+            self.assertRaises(SystemExit, c.construct, path)
+            self.assertFalse(os.path.exists(path))
+        c = self.generate(nested("if", 60))
+        c.construct(path)
+        self.assertTrue(depth(c.module()) > 60)
+        out = self.run_game(c, "game.py")
+        self.assertTrue("action" in out and "Error" not in out, out)
+
+    def test_not_equal(self):
+
+        """Test that both backends read "not =" as "!="."""
+        source = ("scene $1 {\n    setup:\n        x is 1\n" +
+                  "        say x not = 2\n        say x not = 1\n" +
+                  "    action:\n    cleanup:\n}\nstart: $1\n")
+        c = self.generate(source, CodeGen)
+        self.assertTrue("print (__vars[0]) != 2" in c.scenes[0])
+        self.assertEqual(self.run_game(c, "source.py").split("\n")[:2],
+                         ["True", "False"])
+        self.assertEqual(self.run_game(self.generate(source), "ast.py"),
+                         self.run_game(c, "source.py"))
@@ -0,0 +1,69 @@
+import narratr.narratr as driver
+from narratr.tests.tempdir import TempDirTestCase
+import StringIO
+import itertools
+import os
+import shutil
+import sys
+
+
+class TestBatchCompile(TempDirTestCase):
+
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        os.mkdir(os.path.join(self.tmpdir, "more"))
+        for name, dest in [("0_helloworld.ntr", "a.ntr"),
+                           ("6_missing_action.ntr", "b.ntr"),
+                           ("4_while.ntr", "more/c.ntr")]:
+            shutil.copy(os.path.join("sampleprograms", name),
+                        os.path.join(self.tmpdir, dest))
+
+    def args(self, jobs):
+        return driver.build_argparser().parse_args(
+            [self.tmpdir, "-j", str(jobs), "--no-cache"])
+
+    def test_find_sources(self):
+
+        """Test that directories expand to their .ntr files in order."""
+        sources = driver.find_sources([self.tmpdir])
+        self.assertEqual([os.path.relpath(s, self.tmpdir) for s in sources],
+                         ["a.ntr", "b.ntr", "more/c.ntr"])
+
+    def test_batch_exit_code_and_outputs(self):
+
+        """Test that a batch compiles every file and reports failures."""
+        sources = driver.find_sources([self.tmpdir])
+        self.assertEqual(driver.compile_batch(sources, self.args(2)), 1)
+        for name, exists in [("a.ntr.py", True), ("b.ntr.py", False),
+                             ("more/c.ntr.py", True)]:
+            path = os.path.join(self.tmpdir, name)
+            self.assertEqual(os.path.exists(path), exists)
+
+    def test_batch_results_are_ordered(self):
+
+        """Test that jobs report results in the order they were given."""
+        scene = ('scene $%d {\n    setup:\n        x is %d\n' +
+                 '        say x\n    action:\n    cleanup:\n}\n')
+        os.mkdir(self.path("order"))
+        # The first file takes much longer than the others, so on two
+        # processes it finishes last.
+        sources = []
+        for name, scenes in [("1.ntr", 400), ("2.ntr", 1), ("3.ntr", 1)]:
+            sources.append(self.path(os.path.join("order", name)))
+            with open(sources[-1], "w") as f:
+                f.write("".join(scene % (i, i) for i in
+                                range(1, scenes + 1)))
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = StringIO.StringIO(), StringIO.StringIO()
+        try:
+            code = driver.compile_batch(sources, self.args(2))
+            err = sys.stderr.getvalue()
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+        self.assertEqual(code, 0)
+        # Each file's warnings are together, in the order of the files.
+        self.assertEqual([source for source, lines in
+                          itertools.groupby(line.split(": ")[0]
+                                            for line in err.splitlines())],
+                         sources)
+        self.assertEqual(err.count("No start scene"), 3)
@@ -0,0 +1,66 @@
+from narratr.bytecode import bytecode_path, compile_bytecode, MAGIC
+import narratr.narratr as driver
+from narratr.tests.tempdir import TempDirTestCase
+import os
+import subprocess
+import sys
+
+INPUT = "yes\nmove right\nlook\nexit\n"
+
+
+class TestBytecode(TempDirTestCase):
+
+    def compile(self, source, outputfile, *flags):
+        args = driver.build_argparser().parse_args(
+            [source, "--no-cache", "--pyc"] + list(flags))
+        driver.compile_source(source, outputfile, args)
+
+    def run_game(self, path):
+        proc = subprocess.Popen([sys.executable, path],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT)
+        return proc.communicate(INPUT)[0]
+
+    def test_bytecode_path(self):
+
+        """Test where the bytecode for a generated module is written."""
+        self.assertEqual(bytecode_path("game.ntr.py"), "game.ntr.pyc")
+        self.assertEqual(bytecode_path("game"), "game.pyc")
+
+    def test_compile_bytecode(self):
+
+        """Test that the file has the magic number and no part is left."""
+        with open(self.path("game.py"), "w") as f:
+            f.write("from __future__ import division\nprint 1 / 2\n")
+        self.assertEqual(compile_bytecode(self.path("game.py")),
+                         self.path("game.pyc"))
+        with open(self.path("game.pyc"), "rb") as f:
+            self.assertEqual(f.read(4), MAGIC)
+        self.assertEqual(sorted(os.listdir(self.tmpdir)),
+                         ["game.py", "game.pyc"])
+        self.assertEqual(self.run_game(self.path("game.pyc")), "0.5\n")
+
+    def test_same_game(self):
+
+        """Test that the bytecode plays the same game as the source."""
+        for flags in [[], ["--stream"], ["--ast"]]:
+            self.compile("sampleprograms/demo.ntr", self.path("demo.py"),
+                         *flags)
+            self.assertEqual(self.run_game(self.path("demo.pyc")),
+                             self.run_game(self.path("demo.py")), flags)
+
+    def test_ast_without_pyc(self):
+
+        """Test that --ast compiles no code object unless --pyc is given."""
+        def code(self, filename="<narratr>"):
+            raise AssertionError("code() called without --pyc")
+        original = driver.ASTCodeGen.code
+        driver.ASTCodeGen.code = code
+        try:
+            args = driver.build_argparser().parse_args(
+                ["sampleprograms/demo.ntr", "--no-cache", "--ast"])
+            driver.compile_source("sampleprograms/demo.ntr",
+                                  self.path("demo.py"), args)
+        finally:
+            driver.ASTCodeGen.code = original
+        self.assertEqual(os.listdir(self.tmpdir), ["demo.py"])
@@ -0,0 +1,165 @@
+import narratr.cache as cache
+import narratr.narratr as driver
+from narratr.tests.tempdir import TempDirTestCase
+import os
+import sys
+
+
+class TestCompileCache(TempDirTestCase):
+
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.cachedir = self.path("cache")
+
+    def write(self, name, data):
+        with open(self.path(name), "w") as f:
+            f.write(data)
+
+    def test_key(self):
+
+        """Test that the key depends on the source and the flags."""
+        c = cache.CompileCache(self.cachedir)
+        self.assertEqual(c.key("a"), c.key("a"))
+        self.assertNotEqual(c.key("a"), c.key("b"))
+        self.assertNotEqual(c.key("a"), c.key("a", [("flag", True)]))
+
+    def test_compiler_version(self):
+
+        """Test that a change to ply changes the compiler version."""
+        os.mkdir(self.path("ply"))
+        self.write("cache.py", "cache")
+        self.write("ply/lex.py", "lex")
+        versions = []
+        saved = cache.__file__, cache._compiler_version
+        try:
+            cache.__file__ = self.path("cache.py")
+            for lex in ["lex", "lex, changed"]:
+                self.write("ply/lex.py", lex)
+                cache._compiler_version = None
+                versions.append(cache.compiler_version())
+        finally:
+            cache.__file__, cache._compiler_version = saved
+        self.assertNotEqual(versions[0], versions[1])
+
+    def test_store_and_fetch(self):
+
+        """Test that a stored module and its warnings come back on a hit."""
+        c = cache.CompileCache(self.cachedir)
+        self.write("in.py", "print 1\n")
+        key = c.key("source")
+        self.assertEqual(c.fetch(key, self.path("out.py")), None)
+        self.assertFalse(os.path.exists(self.path("out.py")))
+        c.store(key, self.path("in.py"), ["WARNING: one\n"])
+        self.assertEqual(c.fetch(key, self.path("out.py")),
+                         ["WARNING: one\n"])
+        with open(self.path("out.py")) as f:
+            self.assertEqual(f.read(), "print 1\n")
+
+    def test_eviction(self):
+
+        """Test that the least recently used entries are evicted first."""
+        c = cache.CompileCache(self.cachedir, max_size=250)
+        self.write("in.py", "#" * 100)
+        c.store("a", self.path("in.py"))
+        c.store("b", self.path("in.py"))
+        os.utime(c._path("a", ".py"), (1, 1))
+        os.utime(c._path("b", ".py"), (2, 2))
+        # Using "a" makes "b" the least recently used entry.
+        self.assertEqual(c.fetch("a", self.path("out.py")), [])
+        c.store("c", self.path("in.py"))
+        self.assertNotEqual(c.fetch("a", self.path("out.py")), None)
+        self.assertEqual(c.fetch("b", self.path("out.py")), None)
+        self.assertNotEqual(c.fetch("c", self.path("out.py")), None)
+
+    def test_unwritable_cache(self):
+
+        """Test that a cache that cannot be written is ignored."""
+        self.write("cache", "")
+        c = cache.CompileCache(self.cachedir)
+        self.write("in.py", "print 1\n")
+        c.store("a", self.path("in.py"))
+        self.assertEqual(c.fetch("a", self.path("out.py")), None)
+
+    def compile(self, source, outputfile, *flags):
+        args = driver.build_argparser().parse_args(
+            [source, "--cache-dir", self.cachedir, "--cache-size", "1"] +
+            list(flags))
+        driver.compile_source(source, outputfile, args)
+
+    def test_compile_hit(self):
+
+        """Test that a second compile is served from the cache."""
+        source = "sampleprograms/0_helloworld.ntr"
+        self.compile(source, self.path("first.py"))
+        self.assertEqual(len(os.listdir(self.cachedir)), 2)
+        original = driver.parse
+        driver.parse = None
+        try:
+            self.compile(source, self.path("second.py"))
+        finally:
+            driver.parse = original
+        with open(self.path("first.py")) as f:
+            first = f.read()
+        with open(self.path("second.py")) as f:
+            self.assertEqual(f.read(), first)
+
+    def test_compile_hit_pyc(self):
+
+        """Test that the bytecode is written on a cache hit as well."""
+        source = "sampleprograms/0_helloworld.ntr"
+        self.compile(source, self.path("first.py"))
+        self.compile(source, self.path("second.py"), "--pyc")
+        self.assertFalse(os.path.exists(self.path("first.pyc")))
+        self.assertTrue(os.path.exists(self.path("second.pyc")))
+
+    def test_stdout(self):
+
+        """Test that compiling to stdout prints the code every time."""
+        source = os.path.abspath("sampleprograms/0_helloworld.ntr")
+        cwd = os.getcwd()
+        stdout = sys.stdout
+        printed = []
+        os.chdir(self.tmpdir)
+        try:
+            for i in range(2):
+                sys.stdout = open(self.path("stdout.txt"), "w")
+                try:
+                    self.compile(source, "stdout")
+                finally:
+                    sys.stdout.close()
+                    sys.stdout = stdout
+                with open(self.path("stdout.txt")) as f:
+                    printed.append(f.read())
+        finally:
+            os.chdir(cwd)
+        self.assertTrue("class s_1:" in printed[0])
+        self.assertEqual(printed[1], printed[0])
+        self.assertFalse(os.path.exists(self.path("stdout")))
+        self.assertFalse(os.path.exists(self.cachedir))
+
+    def test_no_cache(self):
+
+        """Test that --no-cache neither reads nor writes the cache."""
+        self.compile("sampleprograms/0_helloworld.ntr", self.path("out.py"),
+                     "--no-cache")
+        self.assertFalse(os.path.exists(self.cachedir))
+
+    def test_warnings_replayed(self):
+
+        """Test that warnings are printed again on a cache hit."""
+        with open("sampleprograms/0_helloworld.ntr") as f:
+            self.write("warn.ntr", f.read().replace("start: $1", ""))
+        self.compile(self.path("warn.ntr"), self.path("first.py"))
+        entry = [n for n in os.listdir(self.cachedir) if n.endswith(".log")]
+        with open(os.path.join(self.cachedir, entry[0])) as f:
+            warnings = f.read()
+        self.assertTrue(warnings.startswith("WARNING: No start scene"))
+        stderr = sys.stderr
+        sys.stderr = open(self.path("stderr"), "w")
+        try:
+            self.compile(self.path("warn.ntr"), self.path("second.py"))
+        finally:
+            sys.stderr.close()
+            sys.stderr = stderr
+        with open(self.path("stderr")) as f:
+            self.assertEqual(f.read(), warnings)
@@ -1,6 +1,7 @@
 import narratr.parser as parser
 import narratr.codegen as codegen
 from nose.tools import *
+import os
 import subprocess
 import sys
 
@@ -64,3 +65,163 @@ def check_expected_output(fname, output):
         assert_equal(p_output, expected_output,
                      fname + " printed:\n" + p_output +
                      "instead of:\n" + expected_output)
+
+
+def test_scene_variable_slots():
+
+    """Test that scene variables live in slots cleared by cleanup."""
+    source = '''scene $1 {
+    setup:
+        x is 1
+        god g is 5
+        say x
+        moves right($2)
+    action:
+        x is x + g
+    cleanup:
+        say x
+}
+scene $2 {
+    setup:
+        y is "two"
+        say y
+        moves left($1)
+    action:
+        say y
+    cleanup:
+        say "bye"
+}
+start: $1
+'''
+    p = parser.ParserForNarratr()
+    ast = p.parse(source)
+    assert_equal(p.symtab.get("x", 1).slot, 0)
+    assert_equal(p.symtab.get("g", 1).slot, None)
+    assert_equal(p.symtab.get("y", 2).slot, 0)
+    c = codegen.CodeGen()
+    c.process(ast, p.symtab)
+    assert_true("__vars[0] = (__vars[0]) + self.g" in c.scenes[0])
+    assert_true("__vars[:] = [unset_var('x')]" in c.scenes[0])
+    c.construct('temp.py')
+    proc = subprocess.Popen(['python', 'temp.py'],
+                            stdout=subprocess.PIPE, stdin=subprocess.PIPE)
+    p_output = proc.communicate('go\nmove right\nmove left\nexit\n')[0]
+    assert_equal(p_output, "1\n -->>  -->> 6\ntwo\n -->> bye\n1\n"
+                 " -->> == GAME TERMINATED ==\n")
+
+
+def test_not_equal():
+
+    """Test that "not =" is written as "!=", which Python can run."""
+    source = ("scene $1 {\n    setup:\n        x is 1\n" +
+              "        say x not = 2\n        say x not = 1\n" +
+              "    action:\n    cleanup:\n}\nstart: $1\n")
+    p = parser.ParserForNarratr()
+    ast = p.parse(source)
+    c = codegen.CodeGen()
+    c.process(ast, p.symtab)
+    assert_true("print (__vars[0]) != 2" in c.scenes[0])
+    c.construct('temp.py')
+    proc = subprocess.Popen(['python', 'temp.py'],
+                            stdout=subprocess.PIPE, stdin=subprocess.PIPE)
+    p_output = proc.communicate('exit\n')[0]
+    assert_equal(p_output.split("\n")[:2], ["True", "False"])
+
+
+def test_stream_matches_construct():
+
+    """Test that streamed code is the same as constructed code."""
+    for fname in ["sampleprograms/0_helloworld.ntr",
+                  "sampleprograms/2_derived.ntr",
+                  "sampleprograms/item_block.ntr",
+                  "sampleprograms/lockandkey.ntr"]:
+        with open(fname) as f:
+            source = f.read()
+        p = parser.ParserForNarratr()
+        ast = p.parse(source)
+        c = codegen.CodeGen()
+        c.process(ast, p.symtab)
+        c.construct('temp.py')
+        with open('temp.py') as f:
+            constructed = f.read()
+        p = parser.ParserForNarratr()
+        ast = p.parse(source)
+        c = codegen.CodeGen()
+        c.stream(ast, p.symtab, 'temp.py')
+        assert_equal(c.scenes, [])
+        with open('temp.py') as f:
+            assert_equal(f.read(), constructed, fname)
+
+
+def test_stream_error_keeps_output():
+
+    """Test that a failed streamed compile leaves the output file alone."""
+    with open('temp.py', 'w') as f:
+        f.write("old\n")
+    p = parser.ParserForNarratr()
+    with open('sampleprograms/6_nonexistent_start_scene.ntr') as f:
+        ast = p.parse(f.read())
+    c = codegen.CodeGen()
+    assert_raises(SystemExit, lambda: c.stream(ast, p.symtab, 'temp.py'))
+    with open('temp.py') as f:
+        assert_equal(f.read(), "old\n")
+    assert_false(os.path.exists('temp.py.part'))
+
+
+def generate_parallel(source, jobs, stream=False):
+    p = parser.ParserForNarratr()
+    ast = p.parse(source)
+    c = codegen.CodeGen(jobs)
+    if stream:
+        c.stream(ast, p.symtab, 'temp.py')
+    else:
+        c.process(ast, p.symtab)
+        c.construct('temp.py')
+    with open('temp.py') as f:
+        return f.read()
+
+
+def test_parallel_matches_serial():
+
+    """Test that code generated on several processes is the same."""
+    scenes = "".join('scene $%d {\n    setup:\n        x is %d\n' % (i, i) +
+                     '        say x\n    action:\n        moveto $%d\n' %
+                     (i % 40 + 1) + '    cleanup:\n        say "bye"\n}\n'
+                     for i in range(1, 41))
+    sources = [scenes + "start: $3\n"]
+    for fname in ["sampleprograms/2_derived.ntr",
+                  "sampleprograms/item_block.ntr",
+                  "sampleprograms/lockandkey.ntr"]:
+        with open(fname) as f:
+            sources.append(f.read())
+    for source in sources:
+        serial = generate_parallel(source, 1)
+        assert_equal(generate_parallel(source, 3), serial)
+        assert_equal(generate_parallel(source, 3, stream=True), serial)
+
+
+def test_parallel_error():
+
+    """Test that an error in a scene is reported as it is by one process."""
+    source = "".join('scene $%d {\n    setup:\n        %s\n    action:\n'
+                     '        say "a"\n    cleanup:\n        say "c"\n}\n' %
+                     (i, 'pocket.bogus("k")' if i in (7, 9) else 'say "s"')
+                     for i in range(1, 21))
+    reports = []
+    stderr = codegen.stderr
+    for jobs in [1, 4]:
+        p = parser.ParserForNarratr()
+        ast = p.parse(source + "start: $1\n")
+        c = codegen.CodeGen(jobs)
+        with open('temp.err', 'w') as f:
+            codegen.stderr = f
+            try:
+                assert_raises(SystemExit, c.process, ast, p.symtab)
+            finally:
+                codegen.stderr = stderr
+        with open('temp.err') as f:
+            reports.append(f.read())
+    os.remove('temp.err')
+    assert_equal(reports[0].splitlines()[-1],
+                 "ERROR: Line 51: invalid method for pocket")
+    assert_equal(reports[1], reports[0])
@@ -0,0 +1,98 @@
+import narratr.compilestats as compilestats
+import narratr.narratr as driver
+from narratr.lexer import LexerForNarratr
+from narratr.tests.tempdir import TempDirTestCase
+import json
+import os
+import sys
+
+
+class TestCompileProfile(TempDirTestCase):
+
+    def profile(self, source, *flags):
+        args = driver.build_argparser().parse_args(
+            [source, "--no-cache", "--profile", "--profile-format", "json"] +
+            list(flags))
+        stdout = sys.stdout
+        sys.stdout = open(os.path.join(self.tmpdir, "stdout"), "w")
+        try:
+            driver.compile_source(source,
+                                  os.path.join(self.tmpdir, "out.py"), args)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        with open(os.path.join(self.tmpdir, "stdout")) as f:
+            return f.read()
+
+    def test_json_report(self):
+
+        """Test that the JSON report has every phase and counter."""
+        source = "sampleprograms/demo.ntr"
+        report = json.loads(self.profile(source))
+        self.assertEqual(report["source"], source)
+        self.assertEqual(sorted(report["phases"]),
+                         sorted(compilestats.PHASES))
+        for times in report["phases"].values():
+            self.assertTrue(times["wall"] >= 0 and times["cpu"] >= 0)
+        self.assertEqual(report["counts"]["generated_bytes"],
+                         os.path.getsize(os.path.join(self.tmpdir, "out.py")))
+        self.assertEqual(report["counts"]["scenes"], 5)
+        self.assertEqual(report["counts"]["items"], 2)
+        self.assertEqual(report["counts"]["symtab_entries"], 14)
+
+    def test_token_count(self):
+
+        """Test that every token the parser reads is counted."""
+        with open("sampleprograms/4_while.ntr") as f:
+            lexer = LexerForNarratr()
+            lexer.input(f.read())
+        count = 0
+        while lexer.token() is not None:
+            count += 1
+        report = json.loads(self.profile("sampleprograms/4_while.ntr"))
+        self.assertEqual(report["counts"]["tokens"], count)
+
+    def test_inert(self):
+
+        """Test that an inert compile reports no code generation."""
+        report = json.loads(self.profile("sampleprograms/4_while.ntr",
+                                         "--inert"))
+        self.assertEqual(sorted(report["phases"]), ["lex", "parse", "read"])
+        self.assertFalse("generated_bytes" in report["counts"])
+
+    def test_text_report(self):
+
+        """Test that the text report is a table of the phases and counts."""
+        report = self.profile("sampleprograms/4_while.ntr",
+                              "--profile-format", "text").splitlines()
+        self.assertEqual(report[0], "profile: sampleprograms/4_while.ntr")
+        self.assertEqual([line.split()[0] for line in report[2:8]],
+                         compilestats.PHASES + ["total"])
+        self.assertTrue("ast nodes" in "\n".join(report[8:]))
+
+    def test_count_nodes(self):
+
+        """Test that nodes kept in dictionaries are counted."""
+        Node = compilestats.Node
+        tree = Node(None, "blocks", [{1: Node(1, "scene_block", []),
+                                      2: Node(2, "scene_block",
+                                              [Node(None, "suite", []),
+                                               "not a node"])}])
+        self.assertEqual(compilestats.count_nodes(tree), 4)
+
+    def test_deep_nesting(self):
+
+        """Test that a tree deeper than the recursion limit is profiled."""
+        source = os.path.join(self.tmpdir, "deep.ntr")
+        with open(source, "w") as f:
+            f.write("scene $1 {\n    setup:\n        x is " +
+                    "[not (" * 1000 + "1" + ")]" * 1000 + "\n    action:\n" +
+                    '        say "action"\n    cleanup:\n' +
+                    '        say "cleanup"\n}\nstart: $1\n')
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(200)
+        try:
+            report = json.loads(self.profile(source))
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertTrue(report["counts"]["ast_nodes"] > 3000)
@@ -0,0 +1,72 @@
+from narratr.emitter import Emitter
+from narratr.codegen import CodeGen
+import narratr.parser as parser
+import unittest
+
+
+def many_scenes(n):
+    lines = []
+    for i in range(1, n + 1):
+        lines += ["scene $%d {" % i, "    setup:", "        x is %d" % i,
+                  "        say x", "    action:",
+                  '        say "action %d"' % i, "    cleanup:",
+                  '        say "cleanup"', "}"]
+    lines.append("start: $1")
+    return "\n".join(lines) + "\n"
+
+
+class TestEmitter(unittest.TestCase):
+
+    def test_lines(self):
+
+        """Test that lines are indented and written in order."""
+        out = Emitter()
+        out.write("class a:")
+        out.line(1, "def f(self):")
+        out.line(2, "pass")
+        out.line(1)
+        out.write("\n")
+        self.assertEqual(out.getvalue(),
+                         "class a:\n    def f(self):\n        pass\n    \n")
+
+    def test_deep_line(self):
+
+        """Test a line indented more than the precomputed levels."""
+        out = Emitter()
+        out.line(20, "x")
+        self.assertEqual(out.getvalue(), "\n" + "    " * 20 + "x")
+
+    def test_empty(self):
+
+        """Test that an emitter with nothing written is empty."""
+        self.assertEqual(Emitter().getvalue(), "")
+
+    def test_generated_scene(self):
+
+        """Test the layout of a scene written through an emitter."""
+        p = parser.ParserForNarratr()
+        ast = p.parse(many_scenes(1))
+        c = CodeGen()
+        c.process(ast, p.symtab)
+        self.assertEqual(c.scenes[0].split("\n")[:10], [
+            "class s_1:",
+            "    def __init__(self):",
+            "        self.__vars = [unset_var('x')]",
+            "",
+            "    def setup(self):",
+            "        direction = {}",
+            "        __vars = self.__vars",
+            "    ",
+            "        __vars[0] = 1",
+            "        print __vars[0]"])
+
+    def test_main_instances(self):
+
+        """Test that main makes an instance of every scene, in order."""
+        p = parser.ParserForNarratr()
+        ast = p.parse(many_scenes(50))
+        c = CodeGen()
+        c.process(ast, p.symtab)
+        lines = [l for l in c.main.split("\n") if "_inst = s_" in l]
+        self.assertEqual(lines, ["s_%d_inst = s_%d()" % (i, i)
+                                 for i in range(1, 51)])
@@ -0,0 +1,53 @@
+import narratr.parser as parser
+from narratr.codegen import CodeGen
+import imp
+import os
+import shutil
+import tempfile
+import unittest
+
+gen_game = imp.load_source("gen_game", os.path.join("benchmarks",
+                                                    "gen_game.py"))
+
+
+class TestGameGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def compile(self, source):
+        p = parser.ParserForNarratr()
+        ast = p.parse(source)
+        c = CodeGen()
+        c.process(ast, p.symtab)
+        c.construct(os.path.join(self.tmpdir, "game.py"))
+        with open(os.path.join(self.tmpdir, "game.py")) as f:
+            compile(f.read(), "game.py", "exec")
+        return p.symtab
+
+    def test_shapes_compile(self):
+
+        """Test that generated games of different shapes compile."""
+        for params in [dict(), dict(scenes=1, items=0, depth=0, statements=0),
+                       dict(scenes=20, depth=7, statements=1, moves=1.0),
+                       dict(scenes=3, items=5, exposition=2000)]:
+            self.compile(gen_game.generate(**params))
+
+    def test_sizes(self):
+
+        """Test that games have the requested scenes and items."""
+        symtab = self.compile(gen_game.generate(scenes=12, items=3))
+        types = [entry.symboltype for entry in symtab.table.values()]
+        self.assertEqual(types.count("scene"), 12)
+        self.assertEqual(types.count("item"), 3)
+
+    def test_deterministic(self):
+
+        """Test that the same parameters and seed give the same game."""
+        self.assertEqual(gen_game.generate(scenes=5, seed=3),
+                         gen_game.generate(scenes=5, seed=3))
+        self.assertNotEqual(gen_game.generate(scenes=5, seed=3),
+                            gen_game.generate(scenes=5, seed=4))
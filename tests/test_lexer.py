@@ -2,7 +2,6 @@ import narratr.lexer as lexer
 import unittest
 
 
-@unittest.skip("skipping lexer tests")
 class TestLexer(unittest.TestCase):
 
     def test_lexer_helloworld(self):
@@ -246,3 +245,23 @@ class TestLexer(unittest.TestCase):
 
         self.assertEqual(cmp(tokenlist, correctlist), 0,
                          "Moves lexing does not match expected tokens.")
+
+    def test_lexer_nesting(self):
+        """Test Nesting tokens are as expected."""
+        correctlist = []
+        tokenlist = []
+
+        with open('sampleprograms/4_nesting.ntr') as f:
+            m = lexer.LexerForNarratr()
+            m.input(f.read())
+            t = m.token()
+            while t:
+                tokenlist.append(str(t))
+                t = m.token()
+
+        with open('tests/lexed_nesting') as f:
+            for line in f:
+                correctlist.append(line.rstrip())
+
+        self.assertEqual(cmp(tokenlist, correctlist), 0,
+                         "Nesting lexing does not match expected tokens.")
@@ -0,0 +1,48 @@
+import narratr.lexer as lexer
+import unittest
+
+
+def lex_all(m, source):
+    m.input(source)
+    tokens = []
+    t = m.token()
+    while t:
+        tokens.append(str(t))
+        t = m.token()
+    return tokens
+
+
+class TestLexerTables(unittest.TestCase):
+
+    def test_shipped_lextab_matches_rules(self):
+
+        """Test that the shipped lextab matches the current token rules."""
+        self.assertEqual(lexer.lextab._lexsignature,
+                         lexer.LexerForNarratr._signature(),
+                         "Shipped lextab is stale. Run 'python lexer.py' " +
+                         "to rebuild it.")
+
+    def test_cloned_lexer_matches_full_build(self):
+
+        """Test that cloned lexers produce the same tokens as lex()."""
+        with open('sampleprograms/5_moves.ntr') as f:
+            source = f.read()
+        expected = lex_all(lexer.LexerForNarratr(optimize=0), source)
+        self.assertEqual(lex_all(lexer.LexerForNarratr(), source), expected)
+
+    def test_cloned_lexers_do_not_share_state(self):
+
+        """Test that interleaved lexers keep their own indent state."""
+        with open('sampleprograms/4_continue.ntr') as f:
+            source = f.read()
+        expected = lex_all(lexer.LexerForNarratr(), source)
+        first = lexer.LexerForNarratr()
+        second = lexer.LexerForNarratr()
+        first.input(source)
+        second.input(source)
+        tokens = ([], [])
+        for i in range(len(expected)):
+            tokens[0].append(str(first.token()))
+            tokens[1].append(str(second.token()))
+        self.assertEqual(tokens[0], expected)
+        self.assertEqual(tokens[1], expected)
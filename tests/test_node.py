@@ -0,0 +1,52 @@
+from narratr.node import Node
+from narratr import kinds
+import unittest
+
+
+class TestNode(unittest.TestCase):
+
+    def test_leaves_share_no_mutable_children(self):
+
+        """Test that nodes made without children cannot be given any."""
+        leaf, other = Node("x", "atom"), Node("y", "atom")
+        self.assertTrue(leaf.is_leaf())
+        self.assertEqual(len(leaf.children), 0)
+        self.assertFalse(hasattr(leaf.children, "append"))
+        self.assertTrue(other.is_leaf())
+
+    def test_slots(self):
+
+        """Test that nodes have no attribute dictionary."""
+        node = Node(None, "term", [Node(1, "number"), Node(2, "number")])
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertRaises(AttributeError, setattr, node, "extra", 1)
+        self.assertEqual(node[1].value, 2)
+        self.assertRaises(Exception, node[0].__getitem__, 0)
+
+    def test_repr(self):
+
+        """Test that leaves print their children as an empty list."""
+        self.assertEqual(repr(Node(3, "number", v_type="integer")),
+                         "Node(3, 'number', [], 'integer', 0, None)")
+
+    def test_kinds(self):
+
+        """Test that nodes keep an integer kind and still have a type."""
+        node = Node(1, "number")
+        self.assertEqual(node.kind, kinds.NUMBER)
+        self.assertEqual(node.type, "number")
+        self.assertEqual(Node(1, kinds.NUMBER).type, "number")
+        node.type = "boolean"
+        self.assertEqual(node.kind, kinds.BOOLEAN)
+        node.kind = kinds.ATOM
+        self.assertEqual(node.type, "atom")
+        self.assertEqual(kinds.NAMES[kinds.CODES["term"]], "term")
+
+    def test_unknown_kind(self):
+
+        """Test that a type that is not a kind is an error."""
+        self.assertRaises(ValueError, Node, None, "made_up_type")
+        self.assertRaises(ValueError, kinds.code, "Atom")
+        node = Node(None, "atom")
+        self.assertRaises(ValueError, setattr, node, "type", "atm")
+        self.assertEqual(node.kind, kinds.ATOM)
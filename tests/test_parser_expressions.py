@@ -43,3 +43,31 @@ class TestParserForExpressions(unittest.TestCase):
     def test_parser_precedence(self):
 
         pass
+
+    def expressions(self, source):
+        p = parser.ParserForNarratr()
+        ast = p.parse("scene $1 {\n    setup:\n        say " + source +
+                      "\n    action:\n        say 1\n    cleanup:\n" +
+                      "        say 1\n}\nstart: $1\n")
+        setup = ast[0].children[0][1][0]
+        return setup[0][0][0][0][0][0].children
+
+    def test_parser_compact_expressions(self):
+
+        """Test that unit productions do not get nodes of their own."""
+        atom, number, term, paren = self.expressions('"a", 1, 2 * x, (x)')
+        self.assertEqual((atom.type, atom.v_type), ("atom", "string"))
+        self.assertTrue(atom.is_leaf())
+        self.assertEqual((number.type, number.v_type), ("number", "integer"))
+        self.assertEqual([child.type for child in term.children],
+                         ["number", "atom"])
+        self.assertEqual((paren.type, paren.value), ("atom", "test"))
+        self.assertEqual(paren[0].type, "atom")
+        self.assertEqual(paren.v_type, None)
+
+    def test_parser_unary(self):
+
+        """Test that parser can parse unary plus and minus."""
+        factor, = self.expressions("-x")
+        self.assertEqual((factor.type, factor.value), ("factor", "-"))
+        self.assertEqual(factor[0].type, "atom")
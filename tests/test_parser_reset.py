@@ -0,0 +1,82 @@
+import narratr.parser as parser
+import unittest
+
+SAMPLES = ["sampleprograms/lockandkey.ntr", "sampleprograms/0_helloworld.ntr",
+           "sampleprograms/demo.ntr", "sampleprograms/4_while.ntr"]
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def result(p, ast):
+    return repr(ast), sorted((key, repr(entry))
+                             for key, entry in p.symtab.table.items())
+
+
+class TestParserReset(unittest.TestCase):
+
+    def test_parse_fresh_matches_new_parser(self):
+
+        """Test that a reused parser gives the results of a new one."""
+        reused = parser.ParserForNarratr()
+        for path in SAMPLES:
+            expected = parser.ParserForNarratr()
+            self.assertEqual(result(reused, reused.parse_fresh(read(path))),
+                             result(expected, expected.parse(read(path))))
+
+    def test_reset_after_error(self):
+
+        """Test that a parser can be reused after a program with errors."""
+        p = parser.ParserForNarratr()
+        for path in ["sampleprograms/6_missing_action.ntr",
+                     "sampleprograms/6_scene_name_conflict.ntr"]:
+            self.assertRaises(SystemExit, p.parse_fresh, read(path))
+        expected = parser.ParserForNarratr()
+        source = read("sampleprograms/demo.ntr")
+        self.assertEqual(result(p, p.parse_fresh(source)),
+                         result(expected, expected.parse(source)))
+
+    def test_lexer_reset(self):
+
+        """Test that a reset lexer scans like a new one."""
+        p = parser.ParserForNarratr()
+        p.lexer.input(read("sampleprograms/demo.ntr"))
+        for i in range(200):
+            p.lexer.token()
+        p.lexer.reset()
+        self.assertEqual(p.lexer.lexer.lineno, 1)
+        self.assertEqual(p.lexer.indentstack, [0])
+        self.assertEqual(p.lexer.token(), None)
+        fresh = parser.LexerForNarratr()
+        source = read("sampleprograms/lockandkey.ntr")
+        p.lexer.input(source)
+        fresh.input(source)
+        while True:
+            token, expected = p.lexer.token(), fresh.token()
+            self.assertEqual(repr(token), repr(expected))
+            if expected is None:
+                break
+
+    def test_old_symtab_kept(self):
+
+        """Test that a reset does not empty the last parse's symtab."""
+        p = parser.ParserForNarratr()
+        p.parse_fresh(read("sampleprograms/demo.ntr"))
+        symtab = p.symtab
+        p.parse_fresh(read("sampleprograms/0_helloworld.ntr"))
+        self.assertEqual(len(symtab.table), 14)
+        self.assertEqual(len(p.symtab.table), 1)
+
+    def test_pool(self):
+
+        """Test that a pool hands out idle parsers and keeps a few."""
+        pool = parser.ParserPool(size=1)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertNotEqual(first, second)
+        pool.release(first)
+        pool.release(second)
+        self.assertEqual(pool.idle, [first])
+        self.assertTrue(pool.acquire() is first)
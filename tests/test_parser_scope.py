@@ -0,0 +1,80 @@
+import narratr.parser as parser
+from narratr.node import Node
+import unittest
+
+SOURCE = '''scene $1 {
+    setup:
+        say x
+        x is x + 1
+        god g is x
+    action:
+        say x, y
+    cleanup:
+        y is 2
+}
+item thing(n) {
+    m is n
+    say m
+}
+scene $2 {
+    setup:
+        say thing
+        thing is thing
+    action:
+        say thing
+    cleanup:
+        say "cleanup"
+}
+start: $1
+'''
+
+
+def id_atoms(ast):
+    """Return the id atoms below ast in the order of the source."""
+    atoms = []
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(reversed(node.values()))
+        elif isinstance(node, Node):
+            if node.type == "atom" and node.v_type == "id":
+                atoms.append((node.value, node.key))
+            stack.extend(node.children[::-1])
+    return atoms
+
+
+class TestParserScope(unittest.TestCase):
+
+    def test_keys(self):
+
+        """Test that id atoms get the keys of the variables in scope."""
+        p = parser.ParserForNarratr()
+        ast = p.parse(SOURCE)
+        self.assertEqual(id_atoms(ast), [
+            ("x", None), ("x", (1, "x")), ("x", (1, "x")), ("x", (1, "x")),
+            ("y", None), ("thing", ("GLOBAL", "thing")),
+            ("thing", (2, "thing")), ("thing", (2, "thing")),
+            ("n", None), ("m", ("item.thing", "m"))])
+
+    def test_symtab(self):
+
+        """Test the entries made for scenes, items and variables."""
+        p = parser.ParserForNarratr()
+        ast = p.parse(SOURCE)
+        self.assertEqual(sorted(p.symtab.table.keys()), [
+            "1.g", "1.x", "1.y", "2.thing", "GLOBAL.1", "GLOBAL.2",
+            "GLOBAL.thing", "item.thing.m"])
+        self.assertTrue(p.symtab.get("g", 1).god)
+        self.assertFalse(p.symtab.get("x", 1).god)
+        self.assertEqual(p.symtab.get(1, "GLOBAL").value.type,
+                         "scene_block")
+        self.assertEqual(p.symtab.get("thing", "GLOBAL").value.type,
+                         "item_block")
+
+    def test_god_redeclared(self):
+
+        """Test that a god variable cannot be declared twice."""
+        source = SOURCE.replace("say x, y", "god g is 1")
+        self.assertRaises(SystemExit, parser.ParserForNarratr().parse,
+                          source)
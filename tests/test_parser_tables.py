@@ -0,0 +1,44 @@
+import narratr.parser as parser
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestParserTables(unittest.TestCase):
+
+    def test_shipped_tables_match_grammar(self):
+
+        """Test that the shipped LALR tables match the current grammar."""
+        parser.ParserForNarratr()
+        signature = parser._tables[parser.ParserForNarratr][0]
+        lr = parser.yacc.LRTable()
+        self.assertEqual(lr.read_pickle(parser.TABLE_FILE), signature,
+                         "Shipped parser tables are stale. Run " +
+                         "'python parser.py' to rebuild them.")
+
+    def test_no_files_written(self):
+
+        """Test that building and using a parser writes nothing to CWD."""
+        with open('sampleprograms/0_helloworld.ntr') as f:
+            source = f.read()
+        cwd = os.getcwd()
+        tmpdir = tempfile.mkdtemp()
+        try:
+            os.chdir(tmpdir)
+            p = parser.ParserForNarratr()
+            p.parse(source)
+            self.assertEqual(os.listdir(tmpdir), [])
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(tmpdir)
+
+    def test_parsers_do_not_share_state(self):
+
+        """Test that parsers sharing tables still act on their own SymTab."""
+        first = parser.ParserForNarratr()
+        second = parser.ParserForNarratr()
+        with open('sampleprograms/0_helloworld.ntr') as f:
+            first.parse(f.read())
+        self.assertNotEqual(first.symtab.get(1, "GLOBAL"), None)
+        self.assertEqual(second.symtab.get(1, "GLOBAL"), None)
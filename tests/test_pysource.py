@@ -0,0 +1,59 @@
+from narratr.codegen import POCKET_CLASS, GET_RESPONSE, UNSET_VAR
+from narratr.pysource import render
+import ast
+import unittest
+
+
+class TestRender(unittest.TestCase):
+
+    def check(self, source):
+        tree = ast.parse(source)
+        self.assertEqual(ast.dump(ast.parse(render(tree))), ast.dump(tree))
+
+    def test_runtime(self):
+
+        """Test that the runtime of every game renders as it was parsed."""
+        self.check(UNSET_VAR + POCKET_CLASS + GET_RESPONSE)
+
+    def test_statements(self):
+
+        """Test rendering statements."""
+        self.check("from __future__ import division\n"
+                   "import os.path as p, sys\n"
+                   "def f(a, b=1, *c, **d):\n"
+                   "    print >>sys.stderr, a, b,\n"
+                   "    print\n"
+                   "    for i in x:\n"
+                   "        continue\n"
+                   "    else:\n"
+                   "        break\n"
+                   "    try:\n"
+                   "        y += 1\n"
+                   "    except (A, B), e:\n"
+                   "        del y[1:2], z\n"
+                   "        raise\n"
+                   "    raise E, 'e', t\n"
+                   "    exec 'x' in g, l\n"
+                   "    return (1,)\n"
+                   "if a:\n"
+                   "    pass\n"
+                   "elif b:\n"
+                   "    pass\n"
+                   "else:\n"
+                   "    q = r = 1\n")
+
+    def test_precedence(self):
+
+        """Test that operands keep their grouping."""
+        self.check("x = -(1) ** 2 + (a if b else c) - (-1) ** 2 - (1).real\n"
+                   "y = not (a or b) and (c < d <= e) * -f(*a, **k)\n"
+                   "z = (a - b) - (c - d), {1: [2, 3]}, g(x=1)[::2]\n")
+
+    def test_deep(self):
+
+        """Test rendering a tree deeper than the recursion limit."""
+        tree = ast.Name("x", ast.Load())
+        for i in range(5000):
+            tree = ast.UnaryOp(ast.Not(), tree)
+        self.assertEqual(render([ast.Expr(tree)]),
+                         "not (" * 4999 + "not x" + ")" * 4999 + "\n")
@@ -0,0 +1,125 @@
+from narratr.reachability import unreachable
+from narratr.astgen import ASTCodeGen
+from narratr.codegen import CodeGen
+import narratr.parser as parser
+import unittest
+
+SCENE = '''scene $%d {
+    setup:
+        %s
+    action:
+        say "action"
+    cleanup:
+        say "cleanup"
+}
+'''
+
+ITEM = '''item %s(x) {
+    %s
+}
+'''
+
+
+def game(scenes, items=(), start="start: $1\n"):
+    """Return the source of a game of scenes, a list of (number, setup)
+    pairs, and items, a list of (name, body) pairs."""
+    return "".join(SCENE % scene for scene in scenes) + \
+        "".join(ITEM % item for item in items) + start
+
+
+class TestReachability(unittest.TestCase):
+
+    def blocks(self, source):
+        p = parser.ParserForNarratr()
+        return p.parse(source)[0].children
+
+    def check(self, source, scenes, items):
+        dead = unreachable(self.blocks(source))
+        self.assertEqual([scene.value for scene in dead[0]], scenes)
+        self.assertEqual([item.value for item in dead[1]], items)
+
+    def test_moves(self):
+
+        """Test that scenes are reached through moves and moveto."""
+        self.check(game([(1, "moves left($2), right($3)"),
+                         (2, "say 2"), (3, "moveto $5"), (4, "moveto $1"),
+                         (5, "moves up($5)")]), [4], [])
+
+    def test_start(self):
+
+        """Test that the start scene is the first one, or $1 without one."""
+        scenes = [(1, "moveto $2"), (2, "say 2"), (3, "say 3")]
+        self.check(game(scenes, start="start: $3\n"), [1, 2], [])
+        self.check(game(scenes, start=""), [3], [])
+        self.check(game(scenes, start="start: $7\n"), [], [])
+
+    def test_items(self):
+
+        """Test that items are reached from reached scenes and items."""
+        self.check(game([(1, "god k is key(1)"), (2, "god b is bell(1)")],
+                        [("lock", "id is x"),
+                         ("key", "opens is lock(x)"),
+                         ("bell", "sound is x")]),
+                   [2], ["bell"])
+
+    def test_long_chain(self):
+
+        """Test that a chain longer than the recursion limit is walked."""
+        scenes = [(i, "moveto $%d" % (i + 1)) for i in range(1, 3000)]
+        self.check(game(scenes + [(3000, "say 1"), (3001, "say 2")]),
+                   [3001], [])
+
+
+class TestOmitUnreachable(unittest.TestCase):
+
+    SOURCE = game([(1, "moves right($2)"), (2, "god k is key(1)"),
+                   (3, "god l is lock(1)")],
+                  [("key", "id is x"), ("lock", "id is x")])
+
+    def generate(self, codegen, **options):
+        p = parser.ParserForNarratr()
+        ast = p.parse(self.SOURCE)
+        c = codegen(**options)
+        c.process(ast, p.symtab)
+        return c
+
+    def test_warnings(self):
+
+        """Test that what is never reached is warned about but kept."""
+        c = self.generate(CodeGen, warn_unreachable=True)
+        self.assertEqual(c.warnings,
+                         ["WARNING: Line 17: Scene $3 cannot be reached " +
+                          "from the start scene.\n",
+                          "WARNING: Line 28: Item lock is not used by any " +
+                          "reachable scene.\n"])
+        self.assertEqual(c.scene_nums, [1, 2, 3])
+        self.assertTrue("s_3_inst = s_3()" in c.main)
+
+    def test_no_warnings(self):
+
+        """Test that the pass does not run unless it is asked for."""
+        c = self.generate(CodeGen)
+        self.assertEqual(c.warnings, [])
+        self.assertEqual(c.scene_nums, [1, 2, 3])
+
+    def test_omit(self):
+
+        """Test that omit_unreachable leaves out the scene and item."""
+        c = self.generate(CodeGen, omit_unreachable=True)
+        self.assertEqual(c.scene_nums, [1, 2])
+        self.assertEqual(c.item_names, ["key"])
+        self.assertFalse("s_3" in c.main)
+        self.assertEqual(len(c.warnings), 2)
+        parallel = self.generate(CodeGen, jobs=2, omit_unreachable=True)
+        self.assertEqual(parallel.scenes, c.scenes)
+        self.assertEqual(parallel.items, c.items)
+
+    def test_omit_ast(self):
+
+        """Test that the ast backend leaves them out as well."""
+        c = self.generate(ASTCodeGen, omit_unreachable=True)
+        self.assertEqual(c.scene_nums, [1, 2])
+        namespace = {"__name__": "game"}
+        exec c.code() in namespace
+        self.assertTrue("key" in namespace and "s_2_inst" in namespace)
+        self.assertFalse("lock" in namespace or "s_3" in namespace)
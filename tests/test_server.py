@@ -0,0 +1,159 @@
+from narratr import client
+from narratr.tests.tempdir import TempDirTestCase
+import os
+import shutil
+import socket
+import stat
+import subprocess
+import sys
+import threading
+import time
+
+
+class TestCompileServer(TempDirTestCase):
+
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.env = dict(os.environ,
+                        NARRATR_SOCKET=os.path.join(self.tmpdir, "sock"),
+                        NARRATR_CACHE_DIR=os.path.join(self.tmpdir, "cache"))
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            self.server.terminate()
+            self.server.wait()
+        TempDirTestCase.tearDown(self)
+
+    def start_server(self):
+        self.server = subprocess.Popen([sys.executable, "server.py"],
+                                       env=self.env)
+        for i in range(100):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.env["NARRATR_SOCKET"])
+                return
+            except socket.error:
+                time.sleep(0.05)
+            finally:
+                probe.close()
+        self.fail("The server did not start.")
+
+    def run_compiler(self, script, args, output):
+        proc = subprocess.Popen([sys.executable, script] + args +
+                                ["-o", os.path.join(self.tmpdir, output)],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, env=self.env)
+        out, err = proc.communicate()
+        return proc.returncode, out, err
+
+    def assertSameAsCLI(self, args):
+        expected = self.run_compiler("narratr.py", args, "cli.py")
+        self.assertEqual(self.run_compiler("client.py", args, "client.py"),
+                         expected)
+        if expected[0] == 0:
+            with open(os.path.join(self.tmpdir, "cli.py")) as f:
+                code = f.read()
+            with open(os.path.join(self.tmpdir, "client.py")) as f:
+                self.assertEqual(f.read(), code)
+
+    def test_client_matches_cli(self):
+
+        """Test that the client behaves exactly like narratr.py."""
+        self.start_server()
+        for name in ["0_helloworld.ntr", "4_while.ntr",
+                     "6_missing_action.ntr", "6_nonexistent_start_scene.ntr"]:
+            source = os.path.join("sampleprograms", name)
+            self.assertSameAsCLI(["--no-cache", source])
+            self.assertSameAsCLI(["-t", "-s", source])
+        self.assertSameAsCLI([os.path.join(self.tmpdir, "missing.ntr")])
+        self.assertSameAsCLI(["--no-such-flag"])
+
+    def test_non_utf8(self):
+
+        """Test that arguments and variables that are not UTF-8 are sent."""
+        self.start_server()
+        source = os.path.join(self.tmpdir, "game\xff.ntr")
+        shutil.copy("sampleprograms/0_helloworld.ntr", source)
+        self.env["NARRATR_NOT_UTF8"] = "\xfe\xff"
+        self.assertSameAsCLI(["--no-cache", source])
+        self.assertSameAsCLI([os.path.join(self.tmpdir, "missing\xff.ntr")])
+
+    def test_concurrent_requests(self):
+
+        """Test that concurrent requests do not interfere."""
+        self.start_server()
+        names = ["0_helloworld.ntr", "4_while.ntr", "demo.ntr",
+                 "6_missing_action.ntr"]
+        expected = [self.run_compiler("narratr.py",
+                                      ["-t", "-s", "--no-cache",
+                                       os.path.join("sampleprograms", name)],
+                                      name + ".py")
+                    for name in names]
+        results = {}
+
+        def compile_many(i):
+            name = names[i % len(names)]
+            results[i] = self.run_compiler("client.py",
+                                           ["-t", "-s", "--no-cache",
+                                            os.path.join("sampleprograms",
+                                                         name)],
+                                           "%d.py" % i)
+        threads = [threading.Thread(target=compile_many, args=(i,))
+                   for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for i in range(16):
+            self.assertEqual(results[i], expected[i % len(names)])
+
+    def test_without_server(self):
+
+        """Test that the client compiles by itself if no server listens."""
+        self.assertSameAsCLI(["--no-cache", "sampleprograms/4_while.ntr"])
+        self.assertSameAsCLI(["sampleprograms/6_missing_action.ntr"])
+
+    def test_private_socket(self):
+
+        """Test that the socket is in a directory of the user's own."""
+        path = os.path.join(self.tmpdir, "run", "sock")
+        self.env["NARRATR_SOCKET"] = path
+        self.start_server()
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode),
+                         0700)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0600)
+        self.assertSameAsCLI(["--no-cache", "sampleprograms/4_while.ntr"])
+
+    def test_shared_directory(self):
+
+        """Test that the server will not listen in a shared directory."""
+        shared = os.path.join(self.tmpdir, "shared")
+        os.mkdir(shared)
+        os.chmod(shared, 0777)
+        self.env["NARRATR_SOCKET"] = os.path.join(shared, "sock")
+        proc = subprocess.Popen([sys.executable, "server.py"],
+                                stderr=subprocess.PIPE, env=self.env)
+        err = proc.communicate()[1]
+        self.assertEqual(proc.returncode, 1)
+        self.assertTrue("only you can use" in err)
+        self.assertFalse(os.path.exists(os.path.join(shared, "sock")))
+
+    def test_foreign_socket(self):
+
+        """Test that the client only connects to a socket of its user."""
+        path = os.path.join(self.tmpdir, "sock")
+        self.assertRaises(socket.error, client.check_owner, path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        try:
+            client.check_owner(path)
+            getuid = os.getuid
+            os.getuid = lambda: getuid() + 1
+            try:
+                self.assertRaises(client.ForeignSocket, client.check_owner,
+                                  path)
+            finally:
+                os.getuid = getuid
+        finally:
+            listener.close()
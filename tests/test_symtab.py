@@ -0,0 +1,106 @@
+from narratr.symtab import SymTab, GLOBAL, POCKET
+import unittest
+
+
+class TestSymTab(unittest.TestCase):
+
+    def setUp(self):
+        self.symtab = SymTab()
+        self.symtab.insert(1, "scene", "scene", "GLOBAL")
+        self.symtab.insert("x", None, None, 1)
+        self.symtab.insert("g", None, None, 1, True)
+        self.symtab.insert("x", None, None, 2)
+        self.symtab.insert("key", None, None, POCKET)
+
+    def test_get(self):
+
+        """Test that entries are found by symbol and scope."""
+        self.assertEqual(self.symtab.get(1, GLOBAL).value, "scene")
+        self.assertTrue(self.symtab.get("g", 1).god)
+        self.assertEqual(self.symtab.get("x", 2).scope, 2)
+        self.assertEqual(self.symtab.get("key", "POCKET").symbol, "key")
+        self.assertEqual(self.symtab.get("y", 1), None)
+        self.assertEqual(self.symtab.get("x", 3), None)
+
+    def test_keys(self):
+
+        """Test that keys are tuples and old string keys still work."""
+        key = self.symtab.getKey("x", 1)
+        self.assertEqual(key, (1, "x"))
+        self.assertTrue(self.symtab.getWithKey(key) is
+                        self.symtab.get("x", 1))
+        self.assertEqual(self.symtab.getKey(1, GLOBAL), ("GLOBAL", 1))
+        self.assertEqual(self.symtab.getWithKey(None), None)
+        self.assertTrue(self.symtab.getWithKey("1.x") is
+                        self.symtab.get("x", 1))
+        self.assertTrue(self.symtab.getWithKey("GLOBAL.1") is
+                        self.symtab.get(1, GLOBAL))
+        self.symtab.addScope("item.lock", "item")
+        self.symtab.insert("id", None, None, "item.lock")
+        self.assertTrue(self.symtab.getWithKey("item.lock.id") is
+                        self.symtab.get("id", "item.lock"))
+        self.assertEqual(self.symtab.getWithKey("1.y"), None)
+        self.assertEqual(self.symtab.getWithKey("x"), None)
+        self.assertEqual(sorted(self.symtab.table.keys()), [
+            "1.g", "1.x", "2.x", "GLOBAL.1", "POCKET.key", "item.lock.id"])
+
+    def test_scopes(self):
+
+        """Test that the symbols of one scope can be listed."""
+        self.assertEqual(sorted(self.symtab.getScope(1).keys()), ["g", "x"])
+        self.assertEqual(self.symtab.getScope(3), {})
+        self.assertEqual(len(self.symtab), 5)
+        self.assertEqual(len(self.symtab.entries()), 5)
+
+    def test_insert_and_update(self):
+
+        """Test that insert and update check for an existing entry."""
+        self.assertRaises(Exception, self.symtab.insert, "x", 1, None, 1)
+        self.assertRaises(Exception, self.symtab.update, "y", 1, None, 1)
+        self.symtab.update("x", 5, "integer", 1)
+        self.assertEqual(self.symtab.get("x", 1).value, 5)
+        self.assertEqual(len(self.symtab), 5)
+
+    def test_resolve(self):
+
+        """Test that names are looked up in the scopes a scope is inside."""
+        self.symtab.addScope("item.thing", "item")
+        self.symtab.insert("thing", None, "item", GLOBAL)
+        self.assertEqual(self.symtab.chain(1), [1, "GLOBAL", "POCKET"])
+        self.assertEqual(self.symtab.chain("item.thing"),
+                         ["item.thing", "GLOBAL", "POCKET"])
+        self.assertEqual(self.symtab.scopeType("item.thing"), "item")
+        self.assertEqual(self.symtab.scopeType(1), "scene")
+        self.assertEqual(self.symtab.scopeType(GLOBAL), "global")
+        self.assertTrue(self.symtab.resolve("x", 1) is
+                        self.symtab.get("x", 1))
+        self.assertEqual(self.symtab.resolve("thing", 1).scope, GLOBAL)
+        self.assertEqual(self.symtab.resolve("key", "item.thing").scope,
+                         POCKET)
+        self.assertEqual(self.symtab.resolve("y", 1), None)
+
+    def test_resolve_after_insert(self):
+
+        """Test that resolve sees entries added after it was asked."""
+        self.assertEqual(self.symtab.resolve("y", 1), None)
+        self.symtab.insert("y", None, None, GLOBAL)
+        self.assertEqual(self.symtab.resolve("y", 1).scope, GLOBAL)
+        self.symtab.insert("y", None, None, 1)
+        self.assertEqual(self.symtab.resolve("y", 1).scope, 1)
+        self.assertEqual(self.symtab.resolve("y", 2).scope, GLOBAL)
+
+    def test_slots(self):
+
+        """Test that the variables of a scene get slots in order."""
+        self.assertEqual(self.symtab.get("x", 1).slot, 0)
+        self.assertEqual(self.symtab.get("g", 1).slot, None)
+        self.assertEqual(self.symtab.get(1, GLOBAL).slot, None)
+        self.symtab.insert("z", None, None, 1)
+        self.assertEqual(self.symtab.get("z", 1).slot, 1)
+        self.assertEqual(self.symtab.slotCount(1), 2)
+        self.assertEqual(self.symtab.slotCount(3), 0)
+        self.symtab.addScope("item.thing", "item")
+        self.symtab.insert("m", None, None, "item.thing")
+        self.assertEqual(self.symtab.get("m", "item.thing").slot, None)
+        self.symtab.update("z", 5, "integer", 1)
+        self.assertEqual(self.symtab.get("z", 1).slot, 1)
@@ -0,0 +1,74 @@
+from narratr.node import Node
+from narratr.visitor import dispatch_table
+from narratr import kinds
+from narratr.codegen import CodeGen
+import narratr.narratr as driver
+import narratr.parser as parser
+import StringIO
+import sys
+import unittest
+
+
+def nested_ifs(depth):
+    lines = ["scene $1 {", "    setup:", "        x is 1"]
+    for level in range(depth):
+        lines.append("    " * (level + 2) + "if x > %d:" % level)
+    lines.append("    " * (depth + 2) + 'say "deep"')
+    lines += ["    action:", '        say "action"',
+              "    cleanup:", '        say "cleanup"', "}", "start: $1"]
+    return "\n".join(lines) + "\n"
+
+
+class TestVisitor(unittest.TestCase):
+
+    def test_dispatch_table(self):
+
+        """Test that a dispatch table has a handler for every kind."""
+        table = dispatch_table({kinds.ATOM: "atom"}, "other")
+        self.assertEqual(len(table), len(kinds.NAMES))
+        self.assertEqual(table[kinds.ATOM], "atom")
+        self.assertEqual(table[kinds.TERM], "other")
+        self.assertEqual(dispatch_table({})[kinds.NUMBER], None)
+        self.assertRaises(ValueError, dispatch_table, {len(kinds.NAMES): 1})
+        self.assertRaises(ValueError, dispatch_table, {"atom": 1})
+
+    def test_print_tree(self):
+
+        """Test that print_tree prints a line per node and child."""
+        tree = Node(None, "if_statement", [Node("x", "atom", v_type="id",
+                                                lineno=2), None])
+        stdout = sys.stdout
+        sys.stdout = StringIO.StringIO()
+        try:
+            driver.print_tree(tree, 0)
+            out = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        self.assertEqual(out.splitlines(), [
+            "if_statement (line num: 0)",
+            "    atom (value: x) (value type: id) (line num: 2)",
+            "    [Something bad happened]"])
+
+    def test_deep_nesting(self):
+
+        """Test that a tree deeper than the recursion limit is walked."""
+        p = parser.ParserForNarratr()
+        source = nested_ifs(500)
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(200)
+        stdout = sys.stdout
+        sys.stdout = StringIO.StringIO()
+        try:
+            ast = p.parse(source)
+            gen = CodeGen()
+            gen.process(ast, p.symtab)
+            driver.print_tree(ast, 0)
+            out = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+            sys.setrecursionlimit(limit)
+        lines = gen.scenes[0].splitlines()
+        self.assertEqual(len([l for l in lines if "(__vars[0]) >" in l]), 500)
+        self.assertTrue(any(l.startswith(" " * 4 * 502) and "deep" in l
+                            for l in lines))
+        self.assertEqual(out.count("if_statement"), 500)
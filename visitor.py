@@ -0,0 +1,33 @@
+# -----------------------------------------------------------------------------
+# narrtr: visitor.py
+# This file defines dispatch on the kind of a node, shared by the passes over
+# the narratr AST.
+#
+# Copyright (C) 2015 Team narratr
+# All Rights Reserved
+# Team narratr: Yelin Hong, Shloka Kini, Nivvedan Senthamil Selvan, Jonah
+# Smith, Cecilia Watt
+#
+# Any questions, bug reports and complaints are to be directed at the primary
+# author.
+#
+# -----------------------------------------------------------------------------
+
+import kinds
+
+
+def dispatch_table(handlers, default=None):
+    """Return a list of handlers indexed by node kind.
+
+    handlers is a dictionary from kinds to functions; every kind that is not
+    in it gets default. The handler for a node is then table[node.kind], a
+    single list index, instead of a chain of comparisons. The kinds are all
+    known when kinds is imported, so the table has an entry for every kind
+    a node can have, and a key of handlers that is not a kind is a
+    ValueError."""
+    table = [default] * len(kinds.NAMES)
+    for kind, handler in handlers.iteritems():
+        if type(kind) is not int or not 0 <= kind < len(table):
+            raise ValueError("There is no node kind " + repr(kind) + ".")
+        table[kind] = handler
+    return table